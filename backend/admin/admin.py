@@ -2,7 +2,7 @@ from sqladmin import Admin, ModelView
 from sqladmin.authentication import AuthenticationBackend
 from starlette.requests import Request
 
-from models import Page, User, Message, Log, SalesLead  # ← added SalesLead
+from models import Page, User, Message, Log, SalesLead, Product
 from config import get_settings
 
 settings = get_settings()
@@ -41,7 +41,7 @@ class PageAdmin(ModelView, model=Page):
     column_searchable_list = [Page.name]
     column_sortable_list = [Page.name, Page.created_at]
     column_details_exclude_list = [Page.access_token]
-    form_excluded_columns = ["users", "messages", "logs", "sales_leads"]
+    form_excluded_columns = ["users", "messages", "logs", "sales_leads", "products"]
 
 
 class UserAdmin(ModelView, model=User):
@@ -90,6 +90,16 @@ class SalesLeadAdmin(ModelView, model=SalesLead):      # ← new
     form_excluded_columns = ["page", "user"]
 
 
+class ProductAdmin(ModelView, model=Product):
+    name = "Product"
+    name_plural = "Products"
+    icon = "fa-solid fa-box"
+    column_list = [Product.id, Product.page_id, Product.name, Product.price, Product.is_active, Product.updated_at]
+    column_searchable_list = [Product.name, Product.sku]
+    column_sortable_list = [Product.name, Product.updated_at]
+    form_excluded_columns = ["page", "updated_at"]
+
+
 # ── Setup ─────────────────────────────────────────────────────────────────────
 
 def setup_admin(app, engine):
@@ -102,5 +112,6 @@ def setup_admin(app, engine):
     admin.add_view(MessageAdmin)
     admin.add_view(LogAdmin)
     admin.add_view(SalesLeadAdmin)   # ← added
+    admin.add_view(ProductAdmin)
 
     return admin
\ No newline at end of file
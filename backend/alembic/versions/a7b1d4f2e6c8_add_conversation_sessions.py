@@ -0,0 +1,102 @@
+"""add conversation_sessions and messages.session_id
+
+Revision ID: a7b1d4f2e6c8
+Revises: f6a9c3e1d5b7
+Create Date: 2026-10-18 15:40:03.126745
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b1d4f2e6c8'
+down_revision: Union[str, Sequence[str], None] = 'f6a9c3e1d5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Existing messages are split with the same 2-hour gap rule the pipeline
+# used before sessions were stored (services.history.SESSION_GAP_SECONDS).
+BACKFILL_SESSIONS = """
+    WITH flagged AS (
+        SELECT id, user_id, page_id, sent_at,
+               CASE WHEN sent_at - LAG(sent_at) OVER w <= interval '7200 seconds'
+                    THEN 0 ELSE 1 END AS is_start
+        FROM messages
+        WINDOW w AS (PARTITION BY user_id, page_id ORDER BY sent_at, id)
+    ),
+    numbered AS (
+        SELECT user_id, page_id, sent_at,
+               SUM(is_start) OVER (PARTITION BY user_id, page_id ORDER BY sent_at, id) AS session_no
+        FROM flagged
+    )
+    INSERT INTO conversation_sessions
+        (page_id, user_id, started_at, last_message_at, message_count, order_confirmed)
+    SELECT page_id, user_id, MIN(sent_at), MAX(sent_at), COUNT(*), false
+    FROM numbered
+    GROUP BY user_id, page_id, session_no
+"""
+
+BACKFILL_MESSAGES = """
+    UPDATE messages SET session_id = (
+        SELECT cs.id FROM conversation_sessions cs
+        WHERE cs.user_id = messages.user_id
+          AND cs.page_id = messages.page_id
+          AND cs.started_at <= messages.sent_at
+        ORDER BY cs.started_at DESC
+        LIMIT 1
+    )
+"""
+
+# Sessions during which an order was confirmed are closed, so the next
+# message after deploy does not reopen a finished order.
+BACKFILL_CLOSED = """
+    UPDATE conversation_sessions cs
+    SET order_confirmed = true, closed_at = l.detected_at
+    FROM sales_leads l
+    WHERE l.user_id = cs.user_id
+      AND l.page_id = cs.page_id
+      AND l.detected_at BETWEEN cs.started_at AND cs.last_message_at + interval '1 minute'
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'conversation_sessions',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('page_id', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('message_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('order_confirmed', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['page_id'], ['pages.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_conversation_sessions_user_last', 'conversation_sessions', ['user_id', 'page_id', 'last_message_at'], unique=False)
+    op.create_index('ix_conversation_sessions_page_started', 'conversation_sessions', ['page_id', 'started_at'], unique=False)
+
+    op.add_column('messages', sa.Column('session_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_messages_session_id', 'messages', 'conversation_sessions', ['session_id'], ['id'])
+    op.create_index('ix_messages_session_sent_at', 'messages', ['session_id', 'sent_at'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(BACKFILL_SESSIONS)
+        op.execute(BACKFILL_MESSAGES)
+        op.execute(BACKFILL_CLOSED)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_session_sent_at', table_name='messages')
+    op.drop_constraint('fk_messages_session_id', 'messages', type_='foreignkey')
+    op.drop_column('messages', 'session_id')
+    op.drop_index('ix_conversation_sessions_page_started', table_name='conversation_sessions')
+    op.drop_index('ix_conversation_sessions_user_last', table_name='conversation_sessions')
+    op.drop_table('conversation_sessions')
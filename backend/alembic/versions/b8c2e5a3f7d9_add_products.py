@@ -0,0 +1,42 @@
+"""add products
+
+Revision ID: b8c2e5a3f7d9
+Revises: a7b1d4f2e6c8
+Create Date: 2026-10-18 16:52:18.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c2e5a3f7d9'
+down_revision: Union[str, Sequence[str], None] = 'a7b1d4f2e6c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'products',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('page_id', sa.String(length=64), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('price', sa.String(length=64), nullable=True),
+        sa.Column('sku', sa.String(length=64), nullable=True),
+        sa.Column('is_active', sa.Boolean(), server_default='true', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['page_id'], ['pages.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_products_page_updated', 'products', ['page_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_page_updated', table_name='products')
+    op.drop_table('products')
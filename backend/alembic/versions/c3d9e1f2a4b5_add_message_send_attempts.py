@@ -0,0 +1,31 @@
+"""add message send_attempts
+
+Revision ID: c3d9e1f2a4b5
+Revises: 7beb2aa237e2
+Create Date: 2026-10-18 09:12:40.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d9e1f2a4b5'
+down_revision: Union[str, Sequence[str], None] = '7beb2aa237e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column('send_attempts', sa.Integer(), nullable=False, server_default='0'))
+    # The redrive loop scans for failed AI replies
+    op.create_index('ix_messages_status_sent_at', 'messages', ['status', 'sent_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_status_sent_at', table_name='messages')
+    op.drop_column('messages', 'send_attempts')
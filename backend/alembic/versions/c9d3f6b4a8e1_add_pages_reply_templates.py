@@ -0,0 +1,28 @@
+"""add pages.reply_templates
+
+Revision ID: c9d3f6b4a8e1
+Revises: b8c2e5a3f7d9
+Create Date: 2026-10-18 18:47:05.214830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d3f6b4a8e1'
+down_revision: Union[str, Sequence[str], None] = 'b8c2e5a3f7d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('pages', sa.Column('reply_templates', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('pages', 'reply_templates')
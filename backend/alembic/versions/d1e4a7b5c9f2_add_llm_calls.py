@@ -0,0 +1,46 @@
+"""add llm_calls
+
+Revision ID: d1e4a7b5c9f2
+Revises: c9d3f6b4a8e1
+Create Date: 2026-10-18 20:21:36.772941
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1e4a7b5c9f2'
+down_revision: Union[str, Sequence[str], None] = 'c9d3f6b4a8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'llm_calls',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('page_id', sa.String(length=64), nullable=True),
+        sa.Column('call_site', sa.String(length=32), nullable=False),
+        sa.Column('model', sa.String(length=64), nullable=False),
+        sa.Column('prompt_version', sa.Integer(), nullable=True),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False),
+        sa.Column('cached_tokens', sa.Integer(), nullable=False),
+        sa.Column('latency_ms', sa.Integer(), nullable=False),
+        sa.Column('outcome', sa.String(length=16), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_llm_calls_page_created', 'llm_calls', ['page_id', 'created_at'], unique=False)
+    op.create_index('ix_llm_calls_created', 'llm_calls', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_llm_calls_created', table_name='llm_calls')
+    op.drop_index('ix_llm_calls_page_created', table_name='llm_calls')
+    op.drop_table('llm_calls')
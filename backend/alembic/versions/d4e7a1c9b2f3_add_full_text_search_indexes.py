@@ -0,0 +1,54 @@
+"""add full-text search indexes
+
+Revision ID: d4e7a1c9b2f3
+Revises: c3d9e1f2a4b5
+Create Date: 2026-10-18 11:40:03.551904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e7a1c9b2f3'
+down_revision: Union[str, Sequence[str], None] = 'c3d9e1f2a4b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match models.MESSAGE_TSVECTOR / models.LEAD_TSVECTOR exactly
+MESSAGE_TSVECTOR = "to_tsvector('simple', content)"
+LEAD_TSVECTOR = (
+    "to_tsvector('simple', coalesce(product_interest, '') || ' ' || "
+    "coalesce(delivery_address, '') || ' ' || coalesce(order_notes, ''))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sales_leads', sa.Column('phone_normalized', sa.String(length=50), nullable=True))
+    op.execute(
+        "UPDATE sales_leads SET phone_normalized = NULLIF(regexp_replace(phone_number, '\\D', '', 'g'), '') "
+        "WHERE phone_number IS NOT NULL"
+    )
+    op.create_index(
+        'ix_sales_leads_phone_normalized', 'sales_leads', ['phone_normalized'],
+        unique=False, postgresql_ops={'phone_normalized': 'text_pattern_ops'},
+    )
+    op.create_index(
+        'ix_messages_content_fts', 'messages', [sa.text(MESSAGE_TSVECTOR)],
+        unique=False, postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_sales_leads_search_fts', 'sales_leads', [sa.text(LEAD_TSVECTOR)],
+        unique=False, postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sales_leads_search_fts', table_name='sales_leads')
+    op.drop_index('ix_messages_content_fts', table_name='messages')
+    op.drop_index('ix_sales_leads_phone_normalized', table_name='sales_leads')
+    op.drop_column('sales_leads', 'phone_normalized')
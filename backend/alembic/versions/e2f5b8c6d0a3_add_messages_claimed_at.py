@@ -0,0 +1,28 @@
+"""add messages claimed_at
+
+Revision ID: e2f5b8c6d0a3
+Revises: d1e4a7b5c9f2
+Create Date: 2026-10-18 22:04:17.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f5b8c6d0a3'
+down_revision: Union[str, Sequence[str], None] = 'd1e4a7b5c9f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('messages', 'claimed_at')
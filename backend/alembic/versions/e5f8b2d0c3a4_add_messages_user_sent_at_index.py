@@ -0,0 +1,28 @@
+"""add messages (user_id, sent_at) index
+
+Revision ID: e5f8b2d0c3a4
+Revises: d4e7a1c9b2f3
+Create Date: 2026-10-18 13:05:21.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f8b2d0c3a4'
+down_revision: Union[str, Sequence[str], None] = 'd4e7a1c9b2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_messages_user_sent_at', 'messages', ['user_id', 'sent_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_user_sent_at', table_name='messages')
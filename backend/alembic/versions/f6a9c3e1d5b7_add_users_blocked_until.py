@@ -0,0 +1,28 @@
+"""add users.blocked_until
+
+Revision ID: f6a9c3e1d5b7
+Revises: e5f8b2d0c3a4
+Create Date: 2026-10-18 14:12:40.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a9c3e1d5b7'
+down_revision: Union[str, Sequence[str], None] = 'e5f8b2d0c3a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('blocked_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'blocked_until')
@@ -8,7 +8,6 @@ import httpx
 import os
 from typing import Optional, List, Dict
 from dotenv import load_dotenv
-from google import genai
 from token_manager import TokenManager
 
 
@@ -32,7 +31,17 @@ FB_REDIRECT_URI = os.getenv("FB_REDIRECT_URI", "http://localhost:8000/auth/faceb
 VERIFY_TOKEN = os.getenv("WEBHOOK_VERIFY_TOKEN", "SIUUU")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-gu = genai.Client()
+_gu = None
+
+
+def get_genai_client():
+    """Created on first use: building the client at import slowed every boot."""
+    global _gu
+    if _gu is None:
+        from google import genai
+        _gu = genai.Client()
+    return _gu
+
 # Store tokens in memory (use database in production)
 user_tokens = {}
 
@@ -555,7 +564,7 @@ async def get_ai_res(payload: AIRequest):
     if not msg:
         return {"error": "Message is empty"}
 
-    response = gu.models.generate_content(
+    response = get_genai_client().models.generate_content(
         model="gemini-3-flash-preview",
         contents=msg
     )
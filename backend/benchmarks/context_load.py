@@ -0,0 +1,127 @@
+"""
+benchmarks/context_load.py
+
+Pre-LLM latency per message: the four sequential lookups the pipeline used
+to make (Page get, User select, last-30 history window, last lead) versus
+the single composed query in services/context.py, which loads the user's
+whole current conversation session.
+
+Runs against DATABASE_URL, so point it at the real Postgres to see the
+round-trip savings; on local SQLite both variants are dominated by Python
+overhead. Seeds one page with --users customers of --messages each.
+
+Run from backend/:
+
+    python -m benchmarks.context_load --users 50 --messages 40 --iterations 500
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from benchmarks.history_alloc import history_query
+from database import AsyncSessionLocal, init_db
+from models import ConversationSession, Message, Page, SalesLead, User
+from services.context import load_reply_context
+from services.history import HistoryTurn
+from services.metrics import DB_QUERIES
+
+PAGE_ID = "bench_ctx_page"
+LEGACY_WINDOW = 30
+
+
+async def seed(users: int, messages: int) -> list[str]:
+    await init_db()
+    psids = [f"bench_ctx_user_{i}" for i in range(users)]
+    async with AsyncSessionLocal() as db:
+        if await db.get(Page, PAGE_ID):
+            return psids
+        db.add(Page(id=PAGE_ID, name="Context bench", access_token="stub", is_active=True))
+        await db.flush()
+        start = datetime.now(timezone.utc) - timedelta(minutes=messages)
+        for psid in psids:
+            user = User(user_id=psid, page_id=PAGE_ID)
+            db.add(user)
+            await db.flush()
+            # Recent enough that the session is still open when the bench runs
+            session = ConversationSession(
+                page_id=PAGE_ID, user_id=user.id, started_at=start,
+                last_message_at=start + timedelta(minutes=messages - 1),
+                message_count=messages,
+            )
+            db.add(session)
+            await db.flush()
+            db.add_all(
+                Message(
+                    user_id=user.id, page_id=PAGE_ID, session_id=session.id,
+                    from_role="user" if i % 2 == 0 else "ai",
+                    content=f"message {i}", sent_at=start + timedelta(minutes=i),
+                )
+                for i in range(messages)
+            )
+        await db.commit()
+    return psids
+
+
+async def sequential(psid: str) -> None:
+    """The pre-loader shape: one round trip per lookup."""
+    async with AsyncSessionLocal() as db:
+        page = await db.get(Page, PAGE_ID)
+        user = (await db.execute(
+            select(User).where(User.user_id == psid, User.page_id == PAGE_ID)
+        )).scalar_one_or_none()
+        rows = (await db.execute(history_query(user.id, page.id, LEGACY_WINDOW))).all()
+        [HistoryTurn(*row) for row in reversed(rows)]
+        (await db.execute(
+            select(SalesLead)
+            .where(SalesLead.user_id == user.id, SalesLead.page_id == PAGE_ID)
+            .order_by(SalesLead.detected_at.desc())
+            .limit(1)
+        )).scalar_one_or_none()
+
+
+async def composed(psid: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await load_reply_context(db, PAGE_ID, psid)
+
+
+async def measure(fn, psids: list[str], iterations: int) -> tuple[list[float], float]:
+    await fn(psids[0])  # warm the pool and statement caches
+    before = DB_QUERIES.value()
+    timings = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await fn(random.choice(psids))
+        timings.append(time.perf_counter() - t0)
+    return timings, (DB_QUERIES.value() - before) / iterations
+
+
+async def main(args: argparse.Namespace) -> None:
+    psids = await seed(args.users, args.messages)
+    print(f"{args.iterations} loads, {args.users} users × {args.messages} messages")
+    for label, fn in (("sequential", sequential), ("composed", composed)):
+        timings, statements = await measure(fn, psids, args.iterations)
+        print(
+            f"  {label:<10}  "
+            f"p50={statistics.median(timings) * 1000:.2f}ms  "
+            f"p95={statistics.quantiles(timings, n=20)[-1] * 1000:.2f}ms  "
+            f"mean={statistics.mean(timings) * 1000:.2f}ms  "
+            f"statements/msg={statements:.1f}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--users", type=int, default=50)
+    p.add_argument("--messages", type=int, default=40)
+    p.add_argument("--iterations", type=int, default=500)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
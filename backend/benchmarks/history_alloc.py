@@ -0,0 +1,130 @@
+"""
+benchmarks/history_alloc.py
+
+Per-turn cost of loading conversation history: full ORM Message objects
+turned into role/content dicts (the old path) versus the column-only
+select into HistoryTurn tuples that messenger.py now uses.
+
+Both variants run the same query shape against an in-memory SQLite
+database and then build the LLM message list plus the lead-extraction
+transcript, so the numbers cover one full pipeline turn's worth of
+history handling. Allocations are measured with tracemalloc (peak bytes
+per turn), time with perf_counter.
+
+Run from backend/:
+
+    python -m benchmarks.history_alloc --messages 30 --turns 2000
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import Message, Page, User
+from services.history import HistoryTurn, to_llm_messages
+from services.lead_detector import _build_conversation_text
+
+PAGE_ID = "bench_page"
+
+
+def history_query(user_id: int, page_id: str, limit: int):
+    """Newest-first window of a user's messages on a page, column-only."""
+    return (
+        select(Message.from_role, Message.content, Message.sent_at)
+        .where(Message.user_id == user_id, Message.page_id == page_id)
+        .order_by(Message.sent_at.desc())
+        .limit(limit)
+    )
+
+
+def seed(session: Session, messages: int) -> int:
+    session.add(Page(id=PAGE_ID, name="Bench", access_token="stub", is_active=True))
+    user = User(user_id="bench_user", page_id=PAGE_ID)
+    session.add(user)
+    session.flush()
+    start = datetime.utcnow() - timedelta(minutes=messages)
+    for i in range(messages):
+        session.add(Message(
+            user_id=user.id,
+            page_id=PAGE_ID,
+            from_role="user" if i % 2 == 0 else "ai",
+            content=f"message {i} " + "lorem ipsum dolor sit amet " * 4,
+            sent_at=start + timedelta(minutes=i),
+        ))
+    session.commit()
+    return user.id
+
+
+def orm_turn(session: Session, user_id: int, limit: int) -> None:
+    rows = session.execute(
+        select(Message)
+        .where(Message.user_id == user_id, Message.page_id == PAGE_ID)
+        .order_by(Message.sent_at.desc())
+        .limit(limit)
+    ).scalars().all()
+    history = [
+        {"role": "user" if m.from_role == "user" else "assistant", "content": m.content}
+        for m in reversed(rows)
+    ]
+    lines = [f"{'Customer' if h['role'] == 'user' else 'Bot'}: {h['content']}" for h in history]
+    lines.append("Customer: yes")
+    "\n".join(lines)
+    # Request-scoped sessions drop their identity map at the end of the turn
+    session.expunge_all()
+
+
+def tuple_turn(session: Session, user_id: int, limit: int) -> None:
+    rows = session.execute(history_query(user_id, PAGE_ID, limit)).all()
+    history = [HistoryTurn(*row) for row in reversed(rows)]
+    to_llm_messages(history)
+    _build_conversation_text(history, "yes")
+
+
+def measure(fn, session: Session, user_id: int, limit: int, turns: int) -> tuple[float, int]:
+    fn(session, user_id, limit)  # warm statement caches
+
+    t0 = time.perf_counter()
+    for _ in range(turns):
+        fn(session, user_id, limit)
+    per_turn = (time.perf_counter() - t0) / turns
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(min(turns, 200)):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(session, user_id, limit)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return per_turn, sorted(peaks)[len(peaks) // 2]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--messages", type=int, default=30, help="history window per turn")
+    p.add_argument("--turns", type=int, default=2000)
+    args = p.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        user_id = seed(session, args.messages)
+        results = {
+            "orm + dicts": measure(orm_turn, session, user_id, args.messages, args.turns),
+            "HistoryTurn": measure(tuple_turn, session, user_id, args.messages, args.turns),
+        }
+
+    print(f"History window: {args.messages} messages, {args.turns} turns")
+    for label, (seconds, peak) in results.items():
+        print(f"  {label:<12} {seconds * 1e6:8.1f} µs/turn   peak alloc {peak / 1024:7.1f} KiB/turn")
+    (t_orm, m_orm), (t_tup, m_tup) = results.values()
+    print(f"  saved        {(1 - t_tup / t_orm) * 100:5.1f}% time   {(1 - m_tup / m_orm) * 100:5.1f}% peak alloc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+benchmarks/loadtest.py
+
+Replays synthetic Messenger webhook traffic against the app, with local
+stubs standing in for Groq and graph.facebook.com.
+
+Each simulated customer runs a full order flow (greeting → intent → phone →
+address → "yes"), sending the next message only after the bot's reply for
+the previous one reaches the Graph stub. Many pages × many PSIDs run
+concurrently.
+
+Run from backend/:
+
+    python -m benchmarks.loadtest --pages 10 --users 200 --concurrency 50 \
+        --llm-latency 0.8 --graph-latency 0.1
+
+By default the harness seeds pages into DATABASE_URL and starts the app
+itself (uvicorn subprocess) pointed at the stubs. Pass --target to hit an
+app you started yourself; it must run with FB_GRAPH_URL / GROQ_BASE_URL set
+to the stub addresses printed at startup.
+
+Reported: webhook ack latency, end-to-end reply latency percentiles,
+throughput, and DB statements per message (from /metrics).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+import uvicorn
+
+from benchmarks.stubs import GraphRecorder, make_graph_app, make_llm_app
+
+ORDER_FLOW = [
+    "hi",
+    "I want to order 2 t-shirts",
+    "9800000000",
+    "Kathmandu, Baneshwor",
+    "yes",
+]
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def webhook_payload(page_id: str, psid: str, text: str) -> dict:
+    now_ms = int(time.time() * 1000)
+    return {
+        "object": "page",
+        "entry": [{
+            "id": page_id,
+            "time": now_ms,
+            "messaging": [{
+                "sender": {"id": psid},
+                "recipient": {"id": page_id},
+                "timestamp": now_ms,
+                "message": {"mid": f"m_{uuid.uuid4().hex}", "text": text},
+            }],
+        }],
+    }
+
+
+async def scrape_counter(client: httpx.AsyncClient, name: str) -> float:
+    r = await client.get("/metrics")
+    total = 0.0
+    for line in r.text.splitlines():
+        if line.startswith(name) and not line.startswith("#"):
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+async def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server
+
+
+async def seed_pages(page_ids: list[str]) -> None:
+    from sqlalchemy import select
+    from database import AsyncSessionLocal, init_db
+    from models import Page
+
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        existing = set((await db.execute(select(Page.id).where(Page.id.in_(page_ids)))).scalars())
+        for page_id in page_ids:
+            if page_id not in existing:
+                db.add(Page(id=page_id, name=f"Load test {page_id}", access_token="stub", is_active=True))
+        await db.commit()
+
+
+async def wait_healthy(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"App at {base_url} did not become healthy")
+
+
+# ── Load generation ───────────────────────────────────────────────────────────
+
+class Results:
+    def __init__(self):
+        self.ack: list[float] = []
+        self.e2e: list[float] = []
+        self.timeouts = 0
+        self.errors = 0
+
+
+async def run_flow(
+    client: httpx.AsyncClient,
+    recorder: GraphRecorder,
+    results: Results,
+    page_id: str,
+    psid: str,
+    reply_timeout: float,
+    think_time: float,
+) -> None:
+    for text in ORDER_FLOW:
+        t0 = time.perf_counter()
+        try:
+            r = await client.post("/webhook", json=webhook_payload(page_id, psid, text))
+        except httpx.HTTPError:
+            results.errors += 1
+            return
+        results.ack.append(time.perf_counter() - t0)
+        if r.status_code != 200:
+            results.errors += 1
+            return
+
+        arrived = await recorder.wait_reply(psid, reply_timeout)
+        if arrived is None:
+            results.timeouts += 1
+            return
+        results.e2e.append(arrived - t0)
+
+        if think_time:
+            await asyncio.sleep(random.uniform(0, think_time))
+
+
+async def main(args: argparse.Namespace) -> None:
+    recorder = GraphRecorder()
+    llm = await serve(make_llm_app(args.llm_latency), args.llm_port)
+    graph = await serve(make_graph_app(args.graph_latency, recorder), args.graph_port)
+    stub_env = {
+        "GROQ_BASE_URL": f"http://127.0.0.1:{args.llm_port}",
+        "GROQ_API_KEY": "stub",
+        "FB_GRAPH_URL": f"http://127.0.0.1:{args.graph_port}",
+    }
+    print("Stub env:", " ".join(f"{k}={v}" for k, v in stub_env.items()))
+
+    page_ids = [f"lt_page_{i}" for i in range(args.pages)]
+    app_proc = None
+    target = args.target
+    if not target:
+        os.environ.update(stub_env)
+        await seed_pages(page_ids)
+        target = f"http://127.0.0.1:{args.app_port}"
+        app_proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            env={**os.environ, **stub_env, "LOG_LEVEL": "WARNING"},
+        )
+    await wait_healthy(target)
+
+    results = Results()
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=target, limits=limits, timeout=30) as client:
+            queries_before = await scrape_counter(client, "db_queries_total")
+            sem = asyncio.Semaphore(args.concurrency)
+
+            async def one(i: int):
+                async with sem:
+                    await run_flow(
+                        client, recorder, results,
+                        page_id=page_ids[i % len(page_ids)],
+                        psid=f"lt_user_{uuid.uuid4().hex[:10]}",
+                        reply_timeout=args.reply_timeout,
+                        think_time=args.think_time,
+                    )
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(args.users)))
+            elapsed = time.perf_counter() - t0
+            queries = await scrape_counter(client, "db_queries_total") - queries_before
+    finally:
+        if app_proc:
+            app_proc.terminate()
+            app_proc.wait()
+        llm.should_exit = graph.should_exit = True
+
+    sent = len(results.ack)
+    print()
+    print(f"Flows: {args.users}  pages: {args.pages}  concurrency: {args.concurrency}")
+    print(f"Messages: {sent}  replies: {len(results.e2e)}  timeouts: {results.timeouts}  errors: {results.errors}")
+    print(f"Duration: {elapsed:.1f}s  throughput: {sent / elapsed:.1f} msg/s")
+    for label, values in (("ack", results.ack), ("reply", results.e2e)):
+        print(
+            f"{label:>5} latency ms  "
+            f"p50={percentile(values, 50) * 1000:.0f}  "
+            f"p90={percentile(values, 90) * 1000:.0f}  "
+            f"p99={percentile(values, 99) * 1000:.0f}  "
+            f"max={max(values, default=0) * 1000:.0f}"
+        )
+    if args.workers == 1:
+        print(f"DB statements: {queries:.0f}  ({queries / max(sent, 1):.1f} per message)")
+    else:
+        print("DB statements: n/a with --workers > 1 (/metrics is per worker)")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--pages", type=int, default=10)
+    p.add_argument("--users", type=int, default=100, help="number of customer order flows")
+    p.add_argument("--concurrency", type=int, default=25, help="flows in flight at once")
+    p.add_argument("--llm-latency", type=float, default=0.8, help="mean stub LLM latency, seconds")
+    p.add_argument("--graph-latency", type=float, default=0.1, help="mean stub Graph latency, seconds")
+    p.add_argument("--think-time", type=float, default=0.0, help="max pause between customer messages")
+    p.add_argument("--reply-timeout", type=float, default=30.0)
+    p.add_argument("--target", help="base URL of an already running app")
+    p.add_argument("--app-port", type=int, default=8100)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--llm-port", type=int, default=9101)
+    p.add_argument("--graph-port", type=int, default=9102)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
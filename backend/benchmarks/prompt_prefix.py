@@ -0,0 +1,106 @@
+"""
+benchmarks/prompt_prefix.py
+
+How much of each reply request a provider-side prompt cache can reuse.
+Replays the load test's order flow for one customer and, for every turn,
+measures the longest byte prefix the request shares with the previous
+turn's request (what a prefix cache can serve), for:
+
+    legacy  — instructions, returning-customer details and catalog matches
+              all folded into the leading system message
+    current — services/ai_service.build_messages(): stable page prefix,
+              session history, then per-turn context at the tail
+
+Offline and deterministic: no DB, no LLM. The real hit rate is on
+/metrics as llm_tokens_total{kind="cached"} vs {kind="prompt"}.
+
+Run from backend/:
+
+    python -m benchmarks.prompt_prefix --browse-turns 0 5 10
+
+--browse-turns adds product questions before the order starts. The
+legacy layout loses the whole history every turn, the current one only
+the previous turn's tail context, so the gap widens with session length.
+"""
+
+import argparse
+import json
+
+from services.ai_service import SYSTEM_PROMPT, build_messages
+from services.catalog import CatalogHit
+from services.history import HistoryTurn, to_llm_messages
+
+# Same flow as benchmarks/loadtest.py (not imported: that pulls in httpx / uvicorn)
+ORDER_FLOW = ["hi", "I want to order 2 t-shirts", "9800000000", "Kathmandu, Baneshwor", "yes"]
+INSTRUCTIONS = "We sell cotton t-shirts (S–XXL) for Rs 900. Delivery inside the valley is free."
+REMEMBERED = {"phone": "9800000000", "address": "Kathmandu, Baneshwor"}
+CATALOG = [
+    CatalogHit(f"T-shirt {colour}", "Rs 900", f"100% cotton, {colour}")
+    for colour in ("black", "white", "navy", "red", "olive", "grey")
+]
+BOT_REPLIES = [
+    "Hi! 👋 What are you looking for today?",
+    "Great choice! Shall I send them to Kathmandu, Baneshwor and call you on 9800000000?",
+    "Thanks! And the delivery address?",
+    "Here's your order summary:\n📦 2 t-shirts\n📞 9800000000\n📍 Kathmandu, Baneshwor\n\n"
+    "Reply YES to confirm your order, or let me know if anything needs changing.",
+    "Your order is confirmed! We'll be in touch soon.",
+]
+
+
+BROWSE_QUESTION = "Do you have this in other colours and sizes?"
+BROWSE_REPLY = "Yes! We have black, white, navy, red, olive and grey, from S to XXL. 😊"
+
+
+def legacy_messages(message, instructions, history, remembered, products) -> list[dict]:
+    system = SYSTEM_PROMPT + f"\n\nADDITIONAL INSTRUCTIONS\n{instructions}"
+    lines = "\n".join(f"  {k.capitalize()}: {v}" for k, v in remembered.items())
+    system += f"\n\nRETURNING CUSTOMER — saved from a previous order\n{lines}"
+    lines = "\n".join(p.as_prompt_line() for p in products)
+    system += f"\n\nPRODUCTS MATCHING THIS MESSAGE\n{lines}"
+    return [{"role": "system", "content": system}] + to_llm_messages(history) + [
+        {"role": "user", "content": message}
+    ]
+
+
+def shared_prefix(a: bytes, b: bytes) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def replay(build, browse_turns: int) -> tuple[int, int]:
+    """(bytes reusable from the previous turn, total bytes) over the flow."""
+    history: list[HistoryTurn] = []
+    previous = b""
+    reused = total = 0
+    browsing = [(BROWSE_QUESTION, BROWSE_REPLY)] * browse_turns
+    for turn, (text, reply) in enumerate(browsing + list(zip(ORDER_FLOW, BOT_REPLIES))):
+        # Retrieval returns a different slice of the catalog each turn
+        products = CATALOG[turn % 3: turn % 3 + 3]
+        body = json.dumps(
+            build(text, INSTRUCTIONS, list(history), REMEMBERED, products), ensure_ascii=False
+        ).encode()
+        reused += shared_prefix(previous, body)
+        total += len(body)
+        previous = body
+        history += [HistoryTurn("user", text, None), HistoryTurn("ai", reply, None)]
+    return reused, total
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--browse-turns", type=int, nargs="+", default=[0, 5, 10])
+    args = p.parse_args()
+
+    for browse_turns in args.browse_turns:
+        print(f"{browse_turns + len(ORDER_FLOW)} turns:")
+        for name, build in (("legacy", legacy_messages), ("current", build_messages)):
+            reused, total = replay(build, browse_turns)
+            print(f"  {name:>8}: {reused:7d} / {total:7d} prompt bytes cacheable ({reused / total:.1%})")
+
+
+if __name__ == "__main__":
+    main()
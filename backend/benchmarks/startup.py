@@ -0,0 +1,99 @@
+"""
+benchmarks/startup.py
+
+Measures worker cold start: how long `import main` takes in a fresh
+interpreter, and (with --lifespan) how long app startup takes on top of
+that. Also lists the slowest imports from `python -X importtime`.
+
+Run from backend/:
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --runs 5 --lifespan          # needs a reachable DB
+    DB_SCHEMA_BOOTSTRAP=none ENABLE_ADMIN_PANEL=false python -m benchmarks.startup
+
+Settings are read from the environment / .env like the app itself, so the
+same command compares boot modes.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+_IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import main
+print(time.perf_counter() - t0)
+"""
+
+_LIFESPAN_SNIPPET = """
+import asyncio, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def boot():
+    async with main.lifespan(main.app):
+        pass
+
+asyncio.run(boot())
+print(t1 - t0, time.perf_counter() - t1)
+"""
+
+
+def _run(snippet: str) -> list[float]:
+    out = subprocess.run(
+        [sys.executable, "-c", snippet],
+        check=True, capture_output=True, text=True,
+    ).stdout.strip().splitlines()[-1]
+    return [float(x) for x in out.split()]
+
+
+def slowest_imports(top: int) -> list[tuple[int, str]]:
+    """(cumulative µs, module) for the slowest top-level imports of main."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        check=True, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is shown by indentation: " main", "   routes.auth", "     httpx", …
+        # Keep only modules imported directly by main — deeper ones double count.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            rows.append((int(cumulative), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--lifespan", action="store_true", help="also time lifespan startup (hits the DB)")
+    p.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    args = p.parse_args()
+
+    imports, startups = [], []
+    for _ in range(args.runs):
+        if args.lifespan:
+            imp, boot = _run(_LIFESPAN_SNIPPET)
+            startups.append(boot)
+        else:
+            (imp,) = _run(_IMPORT_SNIPPET)
+        imports.append(imp)
+
+    print(f"import main   median={statistics.median(imports) * 1000:.0f}ms  min={min(imports) * 1000:.0f}ms  ({args.runs} runs)")
+    if startups:
+        print(f"lifespan      median={statistics.median(startups) * 1000:.0f}ms  min={min(startups) * 1000:.0f}ms")
+
+    print("\nSlowest imports (cumulative):")
+    for micros, name in slowest_imports(args.top):
+        print(f"  {micros / 1000:8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
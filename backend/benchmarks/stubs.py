@@ -0,0 +1,129 @@
+"""
+benchmarks/stubs.py
+
+Local stand-ins for the Groq chat API and graph.facebook.com, used by the
+load-test harness. Both add a configurable latency so results look like
+production without spending tokens or hitting Facebook.
+
+The Graph stub records when each reply arrives per recipient PSID, which is
+how the harness measures end-to-end reply latency.
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def _jitter(latency: float) -> float:
+    return max(0.0, random.gauss(latency, latency * 0.2))
+
+
+# ── Groq / OpenAI-compatible chat completions ─────────────────────────────────
+
+def _fake_reply(messages: list[dict]) -> str:
+    system = messages[0]["content"] if messages else ""
+    last = messages[-1]["content"].strip().lower() if messages else ""
+
+    if "extraction agent" in system:
+        return json.dumps({
+            "phone_number": "9800000000",
+            "delivery_address": "Kathmandu",
+            "product_interest": "2 x T-shirt",
+            "order_notes": None,
+        })
+    if last in {"yes", "confirm", "yep"}:
+        return "Your order is confirmed! We'll be in touch soon.\n<!--ORDER_CONFIRMED-->"
+    if last.startswith("98"):
+        return "Thanks! What's the delivery address?"
+    if "kathmandu" in last or "lalitpur" in last:
+        return (
+            "Here's your order summary:\n📦 2 x T-shirt\n📞 9800000000\n📍 Kathmandu\n\n"
+            "Reply YES to confirm your order, or let me know if anything needs changing."
+        )
+    if "want" in last or "order" in last:
+        return "Great choice! What's your phone number?"
+    return "Hi! How can I help you today?"
+
+
+def make_llm_app(latency: float) -> Starlette:
+    async def completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(_jitter(latency))
+        content = _fake_reply(body.get("messages", []))
+        prompt_tokens = sum(len(m["content"]) // 4 for m in body.get("messages", []))
+        return JSONResponse({
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        })
+
+    return Starlette(routes=[
+        Route("/openai/v1/chat/completions", completions, methods=["POST"]),
+    ])
+
+
+# ── Graph API ─────────────────────────────────────────────────────────────────
+
+class GraphRecorder:
+    """Reply arrival times per recipient PSID, awaitable by the harness."""
+
+    def __init__(self):
+        self.replies: dict[str, asyncio.Queue[float]] = defaultdict(asyncio.Queue)
+        self.sent = 0
+
+    def record(self, recipient_id: str) -> dict:
+        self.sent += 1
+        self.replies[recipient_id].put_nowait(time.perf_counter())
+        return {"recipient_id": recipient_id, "message_id": f"m_{uuid.uuid4().hex}"}
+
+    async def wait_reply(self, recipient_id: str, timeout: float) -> float | None:
+        try:
+            return await asyncio.wait_for(self.replies[recipient_id].get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def make_graph_app(latency: float, recorder: GraphRecorder) -> Starlette:
+    async def send(request: Request):
+        body = await request.json()
+        await asyncio.sleep(_jitter(latency))
+        return JSONResponse(recorder.record(body["recipient"]["id"]))
+
+    async def batch(request: Request):
+        form = await request.form()
+        await asyncio.sleep(_jitter(latency))
+        results = []
+        for op in json.loads(form["batch"]):
+            params = parse_qs(op["body"])
+            recipient = json.loads(params["recipient"][0])["id"]
+            results.append({"code": 200, "body": json.dumps(recorder.record(recipient))})
+        return JSONResponse(results)
+
+    async def subscribe(request: Request):
+        return JSONResponse({"success": True})
+
+    return Starlette(routes=[
+        Route("/", batch, methods=["POST"]),
+        Route("/{page_id}/messages", send, methods=["POST"]),
+        Route("/{page_id}/subscribed_apps", subscribe, methods=["POST"]),
+    ])
@@ -1,13 +1,57 @@
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from config import get_settings
+from services.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUTS,
+    DB_POOL_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_QUERIES,
+    DB_READS_ROUTED,
+    DB_REPLICA_LAG,
+)
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def _engine_kwargs(url: str, read_only: bool = False) -> dict:
+    """
+    Pool / driver options for the configured database.
+
+    SQLite (local runs, tests) gets the driver defaults and no SSL.
+    Postgres gets the tunable pool from Settings.
+    """
+    if url.startswith("sqlite"):
+        return {}
+
+    connect_args: dict = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    if settings.DB_SSL:
+        connect_args["ssl"] = settings.DB_SSL
+    if read_only:
+        # Belt and braces: the replica rejects writes anyway, but make it explicit
+        connect_args["server_settings"] = {"default_transaction_read_only": "on"}
+
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
 
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,
-    connect_args={"ssl": "require"},
+    **_engine_kwargs(settings.DATABASE_URL),
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -17,11 +61,105 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+# ── Pool / query metrics ──────────────────────────────────────────────────────
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _on_execute(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERIES.inc()
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_conn, conn_record, conn_proxy):
+    DB_POOL_CHECKOUTS.inc()
+
+
+DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout())
+DB_POOL_SIZE.set_function(lambda: engine.pool.size())
+DB_POOL_OVERFLOW.set_function(lambda: engine.pool.overflow())
+
+
+# ── Read replica ──────────────────────────────────────────────────────────────
+
+read_engine = (
+    create_async_engine(
+        settings.DATABASE_READ_URL,
+        echo=False,
+        **_engine_kwargs(settings.DATABASE_READ_URL, read_only=True),
+    )
+    if settings.DATABASE_READ_URL else None
+)
+
+ReadSessionLocal = (
+    async_sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False)
+    if read_engine is not None else None
+)
+
+# Replay position equal to receive position → fully caught up, even if idle
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+_replica_state = {"checked_at": 0.0, "fresh": False}
+
+
+async def _replica_is_fresh() -> bool:
+    """Cached check that the replica is within READ_REPLICA_MAX_LAG_SECONDS."""
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] < settings.READ_REPLICA_LAG_CHECK_SECONDS:
+        return _replica_state["fresh"]
+    _replica_state["checked_at"] = now
+
+    try:
+        async with read_engine.connect() as conn:
+            lag = float((await conn.execute(_REPLICA_LAG_SQL)).scalar_one())
+        DB_REPLICA_LAG.set(lag)
+        _replica_state["fresh"] = lag <= settings.READ_REPLICA_MAX_LAG_SECONDS
+    except Exception:
+        logger.warning("Read replica lag check failed — routing reads to primary", exc_info=True)
+        DB_REPLICA_LAG.set(-1)
+        _replica_state["fresh"] = False
+    return _replica_state["fresh"]
+
+
 class Base(DeclarativeBase):
     pass
 
 
 async def get_db():
+    """
+    Request-scoped session dependency.
+
+    AsyncSession only checks a connection out of the pool on its first
+    query, so routes that never touch the database hold no connection.
+    Routes that only need one quick lookup before a slow external call
+    should use db_session() instead, so the connection goes back to the
+    pool before the call rather than at the end of the request.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def get_read_db():
+    """
+    Session for read-only dashboard queries (analytics, admin lists, leads).
+
+    Uses the read replica when one is configured and its lag is within
+    READ_REPLICA_MAX_LAG_SECONDS; otherwise falls back to the primary.
+    Never write through this session.
+    """
+    use_replica = ReadSessionLocal is not None and await _replica_is_fresh()
+    DB_READS_ROUTED.inc(target="replica" if use_replica else "primary")
+    maker = ReadSessionLocal if use_replica else AsyncSessionLocal
+    async with maker() as session:
+        yield session
+
+
+@asynccontextmanager
+async def db_session():
+    """Short-lived session for a narrowly scoped block of DB work."""
     async with AsyncSessionLocal() as session:
         yield session
 
@@ -30,3 +168,23 @@ async def init_db():
     """Create all tables on startup."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+async def check_alembic_head():
+    """
+    Cheap alternative to init_db() for production boots: one SELECT against
+    alembic_version instead of reflecting every table. Raises if the
+    database is behind (or ahead of) the migrations shipped with this code.
+    """
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    cfg = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    heads = set(ScriptDirectory.from_config(cfg).get_heads())
+    async with engine.connect() as conn:
+        current = set((await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars())
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, "
+            f"code expects {sorted(heads)} — run `alembic upgrade head`"
+        )
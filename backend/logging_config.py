@@ -0,0 +1,118 @@
+"""
+logging_config.py
+
+Structured JSON logging that stays off the request path.
+
+Records are handed to a QueueHandler and formatted + written by a
+QueueListener thread, so the event loop never blocks on stdout. Record
+formatting (including %-args and LazyJson payloads) only happens in that
+thread, and only for records that pass the level and sampling filters.
+
+High-volume lines (per-request, per-webhook) pass extra={"sampled": True}
+and are kept at LOG_SAMPLE_RATE. Warnings and errors are never sampled.
+
+Call setup_logging() once at startup; use logging.getLogger(__name__)
+everywhere else, with %-style args rather than f-strings.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from config import get_settings
+
+# Attributes every LogRecord has — anything else was passed via extra=
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sampled"}
+
+_listener: QueueListener | None = None
+
+
+class LazyJson:
+    """Defers json.dumps(obj) (optionally truncated) until the record is formatted."""
+
+    __slots__ = ("obj", "limit")
+
+    def __init__(self, obj, limit: int | None = None):
+        self.obj = obj
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = json.dumps(self.obj, default=str)
+        return text[: self.limit] if self.limit else text
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value if isinstance(value, (int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, "sampled", False):
+            return True
+        return random.random() < self.rate
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    The stock QueueHandler formats the record in the calling thread so it
+    can be pickled. We only ever hand records to an in-process thread, so
+    skip that and let the listener do the formatting.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging() -> None:
+    global _listener
+    if _listener is not None:
+        return
+
+    settings = get_settings()
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(
+        JsonFormatter() if settings.LOG_JSON
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush anything still queued. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,26 +1,69 @@
+import asyncio
+import logging
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from database import init_db, engine
+from config import get_settings
+from database import check_alembic_head, engine, init_db
+from logging_config import setup_logging, shutdown_logging
 from routes.auth import router as auth_router
 from routes.webhook import router as webhook_router
 from routes.messages import router as messages_router
 from routes.pages import router as pages_router
 from routes.ai import router as ai_router
-from admin.admin import setup_admin
 from routes.leads import router as leads_router
 from routes.admin import router as admin_router
 from routes.analytics import router as analytics_router
+from routes.metrics import router as metrics_router
+from routes.events import router as events_router
+from routes.search import router as search_router
+from routes.products import router as products_router
+from services.events import run_event_relay
+from services.intent_router import run_intent_training_loop
+from services.llm_usage import get_llm_call_writer
+from services.messenger import run_deferred_loop
+from services.metrics import HTTP_REQUEST_SECONDS
+from services.send_queue import get_send_queue, run_redrive_loop
+
+setup_logging()
+logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Run on startup: create all DB tables."""
-    await init_db()
-    print("✅ Database tables created / verified")
+    """
+    Run on startup: verify the schema, start the failed-reply redrive loop,
+    the deferred-turn retry loop, the cross-worker event relay, the intent
+    model training loop and the LLM usage writer.
+    """
+    t0 = time.perf_counter()
+    if settings.DB_SCHEMA_BOOTSTRAP == "create_all":
+        await init_db()
+        logger.info("Database tables created / verified")
+    elif settings.DB_SCHEMA_BOOTSTRAP == "alembic_check":
+        await check_alembic_head()
+        logger.info("Database schema is at Alembic head")
+    logger.info("Startup complete", extra={"startup_ms": round((time.perf_counter() - t0) * 1000, 1)})
+    redrive_task = asyncio.create_task(run_redrive_loop())
+    deferred_task = asyncio.create_task(run_deferred_loop())
+    relay_task = asyncio.create_task(run_event_relay())
+    get_llm_call_writer().start()
+    intent_task = (
+        asyncio.create_task(run_intent_training_loop()) if settings.INTENT_ROUTER_ENABLED else None
+    )
     yield
+    redrive_task.cancel()
+    deferred_task.cancel()
+    relay_task.cancel()
+    if intent_task:
+        intent_task.cancel()
+    await get_send_queue().stop()
+    await get_llm_call_writer().stop()
+    shutdown_logging()
 
 
 app = FastAPI(title="FB Messenger AI Bot", lifespan=lifespan)
@@ -37,8 +80,22 @@ app.add_middleware(
 # ── Request logging + ngrok header ─────────────────────────────────────
 @app.middleware("http")
 async def request_logger(request: Request, call_next):
-    print(f"\n→ {request.method} {request.url.path}")
+    t0 = time.perf_counter()
     response = await call_next(request)
+    elapsed = time.perf_counter() - t0
+    # Label by route template (/leads/{lead_id}), not raw path, to keep cardinality bounded
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code,
+    )
+    logger.info(
+        "%s %s → %s",
+        request.method, request.url.path, response.status_code,
+        extra={"duration_ms": round(elapsed * 1000, 1), "sampled": True},
+    )
     response.headers["ngrok-skip-browser-warning"] = "69420"
     return response
 
@@ -51,9 +108,16 @@ app.include_router(ai_router)
 app.include_router(leads_router)
 app.include_router(admin_router)
 app.include_router(analytics_router)
+app.include_router(metrics_router)
+app.include_router(events_router)
+app.include_router(search_router)
+app.include_router(products_router)
 
 # ── Admin panel at /admin ────────────────────────────────────────────────
-setup_admin(app, engine)
+# sqladmin pulls in Jinja2/WTForms; workers that only serve the webhook can skip it
+if settings.ENABLE_ADMIN_PANEL:
+    from admin.admin import setup_admin
+    setup_admin(app, engine)
 
 
 @app.get("/")
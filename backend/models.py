@@ -1,13 +1,38 @@
+import re
 from datetime import datetime, timezone
 from typing import Optional
 from sqlalchemy import (
     String, Text, Boolean, DateTime, ForeignKey,
-    Integer, Float, func
+    Integer, Float, Index, DDL, event, false, func, text, true
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from database import Base
 
 
+def normalize_phone(phone: str | None) -> str | None:
+    """Digits only, so "+977 980-000 0000" and "9800000000" can be prefix-matched."""
+    if not phone:
+        return None
+    return re.sub(r"\D", "", phone) or None
+
+
+def as_utc(dt: datetime | None) -> datetime | None:
+    """SQLite hands back naive UTC; Postgres returns aware datetimes."""
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+# Full-text search documents. Postgres indexes these exact expressions with GIN
+# (queries must use the same text to hit the index); SQLite mirrors the same
+# columns into FTS5 tables instead (see bottom of file).
+MESSAGE_TSVECTOR = "to_tsvector('simple', content)"
+LEAD_TSVECTOR = (
+    "to_tsvector('simple', coalesce(product_interest, '') || ' ' || "
+    "coalesce(delivery_address, '') || ' ' || coalesce(order_notes, ''))"
+)
+
+
 class Page(Base):
     """One row per Facebook Page."""
     __tablename__ = "pages"
@@ -16,6 +41,8 @@ class Page(Base):
     name: Mapped[str] = mapped_column(String(256))
     access_token: Mapped[str] = mapped_column(Text)
     ai_instructions: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # JSON object, intent → reply text, overriding intent_router.DEFAULT_TEMPLATES
+    reply_templates: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     user_fb_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -27,6 +54,7 @@ class Page(Base):
     messages: Mapped[list["Message"]] = relationship("Message", back_populates="page", cascade="all, delete-orphan")
     logs: Mapped[list["Log"]] = relationship("Log", back_populates="page", cascade="all, delete-orphan")
     sales_leads: Mapped[list["SalesLead"]] = relationship("SalesLead", back_populates="page", cascade="all, delete-orphan")
+    products: Mapped[list["Product"]] = relationship("Product", back_populates="page", cascade="all, delete-orphan")
 
 
 class User(Base):
@@ -44,6 +72,8 @@ class User(Base):
     page_id: Mapped[str] = mapped_column(String(64), ForeignKey("pages.id"))
     last_seen: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     is_blocked: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Temporary block set by the rate limiter; expires on its own
+    blocked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # ── Persistent contact memory ─────────────────────────────────────────────
@@ -62,18 +92,125 @@ class User(Base):
 class Message(Base):
     """Full conversation history."""
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_status_sent_at", "status", "sent_at"),
+        # Per-user history reads and the windowed analytics partition on this
+        Index("ix_messages_user_sent_at", "user_id", "sent_at"),
+        # Current-session load in the reply pipeline
+        Index("ix_messages_session_sent_at", "session_id", "sent_at"),
+        Index(
+            "ix_messages_content_fts", text(MESSAGE_TSVECTOR), postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     fb_message_id: Mapped[Optional[str]] = mapped_column(String(128), nullable=True, unique=True)
     page_id: Mapped[str] = mapped_column(String(64), ForeignKey("pages.id"))
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    session_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("conversation_sessions.id"), nullable=True
+    )
     from_role: Mapped[str] = mapped_column(String(16))   # "user" | "ai"
     content: Mapped[str] = mapped_column(Text)
     sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     status: Mapped[str] = mapped_column(String(32), default="sent")
+    # How many times the send queue has re-driven this message after a failed send
+    send_attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # When a sender last claimed this reply for delivery; a claim older than
+    # the outbox lease (send_queue.py) was abandoned and may be taken over
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     page: Mapped["Page"] = relationship("Page", back_populates="messages")
     user: Mapped["User"] = relationship("User", back_populates="messages")
+    session: Mapped[Optional["ConversationSession"]] = relationship(
+        "ConversationSession", back_populates="messages"
+    )
+
+
+class ConversationSession(Base):
+    """
+    One conversation between a user and a page.
+
+    Assigned at write time by the reply pipeline: a message joins the user's
+    latest session unless that session was closed by a confirmed order or has
+    been idle for longer than SESSION_GAP_SECONDS, in which case a new one
+    starts. The counters are maintained incrementally so analytics never has
+    to re-segment the message table.
+    """
+    __tablename__ = "conversation_sessions"
+    __table_args__ = (
+        Index("ix_conversation_sessions_user_last", "user_id", "page_id", "last_message_at"),
+        Index("ix_conversation_sessions_page_started", "page_id", "started_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    page_id: Mapped[str] = mapped_column(String(64), ForeignKey("pages.id"))
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_message_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    order_confirmed: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
+    closed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    messages: Mapped[list["Message"]] = relationship("Message", back_populates="session")
+
+
+class Product(Base):
+    """
+    One catalog item for a page.
+
+    The reply pipeline retrieves the few products relevant to each message
+    (services/catalog.py) instead of pasting the whole catalog into
+    Page.ai_instructions. Removing a product sets is_active=False rather than
+    deleting the row, so the in-process indexes see the change on refresh.
+    """
+    __tablename__ = "products"
+    __table_args__ = (
+        # Incremental index refresh: "what changed on this page since T"
+        Index("ix_products_page_updated", "page_id", "updated_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    page_id: Mapped[str] = mapped_column(String(64), ForeignKey("pages.id"))
+    name: Mapped[str] = mapped_column(String(255))
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    price: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)   # free text: "Rs 1,200"
+    sku: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, server_default=true())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    page: Mapped["Page"] = relationship("Page", back_populates="products")
+
+
+class LlmCall(Base):
+    """
+    One LLM completion, appended in batches by services/llm_usage.py.
+
+    page_id is deliberately not a foreign key: this is an append-only cost
+    log that should outlive the page and never block its inserts on a lock.
+    """
+    __tablename__ = "llm_calls"
+    __table_args__ = (
+        Index("ix_llm_calls_page_created", "page_id", "created_at"),
+        Index("ix_llm_calls_created", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    page_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    call_site: Mapped[str] = mapped_column(String(32))       # "reply" | "extraction"
+    model: Mapped[str] = mapped_column(String(64))
+    prompt_version: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    prompt_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cached_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    latency_ms: Mapped[int] = mapped_column(Integer)
+    outcome: Mapped[str] = mapped_column(String(16))         # "ok" | "error"
 
 
 class Log(Base):
@@ -105,6 +242,15 @@ class SalesLead(Base):
                                                       → cancelled
     """
     __tablename__ = "sales_leads"
+    __table_args__ = (
+        Index(
+            "ix_sales_leads_search_fts", text(LEAD_TSVECTOR), postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_sales_leads_phone_normalized", "phone_normalized",
+            postgresql_ops={"phone_normalized": "text_pattern_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -143,6 +289,8 @@ class SalesLead(Base):
     # ── Customer / order details ──────────────────────────────────────────────
     customer_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     phone_number: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    # Digits-only copy of phone_number for indexed prefix search — kept in sync by the validator below
+    phone_normalized: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     delivery_address: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     product_interest: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     order_notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -176,8 +324,45 @@ class SalesLead(Base):
         "SalesLead", remote_side="SalesLead.id", foreign_keys=[parent_lead_id]
     )
 
+    @validates("phone_number")
+    def _sync_phone_normalized(self, key, value):
+        self.phone_normalized = normalize_phone(value)
+        return value
+
     def __repr__(self) -> str:
         return (
             f"<SalesLead id={self.id} ref={self.order_ref_id!r} "
             f"status={self.status!r} user_id={self.user_id}>"
-        )
\ No newline at end of file
+        )
+
+
+# ── SQLite full-text fallback ─────────────────────────────────────────────────
+# External-content FTS5 tables kept in sync by triggers. Only created when
+# running against SQLite (local runs / tests); Postgres uses the GIN indexes.
+
+_SQLITE_FTS = {
+    "messages": ("messages_fts", ["content"]),
+    "sales_leads": ("sales_leads_fts", ["product_interest", "delivery_address", "order_notes"]),
+}
+
+
+def _sqlite_fts_ddl(table: str, fts: str, cols: list[str]) -> list[DDL]:
+    col_list = ", ".join(cols)
+    new_vals = ", ".join(f"new.{c}" for c in cols)
+    old_vals = ", ".join(f"old.{c}" for c in cols)
+    return [
+        DDL(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({col_list}, content='{table}', content_rowid='id')"),
+        DDL(f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_vals}); END"),
+        DDL(f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals}); END"),
+        DDL(f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals}); "
+            f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_vals}); END"),
+    ]
+
+
+for _model in (Message, SalesLead):
+    _fts, _cols = _SQLITE_FTS[_model.__tablename__]
+    for _ddl in _sqlite_fts_ddl(_model.__tablename__, _fts, _cols):
+        event.listen(_model.__table__, "after_create", _ddl.execute_if(dialect="sqlite"))
@@ -9,7 +9,7 @@ Mount in main.py:
     app.include_router(admin_router)
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Header, Query
@@ -18,8 +18,9 @@ from sqlalchemy import select, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import get_settings
-from database import get_db
+from database import get_db, get_read_db
 from models import Page, User, Message, Log, SalesLead
+from services.metrics import AUTO_BLOCKS, RATE_LIMITED
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 settings = get_settings()
@@ -61,11 +62,13 @@ class UserOut(BaseModel):
     page_id: str
     last_seen: Optional[datetime]
     is_blocked: bool
+    blocked_until: Optional[datetime]
     created_at: datetime
     class Config: from_attributes = True
 
 class UserUpdate(BaseModel):
     is_blocked: Optional[bool] = None
+    blocked_until: Optional[datetime] = None
 
 class MessageOut(BaseModel):
     id: int
@@ -116,12 +119,17 @@ class StatsResponse(BaseModel):
     active_pages: int
     total_users: int
     blocked_users: int
+    temp_blocked_users: int
     total_messages: int
     total_logs: int
     unprocessed_logs: int
     total_leads: int
     pending_leads: int
     confirmed_leads: int
+    # Since this worker started (in-process counters, see /metrics)
+    rate_limited_user: int
+    rate_limited_page: int
+    auto_blocks: int
 
 
 # ── Auth ──────────────────────────────────────────────────────────────────────
@@ -137,7 +145,7 @@ async def admin_login(body: AdminLoginRequest):
 # ── Stats ─────────────────────────────────────────────────────────────────────
 
 @router.get("/stats", response_model=StatsResponse, dependencies=[Depends(require_admin)])
-async def get_stats(db: AsyncSession = Depends(get_db)):
+async def get_stats(db: AsyncSession = Depends(get_read_db)):
     """Dashboard KPI counts."""
     async def count(model, *filters):
         q = select(func.count()).select_from(model)
@@ -150,12 +158,16 @@ async def get_stats(db: AsyncSession = Depends(get_db)):
         active_pages     = await count(Page, Page.is_active == True),
         total_users      = await count(User),
         blocked_users    = await count(User, User.is_blocked == True),
+        temp_blocked_users = await count(User, User.blocked_until > datetime.now(timezone.utc)),
         total_messages   = await count(Message),
         total_logs       = await count(Log),
         unprocessed_logs = await count(Log, Log.is_processed == False),
         total_leads      = await count(SalesLead),
         pending_leads    = await count(SalesLead, SalesLead.status == "pending"),
         confirmed_leads  = await count(SalesLead, SalesLead.status == "confirmed"),
+        rate_limited_user = int(RATE_LIMITED.value(scope="user")),
+        rate_limited_page = int(RATE_LIMITED.value(scope="page")),
+        auto_blocks       = int(AUTO_BLOCKS.value()),
     )
 
 
@@ -165,7 +177,7 @@ async def get_stats(db: AsyncSession = Depends(get_db)):
 async def list_pages(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     total = (await db.execute(select(func.count()).select_from(Page))).scalar_one()
     rows = (await db.execute(
@@ -203,7 +215,7 @@ async def list_users(
     page_id: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     q = select(User).order_by(desc(User.created_at))
     cq = select(func.count()).select_from(User)
@@ -222,6 +234,8 @@ async def update_user(user_id: int, body: UserUpdate, db: AsyncSession = Depends
         raise HTTPException(404, "User not found")
     for field, val in body.model_dump(exclude_none=True).items():
         setattr(u, field, val)
+    if body.is_blocked is False:
+        u.blocked_until = None   # unblocking also lifts a rate-limit block
     await db.commit()
     await db.refresh(u)
     return UserOut.model_validate(u)
@@ -234,7 +248,7 @@ async def list_messages(
     user_id: Optional[int] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     q = select(Message).order_by(desc(Message.sent_at))
     cq = select(func.count()).select_from(Message)
@@ -257,7 +271,7 @@ async def list_logs(
     processed: Optional[bool] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     q = select(Log).order_by(desc(Log.received_at))
     cq = select(func.count()).select_from(Log)
@@ -278,7 +292,7 @@ async def list_leads(
     status: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     q = select(SalesLead).order_by(desc(SalesLead.updated_at))
     cq = select(func.count()).select_from(SalesLead)
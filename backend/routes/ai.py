@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 
-from services.ai_service import get_ai_reply
+from services.ai_service import LLM_UNAVAILABLE_TEXT, LLMUnavailable, get_ai_reply
 
 router = APIRouter(prefix="/api", tags=["ai"])
 
@@ -15,5 +15,8 @@ class AIRequest(BaseModel):
 async def get_ai_res(payload: AIRequest):
     if not payload.msg:
         return {"error": "Message is empty"}
-    reply = await get_ai_reply(payload.msg, payload.instructions)
+    try:
+        reply = await get_ai_reply(payload.msg, payload.instructions)
+    except LLMUnavailable:
+        reply = LLM_UNAVAILABLE_TEXT
     return {"reply": reply}
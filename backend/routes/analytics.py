@@ -3,7 +3,7 @@ routes/analytics.py
 
 Analytics dashboard API.
 
-Reads directly from the existing tables — no new models, no new columns.
+Reads directly from the operational tables — this module defines no models.
 All endpoints accept optional page_id + date range filters so the frontend
 can scope the dashboard to a single page or look across all pages.
 
@@ -13,15 +13,17 @@ Mount in main.py:
 """
 
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Literal, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import select, func, and_, case
+from sqlalchemy import select, func, and_, or_, case, literal, literal_column, DateTime
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
-from models import Message, User, SalesLead, Log, Page
+from database import get_read_db
+from models import ConversationSession, LlmCall, Message, User, SalesLead, Log, Page
+from services.history import SESSION_GAP_SECONDS
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
@@ -40,6 +42,23 @@ def _resolve_range(
     return start, end
 
 
+def _validate_tz(tz: str) -> str:
+    """Reject unknown IANA names before they reach AT TIME ZONE."""
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+    return tz
+
+
+# Postgres date_trunc unit → generate_series step (inlined, never user input)
+_GRANULARITY_STEP = {
+    "hour": literal_column("interval '1 hour'"),
+    "day": literal_column("interval '1 day'"),
+    "week": literal_column("interval '1 week'"),
+}
+
+
 def _apply_page_filter(stmt, model, page_id: Optional[str]):
     if page_id:
         stmt = stmt.where(model.page_id == page_id)
@@ -72,11 +91,12 @@ class HourlyBucket(BaseModel):
 class HeatmapResponse(BaseModel):
     range_start: datetime
     range_end: datetime
+    tz: str
     buckets: list[HourlyBucket]
 
 
 class TimeseriesPoint(BaseModel):
-    date: str                        # ISO date YYYY-MM-DD
+    date: str                        # ISO date YYYY-MM-DD (hourly: YYYY-MM-DDTHH:00:00), local to tz
     user_messages: int
     ai_messages: int
     total: int
@@ -85,6 +105,8 @@ class TimeseriesPoint(BaseModel):
 class TimeseriesResponse(BaseModel):
     range_start: datetime
     range_end: datetime
+    granularity: str
+    tz: str
     points: list[TimeseriesPoint]
 
 
@@ -129,6 +151,58 @@ class PagesActivityResponse(BaseModel):
     pages: list[PageActivity]
 
 
+class ResponseTimeResponse(BaseModel):
+    range_start: datetime
+    range_end: datetime
+    replied_turns: int               # customer messages followed directly by an AI reply
+    avg_seconds: Optional[float]
+    p50_seconds: Optional[float]
+    p90_seconds: Optional[float]
+    p95_seconds: Optional[float]
+    p99_seconds: Optional[float]
+
+
+class MessagesToOrderResponse(BaseModel):
+    range_start: datetime
+    range_end: datetime
+    orders: int
+    avg_turns: Optional[float]       # customer messages since the previous order
+    p50_turns: Optional[float]
+    p90_turns: Optional[float]
+    max_turns: Optional[int]
+
+
+class SessionsResponse(BaseModel):
+    range_start: datetime
+    range_end: datetime
+    gap_seconds: int
+    total_sessions: int
+    sessions_with_order: int
+    avg_messages_per_session: Optional[float]
+    p50_messages_per_session: Optional[float]
+    avg_session_seconds: Optional[float]
+
+
+class LlmUsageRow(BaseModel):
+    date: str                        # ISO date YYYY-MM-DD, local to tz
+    page_id: Optional[str]
+    call_site: str
+    calls: int
+    errors: int
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    p50_latency_ms: Optional[float]
+    p95_latency_ms: Optional[float]
+
+
+class LlmUsageResponse(BaseModel):
+    range_start: datetime
+    range_end: datetime
+    tz: str
+    rows: list[LlmUsageRow]
+
+
 # ── 1. Overview KPIs ─────────────────────────────────────────────────────────
 
 @router.get("/overview", response_model=OverviewResponse)
@@ -137,7 +211,7 @@ async def overview(
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
     days: int = Query(30, ge=1, le=365),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Top-level KPI cards for the dashboard.
@@ -215,7 +289,8 @@ async def heatmap(
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
     days: int = Query(30, ge=1, le=365),
-    db: AsyncSession = Depends(get_db),
+    tz: str = Query("UTC", description="IANA timezone the grid is computed in"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Returns a grid of message counts for every (day_of_week, hour) bucket.
@@ -223,13 +298,16 @@ async def heatmap(
 
     day_of_week is 0–6 where 0 = Monday (Python's weekday() convention).
     Counts user-sent messages only — that's what the page actually receives.
+    Day and hour are taken in `tz`, not the database server's timezone.
     """
     start, end = _resolve_range(start, end, days)
+    tz = _validate_tz(tz)
 
-    # extract() on a TIMESTAMP gives ISO weekday (1=Mon..7=Sun in Postgres).
-    # We normalize to 0=Mon..6=Sun in Python after the fetch.
-    dow = func.extract("isodow", Message.sent_at).label("dow")
-    hour = func.extract("hour", Message.sent_at).label("hour")
+    # timestamptz AT TIME ZONE tz → local wall-clock time, then extract.
+    # ISO weekday is 1=Mon..7=Sun; normalized to 0..6 in SQL.
+    local = func.timezone(tz, Message.sent_at)
+    dow = (func.extract("isodow", local) - 1).label("dow")
+    hour = func.extract("hour", local).label("hour")
 
     q = (
         select(dow, hour, func.count().label("count"))
@@ -237,23 +315,21 @@ async def heatmap(
             Message.sent_at.between(start, end),
             Message.from_role == "user",
         )
-        .group_by(dow, hour)
+        # Group by position: repeating the expressions would re-bind tz as a
+        # new parameter and Postgres would no longer see them as identical.
+        .group_by(literal_column("1"), literal_column("2"))
     )
     q = _apply_page_filter(q, Message, page_id)
 
     rows = (await db.execute(q)).all()
     buckets = [
-        HourlyBucket(
-            day_of_week=int(r.dow) - 1,   # 1..7 → 0..6
-            hour=int(r.hour),
-            count=r.count,
-        )
+        HourlyBucket(day_of_week=int(r.dow), hour=int(r.hour), count=r.count)
         for r in rows
     ]
-    return HeatmapResponse(range_start=start, range_end=end, buckets=buckets)
+    return HeatmapResponse(range_start=start, range_end=end, tz=tz, buckets=buckets)
 
 
-# ── 3. Daily timeseries ──────────────────────────────────────────────────────
+# ── 3. Timeseries ────────────────────────────────────────────────────────────
 
 @router.get("/timeseries", response_model=TimeseriesResponse)
 async def timeseries(
@@ -261,46 +337,62 @@ async def timeseries(
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
     days: int = Query(30, ge=1, le=365),
-    db: AsyncSession = Depends(get_db),
+    granularity: Literal["hour", "day", "week"] = Query("day"),
+    tz: str = Query("UTC", description="IANA timezone buckets are aligned to"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
-    Daily message counts split into user vs AI.
-    Fills in zero-count days so the frontend gets a continuous series.
+    Message counts per hour / day / week, split into user vs AI.
+
+    Bucketing happens in `tz` and gap-filling is done by generate_series,
+    so the database returns the final dense series in a single query.
     """
     start, end = _resolve_range(start, end, days)
+    tz = _validate_tz(tz)
 
-    day = func.date_trunc("day", Message.sent_at).label("day")
-    q = (
+    bucket = func.date_trunc(granularity, func.timezone(tz, Message.sent_at))
+    counts = (
         select(
-            day,
+            bucket.label("bucket"),
             func.sum(case((Message.from_role == "user", 1), else_=0)).label("user_count"),
             func.sum(case((Message.from_role == "ai", 1), else_=0)).label("ai_count"),
         )
         .where(Message.sent_at.between(start, end))
-        .group_by(day)
-        .order_by(day)
+        .group_by(literal_column("1"))   # by position, see heatmap()
+    )
+    counts = _apply_page_filter(counts, Message, page_id).subquery("counts")
+
+    series = select(
+        func.generate_series(
+            func.date_trunc(granularity, func.timezone(tz, literal(start, DateTime(timezone=True)))),
+            func.date_trunc(granularity, func.timezone(tz, literal(end, DateTime(timezone=True)))),
+            _GRANULARITY_STEP[granularity],
+        ).label("bucket")
+    ).subquery("series")
+
+    q = (
+        select(
+            series.c.bucket,
+            func.coalesce(counts.c.user_count, 0).label("user_count"),
+            func.coalesce(counts.c.ai_count, 0).label("ai_count"),
+        )
+        .select_from(series.outerjoin(counts, counts.c.bucket == series.c.bucket))
+        .order_by(series.c.bucket)
     )
-    q = _apply_page_filter(q, Message, page_id)
     rows = (await db.execute(q)).all()
 
-    # index by date string for gap-filling
-    by_date = {
-        r.day.date().isoformat(): (r.user_count or 0, r.ai_count or 0)
+    points = [
+        TimeseriesPoint(
+            date=r.bucket.isoformat() if granularity == "hour" else r.bucket.date().isoformat(),
+            user_messages=r.user_count,
+            ai_messages=r.ai_count,
+            total=r.user_count + r.ai_count,
+        )
         for r in rows
-    }
-
-    points: list[TimeseriesPoint] = []
-    cursor = start.date()
-    end_date = end.date()
-    while cursor <= end_date:
-        key = cursor.isoformat()
-        u, a = by_date.get(key, (0, 0))
-        points.append(TimeseriesPoint(
-            date=key, user_messages=u, ai_messages=a, total=u + a
-        ))
-        cursor += timedelta(days=1)
-
-    return TimeseriesResponse(range_start=start, range_end=end, points=points)
+    ]
+    return TimeseriesResponse(
+        range_start=start, range_end=end, granularity=granularity, tz=tz, points=points
+    )
 
 
 # ── 4. Top users by message volume ───────────────────────────────────────────
@@ -312,7 +404,7 @@ async def top_users(
     end: Optional[datetime] = Query(None),
     days: int = Query(30, ge=1, le=365),
     limit: int = Query(10, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Most active customers in the range — useful for spotting power users."""
     start, end = _resolve_range(start, end, days)
@@ -363,7 +455,7 @@ async def lead_funnel(
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
     days: int = Query(30, ge=1, le=365),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Lead count grouped by status — your conversion funnel.
@@ -397,7 +489,7 @@ async def pages_activity(
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
     days: int = Query(30, ge=1, le=365),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Per-page activity table — one row per page with message volume,
@@ -443,4 +535,226 @@ async def pages_activity(
     # sort most-active first
     out.sort(key=lambda x: x.message_count, reverse=True)
 
-    return PagesActivityResponse(range_start=start, range_end=end, pages=out)
\ No newline at end of file
+    return PagesActivityResponse(range_start=start, range_end=end, pages=out)
+
+
+# ── 7. Time to first AI reply ────────────────────────────────────────────────
+
+def _round(v) -> Optional[float]:
+    return round(float(v), 2) if v is not None else None
+
+
+@router.get("/response-time", response_model=ResponseTimeResponse)
+async def response_time(
+    page_id: Optional[str] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Latency between a customer message and the AI reply that follows it.
+
+    One pass: LEAD() over each user's messages pairs every row with the
+    next one; only (user → ai) pairs are measured. Percentiles are computed
+    in the database with percentile_cont.
+    """
+    start, end = _resolve_range(start, end, days)
+
+    window = dict(partition_by=Message.user_id, order_by=(Message.sent_at, Message.id))
+    pairs = select(
+        Message.from_role,
+        Message.sent_at,
+        func.lead(Message.from_role).over(**window).label("next_role"),
+        func.lead(Message.sent_at).over(**window).label("next_at"),
+    ).where(Message.sent_at.between(start, end))
+    pairs = _apply_page_filter(pairs, Message, page_id).subquery("pairs")
+
+    secs = func.extract("epoch", pairs.c.next_at - pairs.c.sent_at)
+    q = select(
+        func.count().label("n"),
+        func.avg(secs).label("avg"),
+        func.percentile_cont(0.50).within_group(secs).label("p50"),
+        func.percentile_cont(0.90).within_group(secs).label("p90"),
+        func.percentile_cont(0.95).within_group(secs).label("p95"),
+        func.percentile_cont(0.99).within_group(secs).label("p99"),
+    ).where(pairs.c.from_role == "user", pairs.c.next_role == "ai")
+    r = (await db.execute(q)).one()
+
+    return ResponseTimeResponse(
+        range_start=start,
+        range_end=end,
+        replied_turns=r.n,
+        avg_seconds=_round(r.avg),
+        p50_seconds=_round(r.p50),
+        p90_seconds=_round(r.p90),
+        p95_seconds=_round(r.p95),
+        p99_seconds=_round(r.p99),
+    )
+
+
+# ── 8. Messages to order ─────────────────────────────────────────────────────
+
+@router.get("/messages-to-order", response_model=MessagesToOrderResponse)
+async def messages_to_order(
+    page_id: Optional[str] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    How many customer messages it takes to reach a confirmed order.
+
+    For each confirmed lead in the range, LAG() finds the same user's
+    previous confirmed order; customer messages between the two are the
+    turns spent on this order.
+    """
+    start, end = _resolve_range(start, end, days)
+
+    leads = select(
+        SalesLead.id,
+        SalesLead.user_id,
+        SalesLead.detected_at,
+        func.lag(SalesLead.detected_at).over(
+            partition_by=SalesLead.user_id, order_by=SalesLead.detected_at
+        ).label("prev_at"),
+    ).where(SalesLead.status == "confirmed")
+    leads = _apply_page_filter(leads, SalesLead, page_id).subquery("leads")
+
+    turns = (
+        select(leads.c.id, func.count(Message.id).label("turns"))
+        .select_from(leads.outerjoin(Message, and_(
+            Message.user_id == leads.c.user_id,
+            Message.from_role == "user",
+            Message.sent_at <= leads.c.detected_at,
+            or_(leads.c.prev_at.is_(None), Message.sent_at > leads.c.prev_at),
+        )))
+        .where(leads.c.detected_at.between(start, end))
+        .group_by(leads.c.id)
+    ).subquery("turns")
+
+    q = select(
+        func.count().label("n"),
+        func.avg(turns.c.turns).label("avg"),
+        func.percentile_cont(0.50).within_group(turns.c.turns).label("p50"),
+        func.percentile_cont(0.90).within_group(turns.c.turns).label("p90"),
+        func.max(turns.c.turns).label("max"),
+    )
+    r = (await db.execute(q)).one()
+
+    return MessagesToOrderResponse(
+        range_start=start,
+        range_end=end,
+        orders=r.n,
+        avg_turns=_round(r.avg),
+        p50_turns=_round(r.p50),
+        p90_turns=_round(r.p90),
+        max_turns=r.max,
+    )
+
+
+# ── 9. Conversation sessions ─────────────────────────────────────────────────
+
+@router.get("/sessions", response_model=SessionsResponse)
+async def sessions(
+    page_id: Optional[str] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Conversation sessions started in the range, aggregated straight from
+    conversation_sessions — segmented at write time by the reply pipeline
+    (2-hour gap or confirmed order, see history.SESSION_GAP_SECONDS).
+    """
+    start, end = _resolve_range(start, end, days)
+
+    seconds = func.extract(
+        "epoch", ConversationSession.last_message_at - ConversationSession.started_at
+    )
+    q = select(
+        func.count().label("n"),
+        func.sum(case((ConversationSession.order_confirmed == True, 1), else_=0)).label("orders"),
+        func.avg(ConversationSession.message_count).label("avg_messages"),
+        func.percentile_cont(0.50).within_group(ConversationSession.message_count).label("p50_messages"),
+        func.avg(seconds).label("avg_seconds"),
+    ).where(ConversationSession.started_at.between(start, end))
+    r = (await db.execute(_apply_page_filter(q, ConversationSession, page_id))).one()
+
+    return SessionsResponse(
+        range_start=start,
+        range_end=end,
+        gap_seconds=SESSION_GAP_SECONDS,
+        total_sessions=r.n,
+        sessions_with_order=r.orders or 0,
+        avg_messages_per_session=_round(r.avg_messages),
+        p50_messages_per_session=_round(r.p50_messages),
+        avg_session_seconds=_round(r.avg_seconds),
+    )
+
+
+# ── 10. LLM cost and latency ─────────────────────────────────────────────────
+
+@router.get("/llm-usage", response_model=LlmUsageResponse)
+async def llm_usage(
+    page_id: Optional[str] = Query(None),
+    call_site: Optional[Literal["reply", "extraction"]] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+    tz: str = Query("UTC", description="IANA timezone days are aligned to"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Calls, tokens and p50 / p95 latency per day, page and call site, from
+    the llm_calls accounting table (services/llm_usage.py). Failed calls
+    count towards `errors` but not the latency percentiles.
+    """
+    start, end = _resolve_range(start, end, days)
+    tz = _validate_tz(tz)
+
+    ok_latency = case((LlmCall.outcome == "ok", LlmCall.latency_ms))
+    q = (
+        select(
+            func.date_trunc("day", func.timezone(tz, LlmCall.created_at)).label("day"),
+            LlmCall.page_id,
+            LlmCall.call_site,
+            func.count().label("calls"),
+            func.sum(case((LlmCall.outcome != "ok", 1), else_=0)).label("errors"),
+            func.sum(LlmCall.prompt_tokens).label("prompt_tokens"),
+            func.sum(LlmCall.completion_tokens).label("completion_tokens"),
+            func.sum(LlmCall.cached_tokens).label("cached_tokens"),
+            func.percentile_cont(0.50).within_group(ok_latency).label("p50"),
+            func.percentile_cont(0.95).within_group(ok_latency).label("p95"),
+        )
+        .where(LlmCall.created_at.between(start, end))
+        .group_by(literal_column("1"), LlmCall.page_id, LlmCall.call_site)   # by position, see heatmap()
+        .order_by(literal_column("1"), LlmCall.page_id, LlmCall.call_site)
+    )
+    q = _apply_page_filter(q, LlmCall, page_id)
+    if call_site:
+        q = q.where(LlmCall.call_site == call_site)
+    rows = (await db.execute(q)).all()
+
+    return LlmUsageResponse(
+        range_start=start,
+        range_end=end,
+        tz=tz,
+        rows=[
+            LlmUsageRow(
+                date=r.day.date().isoformat(),
+                page_id=r.page_id,
+                call_site=r.call_site,
+                calls=r.calls,
+                errors=r.errors or 0,
+                prompt_tokens=r.prompt_tokens or 0,
+                completion_tokens=r.completion_tokens or 0,
+                cached_tokens=r.cached_tokens or 0,
+                p50_latency_ms=_round(r.p50),
+                p95_latency_ms=_round(r.p95),
+            )
+            for r in rows
+        ],
+    )
@@ -1,11 +1,14 @@
-import json
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from config import get_settings
-from database import get_db
+from database import db_session
 from models import Page
 from services.facebook import (
     exchange_code_for_token,
@@ -17,6 +20,7 @@ from urllib.parse import quote
 
 router = APIRouter(prefix="/auth/facebook", tags=["auth"])
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 @router.get("/login")
@@ -38,7 +42,7 @@ def facebook_login():
 
 
 @router.get("/callback")
-async def facebook_callback(code: str, db: AsyncSession = Depends(get_db)):
+async def facebook_callback(code: str, background_tasks: BackgroundTasks):
     if not code:
         raise HTTPException(status_code=400, detail="No authorization code provided")
 
@@ -52,43 +56,17 @@ async def facebook_callback(code: str, db: AsyncSession = Depends(get_db)):
     user_name = user_info.get("name", "")
     user_avatar = user_info.get("picture", {}).get("data", {}).get("url", "")
 
-    # 3. Fetch pages the user manages
-    pages = await get_user_pages(user_access_token)
-    incoming_page_ids = {p["id"] for p in pages}
-
-    # 4. Deactivate pages owned by this user that were NOT returned this session
-    result = await db.execute(
-        select(Page).where(Page.user_fb_id == user_fb_id)
-    )
-    existing_pages = result.scalars().all()
-
-    for page in existing_pages:
-        if page.id not in incoming_page_ids:
-            page.is_active = False  # Stale — deactivate instead of leaving it live
-
-    # 5. Upsert pages returned in this session
-    for page_data in pages:
-        page_id = page_data["id"]
-        page_token = page_data.get("access_token", user_access_token)
-
-        existing: Page | None = await db.get(Page, page_id)
-        if existing:
-            existing.name = page_data.get("name", existing.name)
-            existing.access_token = page_token
-            existing.is_active = True  # Re-activate in case it was previously deactivated
-            existing.user_fb_id = user_fb_id
-        else:
-            new_page = Page(
-                id=page_id,
-                name=page_data.get("name", "Unknown Page"),
-                access_token=page_token,
-                is_active=True,
-                user_fb_id=user_fb_id,  # Track ownership
-            )
-            db.add(new_page)
-            await subscribe_page_to_webhook(page_id, page_token)
-
-    await db.commit()
+    # 3. Page sync runs after the redirect — poll /sync-status/{user_fb_id} for progress
+    _sync_status[user_fb_id] = {
+        "state": "pending",
+        "total_pages": None,
+        "new_pages": None,
+        "subscribed": 0,
+        "subscribe_failed": [],
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "finished_at": None,
+    }
+    background_tasks.add_task(_sync_pages, user_fb_id, user_access_token)
 
     frontend_url = (
         f"http://localhost:5173"
@@ -99,3 +77,124 @@ async def facebook_callback(code: str, db: AsyncSession = Depends(get_db)):
         f"&avatar={quote(user_avatar)}"
     )
     return RedirectResponse(url=frontend_url)
+
+
+@router.get("/sync-status/{user_fb_id}")
+async def page_sync_status(user_fb_id: str):
+    """
+    Progress of the page sync started by the last login of this user.
+
+    The status lives in the memory of the worker that ran the callback, so
+    with several workers another one answers 404. It is kept for
+    _SYNC_STATUS_TTL_SECONDS after the sync finishes, then 404 as well.
+    """
+    status = _sync_status.get(user_fb_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="No page sync for this user")
+    return status
+
+
+# ── Page sync ─────────────────────────────────────────────────────────────────
+
+# Per-process: the status endpoint only sees syncs started by this worker.
+# Finished entries are dropped after a few minutes.
+_sync_status: dict[str, dict] = {}
+_SYNC_STATUS_TTL_SECONDS = 300
+
+
+def _forget_sync_status(user_fb_id: str, status: dict) -> None:
+    # A newer login may have replaced the entry meanwhile; leave that one alone
+    if _sync_status.get(user_fb_id) is status:
+        del _sync_status[user_fb_id]
+
+
+def _insert_for(db: AsyncSession):
+    """Dialect-specific INSERT that supports ON CONFLICT."""
+    if db.bind.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+
+async def _sync_pages(user_fb_id: str, user_access_token: str) -> None:
+    status = _sync_status[user_fb_id]
+    status["state"] = "syncing"
+    try:
+        pages = await get_user_pages(user_access_token)
+        incoming_page_ids = [p["id"] for p in pages]
+        status["total_pages"] = len(pages)
+
+        async with db_session() as db:
+            # Deactivate pages owned by this user that were NOT returned this session
+            stale = update(Page).where(Page.user_fb_id == user_fb_id).values(is_active=False)
+            if incoming_page_ids:
+                stale = stale.where(Page.id.not_in(incoming_page_ids))
+            await db.execute(stale)
+
+            if pages:
+                existing_ids = set((await db.execute(
+                    select(Page.id).where(Page.id.in_(incoming_page_ids))
+                )).scalars())
+
+                # One INSERT … ON CONFLICT per group of pages returned this session.
+                # Graph sometimes omits the name; those rows keep the one on file.
+                insert = _insert_for(db)
+                named = [p for p in pages if p.get("name")]
+                unnamed = [p for p in pages if not p.get("name")]
+                for group in (named, unnamed):
+                    if not group:
+                        continue
+                    stmt = insert(Page).values([
+                        {
+                            "id": p["id"],
+                            "name": p.get("name") or "Unknown Page",
+                            "access_token": p.get("access_token", user_access_token),
+                            "is_active": True,
+                            "user_fb_id": user_fb_id,   # Track ownership
+                        }
+                        for p in group
+                    ])
+                    set_ = {
+                        "access_token": stmt.excluded.access_token,
+                        "is_active": True,   # Re-activate in case it was previously deactivated
+                        "user_fb_id": stmt.excluded.user_fb_id,
+                    }
+                    if group is named:
+                        set_["name"] = stmt.excluded.name
+                    await db.execute(stmt.on_conflict_do_update(index_elements=[Page.id], set_=set_))
+            else:
+                existing_ids = set()
+            await db.commit()
+
+        # Only brand-new pages need subscribing, a bounded number at a time
+        new_pages = [p for p in pages if p["id"] not in existing_ids]
+        status["new_pages"] = len(new_pages)
+        sem = asyncio.Semaphore(settings.PAGE_SUBSCRIBE_CONCURRENCY)
+
+        async def subscribe(page_data: dict) -> None:
+            async with sem:
+                try:
+                    result = await subscribe_page_to_webhook(
+                        page_data["id"], page_data.get("access_token", user_access_token)
+                    )
+                    ok = result.get("success", False)
+                except Exception:
+                    logger.exception("Webhook subscribe error", extra={"page_id": page_data["id"]})
+                    ok = False
+            if ok:
+                status["subscribed"] += 1
+            else:
+                status["subscribe_failed"].append(page_data["id"])
+
+        await asyncio.gather(*(subscribe(p) for p in new_pages))
+        status["state"] = "done"
+    except Exception as e:
+        logger.exception("Page sync failed", extra={"user_fb_id": user_fb_id})
+        status["state"] = "failed"
+        status["error"] = str(e)
+    finally:
+        status["finished_at"] = datetime.now(timezone.utc).isoformat()
+        asyncio.get_running_loop().call_later(
+            _SYNC_STATUS_TTL_SECONDS, _forget_sync_status, user_fb_id, status
+        )
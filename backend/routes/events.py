@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+
+from services.events import bus
+
+router = APIRouter(prefix="/api", tags=["events"])
+
+# Comment line sent when idle so proxies don't close the connection
+_HEARTBEAT_SECONDS = 15
+
+
+@router.get("/events")
+async def event_stream(
+    request: Request,
+    page_id: list[str] | None = Query(None, description="Only events for these pages (repeatable)"),
+):
+    """
+    Server-Sent Events stream of dashboard updates.
+
+    Event types: "message" (customer message saved), "reply" (AI reply
+    sent or failed), "lead" (confirmed order created). Each data payload
+    is JSON and always carries page_id.
+    """
+    sub = bus.subscribe(set(page_id) if page_id else None)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    evt = await asyncio.wait_for(sub.queue.get(), timeout=_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                payload = json.dumps({"page_id": evt.page_id, **evt.data}, default=str)
+                yield f"event: {evt.type}\ndata: {payload}\n\n"
+        finally:
+            bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -16,7 +16,7 @@ from pydantic import BaseModel
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import get_db, get_read_db
 from models import SalesLead, User
 
 router = APIRouter(prefix="/leads", tags=["leads"])
@@ -67,7 +67,7 @@ async def list_leads(
     status: str | None = Query(None, description="Filter by status"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     List sales leads for the dashboard.
@@ -99,7 +99,7 @@ async def list_leads(
 @router.get("/summary", response_model=list[StatusSummary])
 async def lead_summary(
     page_id: str | None = Query(None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Return count per status — useful for dashboard KPI cards.
@@ -117,7 +117,7 @@ async def lead_summary(
 
 
 @router.get("/{lead_id}", response_model=SalesLeadOut)
-async def get_lead(lead_id: int, db: AsyncSession = Depends(get_db)):
+async def get_lead(lead_id: int, db: AsyncSession = Depends(get_read_db)):
     """Fetch a single lead by ID."""
     lead = await db.get(SalesLead, lead_id)
     if not lead:
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import db_session, get_db
 from models import Page
 from services.facebook import (
     get_conversations,
@@ -17,15 +17,20 @@ async def get_conversations_endpoint(access_token: str, page_id: str):
     return await get_conversations(access_token, page_id)
 
 
+async def _page_token(page_id: str, fallback: str) -> str:
+    """Stored page token if we have one — the session is released before any Graph call."""
+    async with db_session() as db:
+        page: Page | None = await db.get(Page, page_id)
+    return page.access_token if page else fallback
+
+
 @router.get("/messages")
 async def get_messages_endpoint(
     access_token: str,
     page_id: str,
     conversation_id: str,
-    db: AsyncSession = Depends(get_db),
 ):
-    page: Page | None = await db.get(Page, page_id)
-    token = page.access_token if page else access_token
+    token = await _page_token(page_id, access_token)
     return await get_conversation_messages(token, conversation_id)
 
 
@@ -35,10 +40,8 @@ async def send_message_endpoint(
     page_id: str,
     recipient_id: str,
     message_text: str,
-    db: AsyncSession = Depends(get_db),
 ):
-    page: Page | None = await db.get(Page, page_id)
-    token = page.access_token if page else access_token
+    token = await _page_token(page_id, access_token)
 
     result = await fb_send_message(token, page_id, recipient_id, message_text)
     if "error" in result:
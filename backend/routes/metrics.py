@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.metrics import SEND_QUEUE_DEPTH, render
+from services.send_queue import get_send_queue
+
+router = APIRouter(tags=["metrics"])
+
+# Gauges read live state at scrape time
+SEND_QUEUE_DEPTH.set_function(lambda: get_send_queue().depth())
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
@@ -1,11 +1,14 @@
+import json
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from database import get_db
+from database import db_session, get_db
 from models import Page
+from services.intent_router import DEFAULT_TEMPLATES
 from services.facebook import (
     get_user_pages,
     subscribe_page_to_webhook,
@@ -17,6 +20,8 @@ router = APIRouter(prefix="/api", tags=["pages"])
 class PageUpdate(BaseModel):
     ai_instructions: Optional[str] = None
     is_active: Optional[bool] = None
+    # intent → reply text; "" turns that intent off (the LLM answers instead)
+    reply_templates: Optional[dict[str, str]] = None
 
 
 @router.get("/user/pages")
@@ -38,6 +43,7 @@ async def list_db_pages(db: AsyncSession = Depends(get_db)):
                 "name": p.name,
                 "is_active": p.is_active,
                 "ai_instructions": p.ai_instructions,
+                "reply_templates": json.loads(p.reply_templates) if p.reply_templates else {},
                 "created_at": p.created_at,
             }
             for p in pages
@@ -47,7 +53,7 @@ async def list_db_pages(db: AsyncSession = Depends(get_db)):
 
 @router.patch("/pages/{page_id}")
 async def update_page(page_id: str, body: PageUpdate, db: AsyncSession = Depends(get_db)):
-    """Update AI instructions or active status for a page."""
+    """Update AI instructions, reply templates or active status for a page."""
     page: Page | None = await db.get(Page, page_id)
     if not page:
         raise HTTPException(status_code=404, detail="Page not found")
@@ -56,15 +62,21 @@ async def update_page(page_id: str, body: PageUpdate, db: AsyncSession = Depends
         page.ai_instructions = body.ai_instructions
     if body.is_active is not None:
         page.is_active = body.is_active
+    if body.reply_templates is not None:
+        unknown = set(body.reply_templates) - set(DEFAULT_TEMPLATES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown intents: {', '.join(sorted(unknown))}")
+        page.reply_templates = json.dumps(body.reply_templates) if body.reply_templates else None
 
     await db.commit()
     return {"ok": True, "page_id": page_id}
 
 
 @router.post("/pages/{page_id}/subscribe")
-async def subscribe_page(page_id: str, db: AsyncSession = Depends(get_db)):
+async def subscribe_page(page_id: str):
     """Manually re-subscribe a page to the webhook."""
-    page: Page | None = await db.get(Page, page_id)
+    async with db_session() as db:
+        page: Page | None = await db.get(Page, page_id)
     if not page:
         raise HTTPException(status_code=404, detail="Page not found")
 
@@ -0,0 +1,108 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database import get_db
+from models import Page, Product
+from services.catalog import get_catalog_indexes
+
+router = APIRouter(prefix="/api", tags=["products"])
+settings = get_settings()
+
+
+class ProductIn(BaseModel):
+    name: str
+    description: Optional[str] = None
+    price: Optional[str] = None
+    sku: Optional[str] = None
+
+
+class ProductUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[str] = None
+    sku: Optional[str] = None
+    is_active: Optional[bool] = None
+
+
+def _product_dict(p: Product) -> dict:
+    return {
+        "id": p.id,
+        "page_id": p.page_id,
+        "name": p.name,
+        "description": p.description,
+        "price": p.price,
+        "sku": p.sku,
+        "is_active": p.is_active,
+        "updated_at": p.updated_at,
+    }
+
+
+async def _require_page(db: AsyncSession, page_id: str) -> None:
+    if not await db.get(Page, page_id):
+        raise HTTPException(status_code=404, detail="Page not found")
+
+
+@router.get("/pages/{page_id}/products")
+async def list_products(
+    page_id: str,
+    include_inactive: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    """The page's catalog, alphabetically."""
+    q = select(Product).where(Product.page_id == page_id).order_by(Product.name)
+    if not include_inactive:
+        q = q.where(Product.is_active == True)
+    products = (await db.execute(q)).scalars().all()
+    return {"products": [_product_dict(p) for p in products]}
+
+
+@router.post("/pages/{page_id}/products")
+async def create_products(page_id: str, body: list[ProductIn], db: AsyncSession = Depends(get_db)):
+    """Add one or more products (send a list; a whole catalog import is one call)."""
+    await _require_page(db, page_id)
+    products = [Product(page_id=page_id, **item.model_dump()) for item in body]
+    db.add_all(products)
+    await db.commit()
+    get_catalog_indexes().invalidate(page_id)
+    return {"products": [_product_dict(p) for p in products]}
+
+
+@router.patch("/products/{product_id}")
+async def update_product(product_id: int, body: ProductUpdate, db: AsyncSession = Depends(get_db)):
+    product: Product | None = await db.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    for field, val in body.model_dump(exclude_none=True).items():
+        setattr(product, field, val)
+    await db.commit()
+    get_catalog_indexes().invalidate(product.page_id)
+    return _product_dict(product)
+
+
+@router.delete("/products/{product_id}")
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_db)):
+    """Soft delete — keeps the row so every worker's index drops it on refresh."""
+    product: Product | None = await db.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    product.is_active = False
+    await db.commit()
+    get_catalog_indexes().invalidate(product.page_id)
+    return {"ok": True, "product_id": product_id}
+
+
+@router.get("/pages/{page_id}/products/search")
+async def search_products(
+    page_id: str,
+    q: str = Query(..., min_length=1),
+    k: Optional[int] = Query(None, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """Preview what the bot would retrieve for a customer message."""
+    hits = await get_catalog_indexes().search(db, page_id, q, k or settings.CATALOG_TOP_K)
+    return {"products": [{"name": h.name, "price": h.price, "description": h.description} for h in hits]}
@@ -0,0 +1,32 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_read_db
+from services.search import search_leads, search_messages
+
+router = APIRouter(prefix="/api", tags=["search"])
+
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=2, description="Words, quoted phrases, or a phone number"),
+    type: Literal["messages", "leads"] = Query("messages"),
+    page_id: str | None = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Ranked full-text search over message content, or over lead
+    product / address / notes and phone numbers.
+    """
+    fn = search_messages if type == "messages" else search_leads
+    rows = await fn(db, q, page_id, limit=page_size + 1, offset=(page - 1) * page_size)
+    return {
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(rows) > page_size,
+        "items": rows[:page_size],
+    }
@@ -1,4 +1,6 @@
 import json
+import logging
+
 from fastapi import APIRouter, Request, HTTPException, BackgroundTasks, Depends
 from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,10 +8,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from config import get_settings
 from database import get_db
 from models import Log
+from logging_config import LazyJson
+from services.intent_router import STICKER_TEXT
 from services.messenger import handle_incoming_message
 
 router = APIRouter(prefix="/webhook", tags=["webhook"])
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 @router.get("")
@@ -19,10 +24,10 @@ async def verify_webhook(request: Request):
     hub_token = request.query_params.get("hub.verify_token")
     hub_challenge = request.query_params.get("hub.challenge")
 
-    print(f"[webhook] verify → mode={hub_mode} token={hub_token}")
+    logger.info("Webhook verify request", extra={"hub_mode": hub_mode})
 
     if hub_mode == "subscribe" and hub_token == settings.WEBHOOK_VERIFY_TOKEN:
-        print("✅ Webhook verified")
+        logger.info("Webhook verified")
         return PlainTextResponse(content=hub_challenge)
 
     raise HTTPException(status_code=403, detail="Verification failed")
@@ -37,7 +42,7 @@ async def receive_webhook(
     """Receive incoming events from Facebook."""
     try:
         body = await request.json()
-        print(f"\n📨 Webhook received: {json.dumps(body)[:200]}")
+        logger.debug("Webhook received: %s", LazyJson(body, limit=200), extra={"sampled": True})
     except Exception:
         return {"status": "invalid json"}
 
@@ -64,9 +69,16 @@ async def receive_webhook(
             if event.get("message"):
                 message = event["message"]
                 message_text = message.get("text")
+                if message_text is None and message.get("sticker_id"):
+                    message_text = STICKER_TEXT
                 fb_message_id = message.get("mid")
+                # Tapped quick reply (e.g. Confirm / Edit under an order summary)
+                payload = message.get("quick_reply", {}).get("payload")
 
-                print(f"🆕 Message from {sender_id} on page {page_id}: {message_text}")
+                logger.info(
+                    "Message received",
+                    extra={"sender_id": sender_id, "page_id": page_id, "sampled": True},
+                )
 
                 # Run pipeline in background so we return 200 fast
                 background_tasks.add_task(
@@ -76,16 +88,32 @@ async def receive_webhook(
                     fb_message_id=fb_message_id,
                     message_text=message_text,
                     log_id=log_id,
+                    payload=payload,
                 )
 
             elif event.get("postback"):
-                print(f"📲 Postback from {sender_id}: {event['postback'].get('payload')}")
+                postback = event["postback"]
+                logger.info(
+                    "Postback %s", postback.get("payload"),
+                    extra={"sender_id": sender_id, "page_id": page_id},
+                )
+                # Button taps run through the pipeline like a message whose
+                # text is the button title
+                background_tasks.add_task(
+                    _run_pipeline,
+                    sender_id=sender_id,
+                    page_id=page_id,
+                    fb_message_id=postback.get("mid"),
+                    message_text=postback.get("title") or postback.get("payload"),
+                    log_id=log_id,
+                    payload=postback.get("payload"),
+                )
 
             elif event.get("delivery"):
-                print(f"✅ Delivery confirmed for {sender_id}")
+                logger.debug("Delivery confirmed", extra={"sender_id": sender_id, "sampled": True})
 
             elif event.get("read"):
-                print(f"👁️  Read receipt from {sender_id}")
+                logger.debug("Read receipt", extra={"sender_id": sender_id, "sampled": True})
 
     return {"status": "ok"}
 
@@ -96,16 +124,14 @@ async def _run_pipeline(
     fb_message_id: str | None,
     message_text: str | None,
     log_id: int,
+    payload: str | None = None,
 ):
-    """Runs inside BackgroundTask — creates its own DB session."""
-    from database import AsyncSessionLocal
-
-    async with AsyncSessionLocal() as db:
-        await handle_incoming_message(
-            db=db,
-            sender_id=sender_id,
-            page_id=page_id,
-            fb_message_id=fb_message_id,
-            message_text=message_text,
-            log_id=log_id,
-        )
+    """Runs inside BackgroundTask — the pipeline opens its own short DB sessions."""
+    await handle_incoming_message(
+        sender_id=sender_id,
+        page_id=page_id,
+        fb_message_id=fb_message_id,
+        message_text=message_text,
+        log_id=log_id,
+        payload=payload,
+    )
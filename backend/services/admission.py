@@ -0,0 +1,183 @@
+"""
+services/admission.py
+
+Admission control in front of the reply LLM, for provider incidents.
+
+The controller watches three signals:
+
+    queue depth      — replies waiting on the priority gate (scheduler.py)
+    reply latency    — moving average of recent reply completions
+    provider errors  — consecutive failed completions (circuit breaker)
+
+Past LLM_SHED_QUEUE_DEPTH waiters or LLM_SHED_LATENCY_SECONDS average
+latency, browsing and collecting turns are shed; turns that complete an
+order still go through. While the circuit is open (LLM_CIRCUIT_FAILURES
+errors in a row) every turn is shed until LLM_CIRCUIT_COOLDOWN_SECONDS
+have passed. Then the circuit is half-open: the next turn is admitted as a
+single probe and everything else keeps being shed for another cooldown
+while it is in flight. A successful probe closes the circuit; a failed one
+reopens it.
+
+A shed turn is not dropped: the pipeline sends the page's holding message
+and parks the turn in DeferredTurns, keyed by conversation, so a customer
+who keeps typing has one pending turn rather than many. run_deferred_loop
+in messenger.py retries due turns with exponential backoff and answers
+them normally once the controller admits them again, or after
+LLM_DEFER_MAX_SECONDS regardless. The queue is in-process: a restart
+loses parked turns (their messages are stored; only the reply is lost).
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from config import get_settings
+from services.metrics import LLM_DEFERRED_TURNS
+from services.scheduler import get_llm_gate
+
+settings = get_settings()
+
+# Latency samples older than this no longer keep the latency signal raised,
+# so a quiet period after an incident reopens admission on its own
+_LATENCY_STALE_SECONDS = 60
+_EWMA_ALPHA = 0.2
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_depth: int,
+        max_latency: float,
+        failure_threshold: int,
+        cooldown_seconds: float,
+    ):
+        self.max_depth = max_depth
+        self.max_latency = max_latency
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._latency = 0.0
+        self._latency_at = 0.0
+        self._failures = 0
+        self._open_until = 0.0
+
+    def shed_reason(self, state: str) -> str | None:
+        """Why a turn in `state` should be deferred right now, or None to admit it."""
+        now = time.monotonic()
+        if self._failures >= self.failure_threshold:
+            if now < self._open_until:
+                return "provider_errors"
+            # Half-open: admit this turn as the probe and hold the rest back
+            # until it reports; one LLM call fits well inside a cooldown
+            self._open_until = now + self.cooldown_seconds
+            return None
+        if state == "confirming":
+            return None
+        if get_llm_gate().depth() >= self.max_depth:
+            return "queue_depth"
+        if self._latency >= self.max_latency and now - self._latency_at < _LATENCY_STALE_SECONDS:
+            return "latency"
+        return None
+
+    def record_success(self, seconds: float) -> None:
+        self._failures = 0
+        fresh = time.monotonic() - self._latency_at < _LATENCY_STALE_SECONDS
+        self._latency = _EWMA_ALPHA * seconds + (1 - _EWMA_ALPHA) * self._latency if fresh else seconds
+        self._latency_at = time.monotonic()
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            # (Re)open the circuit; a failed probe reopens it for a full cooldown
+            self._open_until = time.monotonic() + self.cooldown_seconds
+
+
+# ── Deferred turns ────────────────────────────────────────────────────────────
+
+@dataclass
+class DeferredTurn:
+    sender_id: str
+    page_id: str
+    fb_message_id: str | None
+    message_text: str
+    log_id: int | None
+    conversation_id: str | None
+    payload: str | None
+    deferred_at: float = field(default_factory=time.monotonic)
+    due_at: float = 0.0
+    attempts: int = 0
+
+
+class DeferredTurns:
+    """Shed turns waiting for a retry, at most one per (page, sender)."""
+
+    def __init__(self, retry_seconds: float, max_wait_seconds: float, max_turns: int):
+        self.retry_seconds = retry_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.max_turns = max_turns
+        self._turns: dict[tuple[str, str], DeferredTurn] = {}
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def has(self, page_id: str, sender_id: str) -> bool:
+        return (page_id, sender_id) in self._turns
+
+    def park(self, turn: DeferredTurn) -> DeferredTurn | None:
+        """
+        Schedule the next retry for `turn`. Returns the turn it replaces
+        for the same conversation, if any. Raises OverflowError when full.
+        """
+        key = (turn.page_id, turn.sender_id)
+        previous = self._turns.get(key)
+        if previous is None and len(self._turns) >= self.max_turns:
+            raise OverflowError("deferred turn queue is full")
+        if previous is not None and previous is not turn:
+            # The newer message carries the conversation; keep the older deadline
+            turn.deferred_at = min(turn.deferred_at, previous.deferred_at)
+        turn.due_at = time.monotonic() + min(self.retry_seconds * 2 ** turn.attempts, 60)
+        turn.attempts += 1
+        self._turns[key] = turn
+        LLM_DEFERRED_TURNS.set(len(self._turns))
+        return previous if previous is not turn else None
+
+    def pop_due(self) -> list[DeferredTurn]:
+        """Turns whose retry time has come, oldest first."""
+        now = time.monotonic()
+        due = sorted(
+            (t for t in self._turns.values() if t.due_at <= now), key=lambda t: t.deferred_at
+        )
+        for turn in due:
+            del self._turns[(turn.page_id, turn.sender_id)]
+        LLM_DEFERRED_TURNS.set(len(self._turns))
+        return due
+
+    def expired(self, turn: DeferredTurn) -> bool:
+        return time.monotonic() - turn.deferred_at >= self.max_wait_seconds
+
+
+# ── Singletons ────────────────────────────────────────────────────────────────
+
+_controller: AdmissionController | None = None
+_deferred: DeferredTurns | None = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            settings.LLM_SHED_QUEUE_DEPTH,
+            settings.LLM_SHED_LATENCY_SECONDS,
+            settings.LLM_CIRCUIT_FAILURES,
+            settings.LLM_CIRCUIT_COOLDOWN_SECONDS,
+        )
+    return _controller
+
+
+def get_deferred_turns() -> DeferredTurns:
+    global _deferred
+    if _deferred is None:
+        _deferred = DeferredTurns(
+            settings.LLM_DEFER_RETRY_SECONDS,
+            settings.LLM_DEFER_MAX_SECONDS,
+            settings.LLM_DEFER_MAX_TURNS,
+        )
+    return _deferred
@@ -13,13 +13,49 @@ Order flow:
      That tag is the ONLY thing that triggers lead creation. Nothing else does.
 
 The tag is stripped before the message is sent to the customer.
+
+The step-3 summary has a fixed format, so it is also recognised in code:
+it goes out with Confirm / Edit quick replies, and tapping one of those is
+handled without another LLM call (see messenger.py).
+
+Prompt layout — ordered so the provider's prompt cache can reuse as much
+of each request as possible:
+
+    system  SYSTEM_PROMPT + page instructions   byte-stable per page
+    system  "[N earlier messages … not shown]"  only past LLM_HISTORY_MAX_TURNS
+    ...     the session's turns                 append-only within a session
+    system  this turn's context                 returning customer, catalog matches
+    user    this message
+
+Only the last two messages change from one turn to the next. Anything
+that varies per turn belongs in _turn_context(), never in the prefix.
+Long sessions are cut in steps of half the window (trim_history), so the
+prefix also survives most turns past the cap.
+Bump PROMPT_VERSION whenever SYSTEM_PROMPT or the layout changes so cache
+hit rates can be compared across deploys.
 """
 
-from groq import Groq
+import asyncio
+import logging
+import re
+import time
+from functools import lru_cache
+
 from config import get_settings
+from services.catalog import CatalogHit
+from services.history import HistoryTurn, to_llm_messages, trim_history
+from services.llm_usage import record_llm_call
+from services.metrics import LLM_PROMPT_VERSION
+
+logger = logging.getLogger(__name__)
 
 _client = None
 
+REPLY_MODEL = "llama-3.3-70b-versatile"
+LLM_UNAVAILABLE_TEXT = "Sorry, something went wrong on my end."
+PROMPT_VERSION = 3
+LLM_PROMPT_VERSION.set(PROMPT_VERSION)
+
 SYSTEM_PROMPT = """You are a friendly sales assistant for an online shop on Facebook Messenger.
 
 YOUR JOB
@@ -39,8 +75,12 @@ STEP 2 — Collect these 2 fields:
 
   If you already have a field from earlier in THIS conversation, skip it and
   confirm what you have rather than asking again.
-  Do NOT carry over details from previous conversations about different products.
+  Do NOT silently carry over details from previous conversations.
   Each new product the customer asks about is a fresh order — start clean.
+  If this turn's context has a RETURNING CUSTOMER section, offer those saved
+  details for this order in one question ("Shall I send it to … and call
+  you on …?") instead of asking for each field. If the customer agrees,
+  use them as-is and go straight to STEP 3; otherwise ask for the new ones.
 
 STEP 3 — Confirmation summary
   Once you have BOTH fields, send a summary exactly like this:
@@ -81,44 +121,155 @@ Never ask for payment details.
 """
 
 
+# ── Order summary quick replies ───────────────────────────────────────────────
+
+ORDER_CONFIRM_PAYLOAD = "ORDER_CONFIRM"
+ORDER_EDIT_PAYLOAD = "ORDER_EDIT"
+
+ORDER_QUICK_REPLIES = [
+    {"content_type": "text", "title": "✅ Confirm", "payload": ORDER_CONFIRM_PAYLOAD},
+    {"content_type": "text", "title": "✏️ Edit", "payload": ORDER_EDIT_PAYLOAD},
+]
+
+ORDER_CONFIRMED_TEXT = "Your order is confirmed! We'll be in touch soon. 🙏"
+ORDER_EDIT_TEXT = "Sure! What would you like to change — the item, phone number or address?"
+
+_SUMMARY_LINES = {
+    "product_interest": re.compile(r"^\s*📦\s*(.+?)\s*$", re.MULTILINE),
+    "phone_number": re.compile(r"^\s*📞\s*(.+?)\s*$", re.MULTILINE),
+    "delivery_address": re.compile(r"^\s*📍\s*(.+?)\s*$", re.MULTILINE),
+}
+
+
+def parse_order_summary(reply: str) -> dict | None:
+    """
+    Fields from a STEP 3 order summary, keyed like the lead extractor's
+    output, or None if the reply is not a complete summary.
+    """
+    details = {}
+    for key, pattern in _SUMMARY_LINES.items():
+        match = pattern.search(reply)
+        if not match:
+            return None
+        details[key] = match.group(1)
+    return details
+
+
+def reply_quick_replies(reply: str) -> list[dict] | None:
+    """Confirm / Edit buttons for an order summary, None for any other reply."""
+    return ORDER_QUICK_REPLIES if parse_order_summary(reply) is not None else None
+
+
+class LLMUnavailable(Exception):
+    """The reply completion failed or timed out (provider error, rate limit, network)."""
+
+
 def get_client():
     global _client
     if _client is None:
+        from groq import Groq   # heavy SDK import deferred to the first LLM call
         settings = get_settings()
-        _client = Groq(api_key=settings.GROQ_API_KEY)
+        _client = Groq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL or None)
     return _client
 
 
+@lru_cache(maxsize=1024)
+def page_system_prompt(instructions: str | None) -> str:
+    """
+    The cacheable prefix for a page. Canonicalised (line endings, trailing
+    whitespace) so that an instructions edit which changes nothing visible
+    does not change the bytes sent.
+    """
+    instructions = "\n".join(
+        line.rstrip() for line in (instructions or "").replace("\r\n", "\n").split("\n")
+    ).strip()
+    if not instructions:
+        return SYSTEM_PROMPT
+    return f"{SYSTEM_PROMPT}\nADDITIONAL INSTRUCTIONS\n{instructions}\n"
+
+
+def _turn_context(
+    remembered: dict[str, str] | None,
+    products: list[CatalogHit] | None,
+) -> str | None:
+    """Per-turn sections, sent after the history so the prefix stays stable."""
+    sections = []
+    if remembered:
+        lines = "\n".join(f"  {k.capitalize()}: {v}" for k, v in remembered.items())
+        sections.append(f"RETURNING CUSTOMER — saved from a previous order\n{lines}")
+    if products:
+        lines = "\n".join(p.as_prompt_line() for p in products)
+        sections.append(
+            "PRODUCTS MATCHING THIS MESSAGE — from the shop catalog. The catalog has "
+            "more items than listed; never say something is unavailable just because "
+            f"it is not here.\n{lines}"
+        )
+    return "\n\n".join(sections) or None
+
+
+def build_messages(
+    message: str,
+    instructions: str | None = None,
+    history: list[HistoryTurn] | None = None,
+    remembered: dict[str, str] | None = None,
+    products: list[CatalogHit] | None = None,
+) -> list[dict]:
+    """Chat messages for one reply, in the cache-friendly layout above."""
+    messages = [{"role": "system", "content": page_system_prompt(instructions)}]
+    if history:
+        history, omitted = trim_history(history, get_settings().LLM_HISTORY_MAX_TURNS)
+        if omitted:
+            messages.append({
+                "role": "system",
+                "content": f"[{omitted} earlier messages in this conversation are not shown]",
+            })
+        messages.extend(to_llm_messages(history))
+    context = _turn_context(remembered, products)
+    if context:
+        messages.append({"role": "system", "content": context})
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
 async def get_ai_reply(
     message: str,
     instructions: str | None = None,
-    history: list[dict] | None = None,
+    history: list[HistoryTurn] | None = None,
+    remembered: dict[str, str] | None = None,
+    products: list[CatalogHit] | None = None,
+    page_id: str | None = None,
 ) -> str:
     """
     Generate a reply. Returns the RAW string, which may contain
     the hidden <!--ORDER_CONFIRMED--> tag. Call strip_confirmation_tag()
-    before sending to the customer.
-    """
-    system = SYSTEM_PROMPT
-    if instructions:
-        system += f"\n\nADDITIONAL INSTRUCTIONS\n{instructions}"
+    before sending to the customer. Raises LLMUnavailable when the
+    provider call fails; the pipeline defers the turn (see admission.py).
 
-    messages = []
-    if history:
-        messages.extend(history)
-    messages.append({"role": "user", "content": message})
+    `remembered` holds contact details saved from the customer's previous
+    orders (name / phone / address); they are offered as defaults.
+    `products` are the catalog entries retrieved for this message.
+    `page_id` attributes the call in llm_calls.
+    """
+    messages = build_messages(message, instructions, history, remembered, products)
+    usage = {"page_id": page_id, "model": REPLY_MODEL, "prompt_version": PROMPT_VERSION}
 
+    t0 = time.perf_counter()
     try:
-        response = get_client().chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "system", "content": system}] + messages,
+        # The SDK client is synchronous — keep it off the event loop
+        response = await asyncio.to_thread(
+            get_client().chat.completions.create,
+            model=REPLY_MODEL,
+            messages=messages,
             max_tokens=400,
             temperature=0.4,
+            timeout=get_settings().LLM_TIMEOUT_SECONDS,
         )
-        return response.choices[0].message.content or "Sorry, I could not generate a reply."
     except Exception as e:
-        print(f"❌ Groq error: {e}")
-        return "Sorry, something went wrong on my end."
+        logger.error("Groq error: %s", e)
+        record_llm_call("reply", None, time.perf_counter() - t0, outcome="error", **usage)
+        raise LLMUnavailable(str(e)) from e
+    record_llm_call("reply", response, time.perf_counter() - t0, **usage)
+    return response.choices[0].message.content or "Sorry, I could not generate a reply."
 
 
 def strip_confirmation_tag(reply: str) -> tuple[str, bool]:
@@ -0,0 +1,172 @@
+"""
+services/catalog.py
+
+Per-page product retrieval for the reply prompt.
+
+Each worker keeps one in-memory BM25 index per page, built from the
+products table. Only the top-k products for the current message are put
+into the prompt, instead of the whole catalog pasted into ai_instructions.
+
+Refresh is incremental: at most every CATALOG_REFRESH_SECONDS a page's
+index asks for rows whose updated_at moved since its last look and
+upserts (or, for is_active=False, removes) just those documents.
+
+Pure Python on purpose — a shop catalog is hundreds of items, not millions,
+and scoring a query is a few dict lookups per term.
+"""
+
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from models import Product, as_utc
+from services.metrics import CACHE_REQUESTS
+
+settings = get_settings()
+
+# Rows committed slightly out of updated_at order are picked up by re-reading
+# a small overlap on every refresh; upserts are idempotent.
+_REFRESH_OVERLAP = timedelta(seconds=5)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogHit:
+    name: str
+    price: str | None
+    description: str | None
+
+    def as_prompt_line(self) -> str:
+        line = f"• {self.name}"
+        if self.price:
+            line += f" — {self.price}"
+        if self.description:
+            line += f": {self.description}"
+        return line
+
+
+class BM25Index:
+    """
+    Okapi BM25 over product name + description + sku, with per-document
+    upsert/remove so a catalog edit never triggers a full rebuild.
+    The name is counted twice so title matches outrank description matches.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs: dict[int, CatalogHit] = {}
+        self._lengths: dict[int, int] = {}
+        self._terms: dict[int, Counter] = {}
+        self._postings: dict[str, dict[int, int]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def upsert(self, product: Product) -> None:
+        self.remove(product.id)
+        terms = Counter(tokenize(
+            f"{product.name} {product.name} {product.description or ''} {product.sku or ''}"
+        ))
+        self._docs[product.id] = CatalogHit(product.name, product.price, product.description)
+        self._terms[product.id] = terms
+        self._lengths[product.id] = length = sum(terms.values())
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[product.id] = tf
+
+    def remove(self, product_id: int) -> None:
+        terms = self._terms.pop(product_id, None)
+        if terms is None:
+            return
+        del self._docs[product_id]
+        self._total_length -= self._lengths.pop(product_id)
+        for term in terms:
+            posting = self._postings[term]
+            del posting[product_id]
+            if not posting:
+                del self._postings[term]
+
+    def search(self, query: str, k: int) -> list[CatalogHit]:
+        n = len(self._docs)
+        if not n:
+            return []
+        avg_length = self._total_length / n
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [self._docs[doc_id] for doc_id, _ in best]
+
+
+class _PageCatalog:
+    def __init__(self):
+        self.index = BM25Index()
+        self.synced_until: datetime | None = None
+        self.checked_at = 0.0
+
+
+class CatalogIndexes:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._pages: dict[str, _PageCatalog] = {}
+
+    async def search(self, db: AsyncSession, page_id: str, query: str, k: int) -> list[CatalogHit]:
+        catalog = self._pages.get(page_id)
+        if catalog is None:
+            catalog = self._pages[page_id] = _PageCatalog()
+        if time.monotonic() - catalog.checked_at >= self.refresh_seconds:
+            await self._refresh(db, page_id, catalog)
+            CACHE_REQUESTS.inc(cache="catalog_index", result="miss")
+        else:
+            CACHE_REQUESTS.inc(cache="catalog_index", result="hit")
+        return catalog.index.search(query, k)
+
+    def invalidate(self, page_id: str) -> None:
+        """Force the next search on this page to pick up changes (same worker)."""
+        catalog = self._pages.get(page_id)
+        if catalog is not None:
+            catalog.checked_at = 0.0
+
+    async def _refresh(self, db: AsyncSession, page_id: str, catalog: _PageCatalog) -> None:
+        q = select(Product).where(Product.page_id == page_id)
+        if catalog.synced_until is not None:
+            q = q.where(Product.updated_at >= catalog.synced_until - _REFRESH_OVERLAP)
+        for product in (await db.execute(q)).scalars():
+            if product.is_active:
+                catalog.index.upsert(product)
+            else:
+                catalog.index.remove(product.id)
+            updated_at = as_utc(product.updated_at)
+            if catalog.synced_until is None or updated_at > catalog.synced_until:
+                catalog.synced_until = updated_at
+        catalog.checked_at = time.monotonic()
+
+
+_indexes: CatalogIndexes | None = None
+
+
+def get_catalog_indexes() -> CatalogIndexes:
+    global _indexes
+    if _indexes is None:
+        _indexes = CatalogIndexes(settings.CATALOG_REFRESH_SECONDS)
+    return _indexes
@@ -0,0 +1,147 @@
+"""
+services/context.py
+
+Everything the reply pipeline needs before the LLM call, loaded in one
+statement:
+
+    page config (token, instructions, reply templates, active flag)
+    user state (id, block flags, remembered contact details)
+                                           ← LEFT JOIN, NULL for new users
+    the user's latest conversation session ← LEFT JOIN on an indexed lookup
+    that session's messages                ← LEFT JOIN on (session_id, sent_at)
+
+Page, user and session columns repeat on each message row, which is far
+cheaper than sequential round trips. The result is a frozen ReplyContext
+that the rest of the pipeline can share freely.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import ConversationSession, Message, Page, User, as_utc
+from services.catalog import CatalogHit
+from services.history import SESSION_GAP_SECONDS, HistoryTurn
+
+
+@dataclass(frozen=True, slots=True)
+class ReplyContext:
+    page_id: str
+    page_active: bool
+    access_token: str
+    ai_instructions: str | None
+    reply_templates: str | None         # raw JSON, see services/intent_router.py
+    user_id: int | None                 # None until the first message is stored
+    is_blocked: bool
+    blocked_until: datetime | None
+    remembered_name: str | None
+    remembered_phone: str | None
+    remembered_address: str | None
+    session_id: int | None              # None → the next message starts a new session
+    history: tuple[HistoryTurn, ...]    # current session, oldest first
+    products: tuple[CatalogHit, ...] = ()   # catalog matches for this turn, filled in later
+
+    @property
+    def remembered_contact(self) -> dict[str, str]:
+        """Details saved from the customer's previous orders, if any."""
+        fields = {
+            "name": self.remembered_name,
+            "phone": self.remembered_phone,
+            "address": self.remembered_address,
+        }
+        return {k: v for k, v in fields.items() if v}
+
+    @property
+    def temporarily_blocked(self) -> bool:
+        return self.blocked_until is not None and self.blocked_until > datetime.now(timezone.utc)
+
+
+def _context_query(page_id: str, sender_id: str):
+    user_id = (
+        select(User.id)
+        .where(User.user_id == sender_id, User.page_id == page_id)
+        .scalar_subquery()
+    )
+    latest_session = (
+        select(ConversationSession.id)
+        .where(ConversationSession.user_id == user_id, ConversationSession.page_id == page_id)
+        .order_by(ConversationSession.last_message_at.desc(), ConversationSession.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Page.is_active,
+            Page.access_token,
+            Page.ai_instructions,
+            Page.reply_templates,
+            User.id.label("user_id"),
+            User.is_blocked,
+            User.blocked_until,
+            User.remembered_name,
+            User.remembered_phone,
+            User.remembered_address,
+            ConversationSession.id.label("session_id"),
+            ConversationSession.last_message_at,
+            ConversationSession.closed_at,
+            Message.from_role,
+            Message.content,
+            Message.sent_at,
+        )
+        .select_from(Page)
+        .outerjoin(User, and_(User.page_id == Page.id, User.user_id == sender_id))
+        .outerjoin(ConversationSession, ConversationSession.id == latest_session)
+        .outerjoin(Message, Message.session_id == ConversationSession.id)
+        .where(Page.id == page_id)
+        .order_by(Message.sent_at, Message.id)
+    )
+
+
+def session_is_open(last_message_at: datetime | None, closed_at: datetime | None, now: datetime) -> bool:
+    """
+    A new message continues the latest session unless that session ended
+    with a confirmed order (so the AI never sees a finished order and
+    re-confirms it) or has been idle longer than SESSION_GAP_SECONDS.
+    """
+    if last_message_at is None or closed_at is not None:
+        return False
+    return (now - last_message_at).total_seconds() <= SESSION_GAP_SECONDS
+
+
+async def load_reply_context(
+    db: AsyncSession,
+    page_id: str,
+    sender_id: str,
+) -> ReplyContext | None:
+    """One round trip. Returns None when the page does not exist."""
+    rows = (await db.execute(_context_query(page_id, sender_id))).all()
+    if not rows:
+        return None
+
+    first = rows[0]
+    is_open = session_is_open(
+        as_utc(first.last_message_at), first.closed_at, datetime.now(timezone.utc)
+    )
+    history = tuple(
+        HistoryTurn(r.from_role, r.content, as_utc(r.sent_at))
+        for r in rows
+        if r.from_role is not None      # session with no messages yet
+    ) if is_open else ()
+
+    return ReplyContext(
+        page_id=page_id,
+        page_active=bool(first.is_active),
+        access_token=first.access_token,
+        ai_instructions=first.ai_instructions,
+        reply_templates=first.reply_templates,
+        user_id=first.user_id,
+        is_blocked=bool(first.is_blocked),
+        blocked_until=as_utc(first.blocked_until),
+        remembered_name=first.remembered_name,
+        remembered_phone=first.remembered_phone,
+        remembered_address=first.remembered_address,
+        session_id=first.session_id if is_open else None,
+        history=history,
+    )
@@ -0,0 +1,174 @@
+"""
+services/events.py
+
+In-process pub/sub that feeds the dashboard push channel (/api/events).
+
+Producers call publish_after_commit(db, ...) so an event only goes out once
+the row it describes is actually committed — a rolled-back lead or message
+never reaches the dashboard. Subscribers get a bounded queue; a slow client
+drops its oldest events rather than growing memory without limit.
+
+Across workers: the webhook POST and the dashboard's SSE connection often
+land on different processes. On Postgres every event is also sent with
+NOTIFY inside the producing transaction (so it is delivered only on commit),
+and run_event_relay() in each worker LISTENs on the primary and republishes
+what it hears on its own bus — the producer's included. While a worker's
+relay is down it publishes its own events locally, as SQLite always does.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import event as sa_event
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import engine
+from services.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_SIZE = 256
+_PENDING_KEY = "pending_events"
+
+_CHANNEL = "dashboard_events"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+_NOTIFY_MAX_BYTES = 7900
+_NOTIFY_TRIM_CHARS = 500
+_RELAY_RETRY_SECONDS = 5.0
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+EVENT_SUBSCRIBERS = Gauge("event_subscribers", "Open dashboard push connections")
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    type: str            # "message" | "reply" | "lead"
+    page_id: str
+    data: dict
+
+
+class _Subscription:
+    __slots__ = ("queue", "page_ids")
+
+    def __init__(self, page_ids: frozenset[str] | None):
+        self.queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        self.page_ids = page_ids
+
+
+class EventBus:
+    def __init__(self):
+        self._subs: set[_Subscription] = set()
+
+    def subscribe(self, page_ids: set[str] | None = None) -> _Subscription:
+        """page_ids=None means every page."""
+        sub = _Subscription(frozenset(page_ids) if page_ids else None)
+        self._subs.add(sub)
+        EVENT_SUBSCRIBERS.set(len(self._subs))
+        return sub
+
+    def unsubscribe(self, sub: _Subscription) -> None:
+        self._subs.discard(sub)
+        EVENT_SUBSCRIBERS.set(len(self._subs))
+
+    def publish(self, evt: Event) -> None:
+        for sub in self._subs:
+            if sub.page_ids is not None and evt.page_id not in sub.page_ids:
+                continue
+            if sub.queue.full():
+                sub.queue.get_nowait()
+            sub.queue.put_nowait(evt)
+
+
+bus = EventBus()
+
+
+def publish_after_commit(db: AsyncSession, type: str, page_id: str, data: dict) -> None:
+    """Queue an event on the session; it is published when the session commits."""
+    db.sync_session.info.setdefault(_PENDING_KEY, []).append(Event(type, page_id, data))
+
+
+# ── Cross-process relay (Postgres) ──────────────────────────────────────────
+
+_relay = {"listening": False}
+
+
+def _encode(evt: Event) -> str:
+    """JSON for a NOTIFY payload; long text fields are trimmed to fit the limit."""
+    payload = json.dumps({"type": evt.type, "page_id": evt.page_id, "data": evt.data}, default=str)
+    if len(payload.encode()) < _NOTIFY_MAX_BYTES:
+        return payload
+    data = {
+        k: v[:_NOTIFY_TRIM_CHARS] if isinstance(v, str) else v
+        for k, v in evt.data.items()
+    }
+    return json.dumps({"type": evt.type, "page_id": evt.page_id, "data": data}, default=str)
+
+
+def _on_notify(connection, pid: int, channel: str, payload: str) -> None:
+    try:
+        raw = json.loads(payload)
+        bus.publish(Event(raw["type"], raw["page_id"], raw["data"]))
+    except Exception:
+        logger.exception("Bad event notification")
+
+
+async def run_event_relay() -> None:
+    """
+    Background task: LISTEN on the primary and republish every worker's
+    committed events on this process's bus. Reconnects after a drop; events
+    committed while disconnected are not replayed (the dashboard reloads on
+    SSE reconnect, not on relay reconnect). No-op on SQLite.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    while True:
+        try:
+            async with engine.connect() as conn:
+                driver = (await conn.get_raw_connection()).driver_connection
+                closed = asyncio.Event()
+                driver.add_termination_listener(lambda _conn: closed.set())
+                await driver.add_listener(_CHANNEL, _on_notify)
+                _relay["listening"] = True
+                logger.info("Event relay listening on %s", _CHANNEL)
+                try:
+                    await closed.wait()
+                finally:
+                    _relay["listening"] = False
+                    if not driver.is_closed():
+                        await driver.remove_listener(_CHANNEL, _on_notify)
+            logger.warning("Event relay connection closed; reconnecting")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Event relay failed; retrying in %.0fs", _RELAY_RETRY_SECONDS)
+        await asyncio.sleep(_RELAY_RETRY_SECONDS)
+
+
+@sa_event.listens_for(Session, "before_commit")
+def _notify_pending(session: Session) -> None:
+    pending = session.info.get(_PENDING_KEY)
+    if not pending or session.get_bind().dialect.name != "postgresql":
+        return
+    for evt in pending:
+        session.execute(_NOTIFY_SQL, {"channel": _CHANNEL, "payload": _encode(evt)})
+    if _relay["listening"]:
+        # Our own relay hears these back after the commit; don't publish twice
+        session.info.pop(_PENDING_KEY)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _flush_pending(session: Session) -> None:
+    for evt in session.info.pop(_PENDING_KEY, ()):
+        try:
+            bus.publish(evt)
+        except Exception:
+            logger.exception("Event publish failed")
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,9 +1,21 @@
+import json
+import logging
+from urllib.parse import urlencode
+
 import httpx
 from config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+FB_GRAPH = settings.FB_GRAPH_URL.rstrip("/")
+
+# Graph error codes that mean "try again later" rather than "this will never work".
+# 1/2 = temporary API error, 4/17/32/613 = rate limited.
+TRANSIENT_ERROR_CODES = {1, 2, 4, 17, 32, 613}
 
-FB_GRAPH = "https://graph.facebook.com/v18.0"
+# Graph batch requests accept at most 50 operations.
+MAX_BATCH_SIZE = 50
 
 
 async def exchange_code_for_token(code: str) -> dict:
@@ -53,25 +65,92 @@ async def subscribe_page_to_webhook(page_id: str, page_access_token: str) -> dic
         )
         data = r.json()
         if r.status_code != 200:
-            print(f"⚠️  Webhook subscribe failed for page {page_id}: {data}")
+            logger.warning("Webhook subscribe failed: %s", data, extra={"page_id": page_id})
         else:
-            print(f"✅ Page {page_id} subscribed to webhook")
+            logger.info("Page subscribed to webhook", extra={"page_id": page_id})
         return data
 
 
-async def send_message(page_access_token: str, page_id: str, recipient_id: str, text: str) -> dict:
+def _message_body(text: str, quick_replies: list[dict] | None) -> dict:
+    message = {"text": text}
+    if quick_replies:
+        message["quick_replies"] = quick_replies
+    return message
+
+
+async def send_message(
+    page_access_token: str,
+    page_id: str,
+    recipient_id: str,
+    text: str,
+    quick_replies: list[dict] | None = None,
+) -> dict:
     async with httpx.AsyncClient() as client:
         r = await client.post(
             f"{FB_GRAPH}/{page_id}/messages",
             params={"access_token": page_access_token},
-            json={"recipient": {"id": recipient_id}, "message": {"text": text}},
+            json={"recipient": {"id": recipient_id}, "message": _message_body(text, quick_replies)},
         )
         data = r.json()
         if r.status_code != 200:
-            print(f"❌ send_message failed: {data}")
+            logger.warning("send_message failed: %s", data, extra={"page_id": page_id})
         return data
 
 
+async def send_message_batch(
+    page_access_token: str,
+    page_id: str,
+    messages: list[tuple[str, str, list[dict] | None]],
+) -> list[dict]:
+    """
+    Send several (recipient_id, text, quick_replies) messages for one page
+    in a single Graph batch request. Returns one result dict per message, in order,
+    shaped like send_message()'s return value.
+    """
+    batch = [
+        {
+            "method": "POST",
+            "relative_url": f"{page_id}/messages",
+            "body": urlencode({
+                "recipient": json.dumps({"id": recipient_id}),
+                "message": json.dumps(_message_body(text, quick_replies)),
+            }),
+        }
+        for recipient_id, text, quick_replies in messages[:MAX_BATCH_SIZE]
+    ]
+    async with httpx.AsyncClient() as client:
+        r = await client.post(
+            f"{FB_GRAPH}/",
+            data={"access_token": page_access_token, "batch": json.dumps(batch)},
+        )
+        data = r.json()
+
+    # The whole batch was rejected (bad token, throttled, …) — every item gets the error
+    if r.status_code != 200 or not isinstance(data, list):
+        logger.warning("send_message_batch failed: %s", data, extra={"page_id": page_id})
+        return [data] * len(batch)
+
+    results = []
+    for item in data:
+        # Graph returns null for operations it did not get to run
+        if not item:
+            results.append({"error": {"message": "Batch item not executed", "is_transient": True}})
+            continue
+        try:
+            results.append(json.loads(item.get("body") or "{}"))
+        except ValueError:
+            results.append({"error": {"message": item.get("body"), "code": item.get("code")}})
+    return results
+
+
+def is_transient_error(result: dict) -> bool:
+    """True if a Send API error result is worth retrying."""
+    error = result.get("error")
+    if not error:
+        return False
+    return bool(error.get("is_transient")) or error.get("code") in TRANSIENT_ERROR_CODES
+
+
 async def get_conversations(page_access_token: str, page_id: str) -> dict:
     async with httpx.AsyncClient() as client:
         r = await client.get(
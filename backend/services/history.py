@@ -0,0 +1,50 @@
+"""
+services/history.py
+
+Lightweight conversation history shared by the reply pipeline, the AI call
+and lead extraction.
+
+The pipeline only ever needs (from_role, content, sent_at) per message, so it
+selects exactly those columns into HistoryTurn tuples instead of loading
+full ORM Message objects (instance state, identity map, relationships).
+The same list is handed to get_ai_reply() and to the lead detector.
+
+The whole session is kept in the reply context (state detection and the
+quick-reply handlers read it); only the LLM prompt is capped, at
+LLM_HISTORY_MAX_TURNS, by trim_history().
+"""
+
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+# A gap longer than this between two messages starts a new conversation session.
+# Shared with routes/analytics.py so session counts match what the bot sees.
+SESSION_GAP_SECONDS = 7200
+
+
+class HistoryTurn(NamedTuple):
+    from_role: str                   # "user" | "ai"
+    content: str
+    sent_at: Optional[datetime]      # None for turns rebuilt from the Graph API
+
+    @property
+    def llm_role(self) -> str:
+        return "user" if self.from_role == "user" else "assistant"
+
+
+def trim_history(history: list[HistoryTurn], max_turns: int) -> tuple[list[HistoryTurn], int]:
+    """
+    The most recent turns of a session to send to the LLM, and how many
+    older turns were left out. The cut moves in steps of half the window,
+    so the prompt keeps the same prefix (and provider cache hits) between
+    steps instead of changing on every turn. max_turns <= 0 disables it.
+    """
+    if max_turns <= 0 or len(history) <= max_turns:
+        return history, 0
+    step = max(1, max_turns // 2)
+    omitted = -(-(len(history) - max_turns) // step) * step
+    return history[omitted:], omitted
+
+
+def to_llm_messages(history: list[HistoryTurn]) -> list[dict]:
+    return [{"role": t.llm_role, "content": t.content} for t in history]
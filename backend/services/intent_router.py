@@ -0,0 +1,305 @@
+"""
+services/intent_router.py
+
+CPU-only stage in front of the reply LLM. Trivial customer messages —
+greetings, thanks, "ok", emoji, stickers — are answered from the page's
+reply templates instead of a 70B completion.
+
+Two layers decide whether a message is trivial:
+
+    rules  — anchored patterns on the normalised text ("hiii!!" → "hii")
+    model  — multinomial naive Bayes over hashed character n-grams,
+             trained per worker from the customer messages already in
+             the `messages` table, labelled by the rules above. It picks
+             up variants the rules miss ("thankss dai")
+             and is only trusted for short messages at high confidence,
+             with no digits, made only of words already seen with that
+             intent (letter runs ignored).
+
+A message is only answered locally while the customer is browsing and
+the bot's last message was not a question: "ok" after "Shall I place
+the order?" means yes, and that turn belongs to the LLM.
+
+Pages override or disable individual templates through
+pages.reply_templates (JSON object, intent → text; an empty string turns
+that intent off for the page).
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import select
+
+from config import get_settings
+from database import db_session
+from models import Message
+from services.history import HistoryTurn
+from services.scheduler import classify_state
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+DEFAULT_TEMPLATES = {
+    "greeting": "Hi! 👋 How can I help you today?",
+    "thanks": "You're welcome! 😊 Let me know if there's anything else I can help with.",
+    "ack": "👍",
+    "bye": "Thank you for visiting! Message us anytime. 👋",
+    # Not an intent: sent when a turn is deferred under LLM load (admission.py)
+    "holding": "Thanks for your message! We're a little busy — we'll reply in a moment. 🙏",
+}
+
+OTHER = "other"
+
+# Stored as the message text for sticker-only messages (FB sends no text)
+STICKER_TEXT = "[sticker]"
+
+# ── Rules ─────────────────────────────────────────────────────────────────────
+
+_RULES = [
+    ("greeting", re.compile(
+        r"^(hi+|hii+ya|hello+|hel+o+|hlo+|hey+|heya|yo|namaste|namaskar|"
+        r"good (morning|afternoon|evening))( there| all| sir| dai| didi)?$"
+    )),
+    ("thanks", re.compile(
+        r"^(thanks?|thank (you|u)|thanku|thx|thnx|tnx|ty|dhanyabad|dhanyawad)"
+        r"( (so|very) much| a lot| again| sir| dai| didi)?$"
+    )),
+    ("ack", re.compile(r"^(ok(ay|ey)?|okk|kk?|alright|sure|cool|nice|great|got it|noted)$")),
+    ("bye", re.compile(r"^(bye|byee|bye bye|good ?bye|see (you|u)( later)?|tata|gn|good night)$")),
+]
+
+# Emoji-only messages are an acknowledgement only when every symbol is one of
+# these; 😡 / 👎 / 😢 go to the LLM. Skin tones and variation selectors are ignored.
+_ACK_EMOJI = frozenset(
+    "👍👌👏🙏🙌💯✅✔☺😀😃😄😁😊🙂😉😍🥰😘😎🤗🤩😇❤🧡💛💚💙💜🤍💖💕💗🔥✨🎉🌹🌸"
+)
+_EMOJI_MODIFIERS = re.compile("[\ufe0f\u200d\U0001f3fb-\U0001f3ff]")
+_REPEATS = re.compile(r"(.)\1{2,}")
+_EDGE_PUNCT = re.compile(r"^[\s.,!~]+|[\s.,!~]+$")
+_WORD = re.compile(r"\w", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Lower-case, trim edge punctuation, squash long letter runs to two."""
+    text = _EDGE_PUNCT.sub("", text.lower())
+    text = _REPEATS.sub(r"\1\1", text)
+    return " ".join(text.split())
+
+
+def rule_intent(text: str) -> str | None:
+    """Intent from the anchored rules, or None."""
+    if text == STICKER_TEXT:
+        return "ack"
+    norm = normalize(text)
+    if not norm:
+        return None
+    if not _WORD.search(norm):
+        # Emoji / symbols only: a thumbs-up is an acknowledgement, an angry
+        # face or a bare "?" is not
+        symbols = _EMOJI_MODIFIERS.sub("", norm).replace(" ", "")
+        return "ack" if symbols and set(symbols) <= _ACK_EMOJI else None
+    for intent, pattern in _RULES:
+        if pattern.match(norm):
+            return intent
+    return None
+
+
+# ── Hashed n-gram naive Bayes ─────────────────────────────────────────────────
+
+_N_FEATURES = 1 << 18
+_NGRAM_SIZES = (2, 3, 4)
+
+
+_RUNS = re.compile(r"(.)\1+")
+_DIGIT = re.compile(r"\d")
+
+
+def _skeleton(word: str) -> str:
+    """A word with letter runs squashed to one: "hellooo" and "helo" match."""
+    return _RUNS.sub(r"\1", word)
+
+
+def _features(norm: str) -> Counter:
+    padded = f" {norm} "
+    return Counter(
+        zlib.crc32(padded[i:i + n].encode()) % _N_FEATURES
+        for n in _NGRAM_SIZES
+        for i in range(len(padded) - n + 1)
+    )
+
+
+class NgramModel:
+    """Multinomial naive Bayes with add-alpha smoothing. Immutable once fitted."""
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self.n_samples = 0
+        self._log_prior: dict[str, float] = {}
+        self._counts: dict[str, dict[int, int]] = {}
+        self._log_denominator: dict[str, float] = {}
+        # Word skeletons (see _skeleton) seen per label, for IntentRouter.classify
+        self.vocabulary: dict[str, frozenset[str]] = {}
+
+    @property
+    def labels(self) -> list[str]:
+        return list(self._log_prior)
+
+    def fit(self, samples: Iterable[tuple[str, str]]) -> "NgramModel":
+        docs: Counter = Counter()
+        totals: Counter = Counter()
+        words: dict[str, set[str]] = {}
+        for norm, label in samples:
+            words.setdefault(label, set()).update(_skeleton(w) for w in norm.split())
+            counts = self._counts.setdefault(label, {})
+            for f, c in _features(norm).items():
+                counts[f] = counts.get(f, 0) + c
+                totals[label] += c
+            docs[label] += 1
+        self.n_samples = sum(docs.values())
+        for label, n in docs.items():
+            self._log_prior[label] = math.log(n / self.n_samples)
+            self._log_denominator[label] = math.log(totals[label] + self.alpha * _N_FEATURES)
+        self.vocabulary = {label: frozenset(w) for label, w in words.items()}
+        return self
+
+    def predict(self, norm: str) -> tuple[str, float]:
+        """(label, posterior probability) for one normalised message."""
+        feats = _features(norm)
+        scores = {}
+        for label, prior in self._log_prior.items():
+            counts, denom = self._counts[label], self._log_denominator[label]
+            scores[label] = prior + sum(
+                c * (math.log(counts.get(f, 0) + self.alpha) - denom) for f, c in feats.items()
+            )
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        total = sum(math.exp(s - top) for s in scores.values())
+        return best, 1 / total
+
+
+# ── Router ────────────────────────────────────────────────────────────────────
+
+class Routed(NamedTuple):
+    intent: str
+    source: str     # "rule" | "model" | "sticker"
+    reply: str
+
+
+class IntentRouter:
+    def __init__(self, min_confidence: float, max_words: int):
+        self.min_confidence = min_confidence
+        self.max_words = max_words
+        self._model: NgramModel | None = None
+
+    def classify(self, text: str) -> tuple[str, str] | None:
+        """(intent, source) for a trivial message, else None."""
+        intent = rule_intent(text)
+        if intent:
+            return intent, "sticker" if text == STICKER_TEXT else "rule"
+        norm = normalize(text)
+        model = self._model
+        # "ok?" is a question, whatever it looks like to the model
+        if model is None or not norm or "?" in norm or len(norm.split()) > self.max_words:
+            return None
+        # Character n-grams latch onto "thank" / "hi" whatever follows, so
+        # "thanks i want 2" scores as thanks. Only trust the model when every
+        # word is one it has seen in messages the rules gave that intent.
+        if _DIGIT.search(norm):
+            return None
+        label, confidence = model.predict(norm)
+        if label == OTHER or confidence < self.min_confidence:
+            return None
+        known = model.vocabulary.get(label, frozenset())
+        if not all(_skeleton(w) in known for w in norm.split()):
+            return None
+        return label, "model"
+
+    def route(
+        self,
+        text: str,
+        history: tuple[HistoryTurn, ...],
+        templates: str | None,
+    ) -> Routed | None:
+        """Templated reply for this turn, or None to go to the LLM."""
+        if classify_state(history) != "browsing":
+            return None
+        last_ai = next((t for t in reversed(history) if t.from_role == "ai"), None)
+        if last_ai is not None and "?" in last_ai.content:
+            return None
+        found = self.classify(text)
+        if found is None:
+            return None
+        intent, source = found
+        reply = page_templates(templates).get(intent)
+        if not reply:
+            return None
+        return Routed(intent, source, reply)
+
+    def train(self, texts: Iterable[str]) -> NgramModel:
+        """Fit a fresh model from raw customer messages and swap it in."""
+        samples = []
+        for text in texts:
+            norm = normalize(text)
+            if norm:
+                samples.append((norm, rule_intent(text) or OTHER))
+        model = NgramModel().fit(samples)
+        # A model that never saw a trivial (or a non-trivial) message is useless
+        if len(model.labels) > 1:
+            self._model = model
+        return model
+
+
+def page_templates(raw: str | None) -> dict[str, str]:
+    """Defaults overlaid with the page's own templates."""
+    if not raw:
+        return DEFAULT_TEMPLATES
+    try:
+        custom = json.loads(raw)
+    except ValueError:
+        logger.warning("Ignoring malformed pages.reply_templates")
+        return DEFAULT_TEMPLATES
+    return {**DEFAULT_TEMPLATES, **{k: v for k, v in custom.items() if isinstance(v, str)}}
+
+
+async def train_from_messages(router: "IntentRouter", limit: int) -> int:
+    """Retrain on the latest `limit` customer messages. Returns the sample count."""
+    async with db_session() as db:
+        texts = (await db.execute(
+            select(Message.content)
+            .where(Message.from_role == "user")
+            .order_by(Message.id.desc())
+            .limit(limit)
+        )).scalars().all()
+    # Fitting is pure Python — keep it off the event loop
+    model = await asyncio.to_thread(router.train, texts)
+    return model.n_samples
+
+
+async def run_intent_training_loop() -> None:
+    """Background task started from main.lifespan."""
+    router = get_intent_router()
+    while True:
+        try:
+            n = await train_from_messages(router, settings.INTENT_TRAINING_LIMIT)
+            logger.info("Intent model trained on %s messages", n)
+        except Exception:
+            logger.exception("Intent model training failed")
+        await asyncio.sleep(settings.INTENT_RETRAIN_SECONDS)
+
+
+# ── Singleton ─────────────────────────────────────────────────────────────────
+
+_router: IntentRouter | None = None
+
+
+def get_intent_router() -> IntentRouter:
+    global _router
+    if _router is None:
+        _router = IntentRouter(settings.INTENT_MIN_CONFIDENCE, settings.INTENT_MAX_WORDS)
+    return _router
@@ -13,11 +13,15 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
 from datetime import datetime, timezone
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import SalesLead, User
+from services.events import publish_after_commit
+from services.history import HistoryTurn
+from services.llm_usage import record_llm_call
 
 logger = logging.getLogger(__name__)
 
@@ -47,19 +51,19 @@ Rules:
 """.strip()
 
 
-def _build_conversation_text(history: list[dict], latest_message: str) -> str:
-    lines = []
-    for msg in history:
-        role = "Customer" if msg["role"] == "user" else "Bot"
-        lines.append(f"{role}: {msg['content']}")
+def _build_conversation_text(history: list[HistoryTurn], latest_message: str) -> str:
+    lines = [
+        f"{'Customer' if turn.from_role == 'user' else 'Bot'}: {turn.content}"
+        for turn in history
+    ]
     lines.append(f"Customer: {latest_message}")
     return "\n".join(lines)
 
 
-def _fb_messages_to_history(fb_response: dict, page_id: str) -> list[dict]:
+def _fb_messages_to_history(fb_response: dict, page_id: str) -> list[HistoryTurn]:
     """
     Convert the Facebook Graph API response from get_conversation_messages()
-    into the same [{"role": ..., "content": ...}] format used throughout.
+    into the same HistoryTurn list the reply pipeline builds from the DB.
 
     The page itself is the "assistant" — any sender whose id matches page_id
     is the bot. Everyone else is the customer.
@@ -78,8 +82,8 @@ def _fb_messages_to_history(fb_response: dict, page_id: str) -> list[dict]:
         if not text:
             continue
         sender_id = msg.get("from", {}).get("id", "")
-        role = "assistant" if sender_id == page_id else "user"
-        history.append({"role": role, "content": text})
+        role = "ai" if sender_id == page_id else "user"
+        history.append(HistoryTurn(role, text, None))
 
     return history
 
@@ -88,7 +92,7 @@ async def _fetch_fb_history(
     page_access_token: str,
     conversation_id: str,
     page_id: str,
-) -> list[dict]:
+) -> list[HistoryTurn]:
     """
     Fetch the full conversation from Facebook and return it as a history list.
     Falls back to an empty list if the fetch fails so lead creation still works.
@@ -102,7 +106,7 @@ async def _fetch_fb_history(
         return []
 
 
-def _merge_histories(fb_history: list[dict], db_history: list[dict]) -> list[dict]:
+def _merge_histories(fb_history: list[HistoryTurn], db_history: list[HistoryTurn]) -> list[HistoryTurn]:
     """
     Merge FB and DB histories, preferring FB as the source of truth.
 
@@ -118,13 +122,14 @@ async def create_lead_from_confirmed_order(
     db: AsyncSession,
     page_id: str,
     user_id: int,
-    history: list[dict],
+    history: list[HistoryTurn],
     latest_message: str,
     *,
     page_access_token: str | None = None,
     conversation_id: str | None = None,
     groq_api_key: str | None = None,
     groq_model: str = "llama-3.3-70b-versatile",
+    details: dict | None = None,
 ) -> SalesLead:
     """
     Called exactly once when the customer confirms an order.
@@ -133,7 +138,14 @@ async def create_lead_from_confirmed_order(
     conversation_id are provided) for richer context, falls back to the
     DB history slice passed in from messenger.py, then extracts structured
     order details and creates a confirmed SalesLead row.
+
+    When the caller already has the details (parsed from the order summary
+    the customer confirmed with a quick reply), both the FB fetch and the
+    extraction LLM call are skipped.
     """
+    if details is not None:
+        return await _save_lead(db, page_id, user_id, latest_message, details)
+
     # -- Fetch FB conversation for richer context -----------------------------
     if page_access_token and conversation_id:
         fb_history = await _fetch_fb_history(
@@ -154,11 +166,22 @@ async def create_lead_from_confirmed_order(
             latest_message=latest_message,
             groq_api_key=groq_api_key,
             groq_model=groq_model,
+            page_id=page_id,
         )
     except Exception:
         logger.exception("Order detail extraction failed — creating lead with nulls")
         details = {}
 
+    return await _save_lead(db, page_id, user_id, latest_message, details)
+
+
+async def _save_lead(
+    db: AsyncSession,
+    page_id: str,
+    user_id: int,
+    latest_message: str,
+    details: dict,
+) -> SalesLead:
     # ── Create the lead ───────────────────────────────────────────────────────
     lead = SalesLead(
         page_id=page_id,
@@ -189,6 +212,17 @@ async def create_lead_from_confirmed_order(
 
     await db.flush()
 
+    publish_after_commit(db, "lead", page_id, {
+        "id": lead.id,
+        "order_ref_id": lead.order_ref_id,
+        "user_id": user_id,
+        "status": lead.status,
+        "phone_number": lead.phone_number,
+        "delivery_address": lead.delivery_address,
+        "product_interest": lead.product_interest,
+        "detected_at": lead.detected_at.isoformat(),
+    })
+
     logger.info(
         "✅ New confirmed order %s created — user_id=%s product=%r name=%r",
         lead.order_ref_id, user_id,
@@ -202,20 +236,25 @@ async def create_lead_from_confirmed_order(
 def _get_groq_client(api_key: str | None = None):
     from groq import Groq
     from config import get_settings
-    return Groq(api_key=api_key or get_settings().GROQ_API_KEY)
+    settings = get_settings()
+    return Groq(
+        api_key=api_key or settings.GROQ_API_KEY,
+        base_url=settings.GROQ_BASE_URL or None,
+    )
 
 
 async def _extract_order_details(
-    history: list[dict],
+    history: list[HistoryTurn],
     latest_message: str,
     groq_api_key: str | None,
     groq_model: str,
+    page_id: str | None = None,
 ) -> dict:
     client = _get_groq_client(groq_api_key)
     conversation_text = _build_conversation_text(history, latest_message)
 
-    def _sync_call() -> str:
-        response = client.chat.completions.create(
+    def _sync_call():
+        return client.chat.completions.create(
             model=groq_model,
             temperature=0,
             max_tokens=300,
@@ -230,10 +269,17 @@ async def _extract_order_details(
                 },
             ],
         )
-        return response.choices[0].message.content or "{}"
 
-    raw = await asyncio.get_event_loop().run_in_executor(None, _sync_call)
-    raw = raw.strip()
+    # Recorded here, back on the event loop — the usage buffer is not thread-safe
+    usage = {"page_id": page_id, "model": groq_model}
+    t0 = time.perf_counter()
+    try:
+        response = await asyncio.get_event_loop().run_in_executor(None, _sync_call)
+    except Exception:
+        record_llm_call("extraction", None, time.perf_counter() - t0, outcome="error", **usage)
+        raise
+    record_llm_call("extraction", response, time.perf_counter() - t0, **usage)
+    raw = (response.choices[0].message.content or "{}").strip()
 
     if raw.startswith("```"):
         raw = raw.split("```")[1]
@@ -0,0 +1,140 @@
+"""
+services/llm_usage.py
+
+Per-call LLM accounting: every reply / extraction completion becomes one
+row in llm_calls (page, call site, model, tokens, latency, outcome), so
+cost and latency can be broken down by page and prompt in SQL.
+
+Rows are not written on the request path. record_llm_call() appends to an
+in-process buffer; a background task started from main.lifespan inserts
+the buffer as one multi-row INSERT every LLM_USAGE_FLUSH_SECONDS, or as
+soon as LLM_USAGE_BATCH_SIZE rows are waiting. The buffer is bounded —
+if the database is unreachable for long, the oldest rows are dropped
+(counted in llm_usage_rows_total{result="dropped"}) rather than growing
+without limit. A worker that dies loses at most one flush interval.
+
+Prometheus metrics (llm_call_seconds, llm_tokens_total) are updated
+synchronously as before.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from config import get_settings
+from database import db_session
+from models import LlmCall
+from services.metrics import LLM_USAGE_ROWS, record_llm_usage
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def record_llm_call(
+    call_site: str,
+    response,
+    seconds: float,
+    *,
+    page_id: str | None,
+    model: str,
+    outcome: str = "ok",
+    prompt_version: int | None = None,
+) -> None:
+    """Record one completion (response=None for a failed call). Never raises."""
+    if response is not None:
+        record_llm_usage(call_site, response, seconds)
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    get_llm_call_writer().add({
+        "created_at": datetime.now(timezone.utc),
+        "page_id": page_id,
+        "call_site": call_site,
+        "model": model,
+        "prompt_version": prompt_version,
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "latency_ms": round(seconds * 1000),
+        "outcome": outcome,
+    })
+
+
+class LlmCallWriter:
+    def __init__(self, batch_size: int, flush_seconds: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._buffer: deque[dict] = deque(maxlen=max_buffer)
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    def add(self, row: dict) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            LLM_USAGE_ROWS.inc(result="dropped")
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Insert everything buffered so far. Returns the rows written."""
+        if not self._buffer:
+            return 0
+        rows = list(self._buffer)
+        self._buffer.clear()
+        try:
+            async with db_session() as db:
+                await db.execute(insert(LlmCall), rows)
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to write %s llm_calls rows — will retry", len(rows))
+            # Put them back in front of anything recorded meanwhile, oldest dropped first
+            pending = rows + list(self._buffer)
+            overflow = max(0, len(pending) - self._buffer.maxlen)
+            if overflow:
+                LLM_USAGE_ROWS.inc(overflow, result="dropped")
+            self._buffer = deque(pending[overflow:], maxlen=self._buffer.maxlen)
+            return 0
+        LLM_USAGE_ROWS.inc(len(rows), result="written")
+        return len(rows)
+
+    async def run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Write what is left and end the background task (never mid-insert)."""
+        self._stopping = True
+        self._wake.set()
+        if self._task:
+            await self._task
+            self._task = None
+        else:
+            await self.flush()
+
+
+# ── Singleton ─────────────────────────────────────────────────────────────────
+
+_writer: LlmCallWriter | None = None
+
+
+def get_llm_call_writer() -> LlmCallWriter:
+    global _writer
+    if _writer is None:
+        _writer = LlmCallWriter(
+            settings.LLM_USAGE_BATCH_SIZE,
+            settings.LLM_USAGE_FLUSH_SECONDS,
+            settings.LLM_USAGE_MAX_BUFFER,
+        )
+    return _writer
@@ -5,192 +5,565 @@ Lead creation happens ONLY when the AI confirms an order (order_confirmed=True).
 Every other message is just a normal AI conversation — no lead detection runs.
 """
 
-from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import Page, User, Message, Log, SalesLead
-from services.facebook import send_message
-from services.ai_service import get_ai_reply, strip_confirmation_tag
+from config import get_settings
+from database import db_session
+from models import ConversationSession, User, Message, Log, SalesLead
+from services.send_queue import get_send_queue
+from services.catalog import CatalogHit, get_catalog_indexes
+from services.admission import DeferredTurn, get_admission_controller, get_deferred_turns
+from services.ai_service import (
+    LLM_UNAVAILABLE_TEXT,
+    LLMUnavailable,
+    ORDER_CONFIRM_PAYLOAD,
+    ORDER_CONFIRMED_TEXT,
+    ORDER_EDIT_PAYLOAD,
+    ORDER_EDIT_TEXT,
+    get_ai_reply,
+    parse_order_summary,
+    reply_quick_replies,
+    strip_confirmation_tag,
+)
 from services.lead_detector import create_lead_from_confirmed_order
+from services.history import HistoryTurn
+from services.metrics import (
+    AUTO_BLOCKS,
+    DETERMINISTIC_REPLIES,
+    INTENT_BYPASSES,
+    LLM_DEFER_OUTCOMES,
+    LLM_SECONDS_SAVED,
+    LLM_SHED_TURNS,
+    ORDER_LLM_CALLS,
+    ORDER_TURNS,
+    PIPELINE_MESSAGES,
+    PIPELINE_STAGE_SECONDS,
+    RATE_LIMITED,
+    stage,
+)
+from services.intent_router import STICKER_TEXT, get_intent_router, page_templates
+from services.rate_limit import get_inbound_limiter
+from services.scheduler import classify_state, get_llm_gate
+from services.events import publish_after_commit
+from services.context import ReplyContext, load_reply_context
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 async def handle_incoming_message(
-    db: AsyncSession,
     sender_id: str,
     page_id: str,
     fb_message_id: str | None,
     message_text: str | None,
     log_id: int | None = None,
     conversation_id: str | None = None,   # FB conversation ID for richer extraction
+    payload: str | None = None,           # quick-reply / postback payload, if any
 ):
+    """
+    Runs as a sequence of short transactions around the slow network calls,
+    so no pooled connection is held while waiting on Groq or Graph:
+
+        A. load context (one query), store the incoming message
+           in the current conversation session                    → commit
+           LLM call (no connection)
+        B. store the reply as an outbox row (status="queued"),
+           claimed by this run (claimed_at)                       → commit
+           Send API call (no connection)
+        C. record the send result, mark the log processed         → commit
+           lead extraction (no connection), then its writes       → commit
+
+    If the worker dies between B and C, the redrive loop takes the queued
+    row over once the claim is stale and delivers it; C only records a
+    result while the row is still this run's. When the LLM is saturated the turn stops after
+    A with a holding message and is answered later by run_deferred_loop().
+    """
+    turn = DeferredTurn(
+        sender_id, page_id, fb_message_id, message_text, log_id, conversation_id, payload
+    )
     try:
-        # ── 1. Load page ──────────────────────────────────────────────────────
-        page: Page | None = await db.get(Page, page_id)
-        if not page or not page.is_active:
-            print(f"⏭️  Page {page_id} not found or inactive — skipping")
-            await _mark_log(db, log_id, processed=True, error="Page inactive or not found")
+        # ── A. Record the inbound message and load context ───────────────────
+        async with db_session() as db:
+            ctx = await _record_incoming(
+                db, sender_id, page_id, fb_message_id, message_text, log_id
+            )
+        if ctx is None:
             return
+        await _answer(ctx, turn)
 
-        # ── 2. Upsert user ────────────────────────────────────────────────────
-        result = await db.execute(
-            select(User).where(User.user_id == sender_id, User.page_id == page_id)
-        )
-        user: User | None = result.scalar_one_or_none()
-        if not user:
-            user = User(user_id=sender_id, page_id=page_id)
-            db.add(user)
+    except Exception as e:
+        await _pipeline_failed(turn, e)
 
-        user.last_seen = datetime.now(timezone.utc)
-        await db.flush()
 
-        # ── 3. Save incoming message ──────────────────────────────────────────
-        if message_text:
-            db.add(Message(
-                fb_message_id=fb_message_id,
-                page_id=page_id,
-                user_id=user.id,
-                from_role="user",
-                content=message_text,
-                status="received",
-            ))
-
-        # ── 4. Early exits ────────────────────────────────────────────────────
-        if user.is_blocked:
-            print(f"🚫 User {sender_id} is blocked")
-            await _mark_log(db, log_id, processed=True, error="User blocked")
-            await db.commit()
-            return
+async def _answer(ctx: ReplyContext, turn: DeferredTurn) -> None:
+    """Everything after A: reply, outbox, send, result, lead."""
+    page_id, sender_id = turn.page_id, turn.sender_id
+    # A conversation with a turn already waiting keeps its place in line:
+    # answering a later "ok" from a template would strand the earlier question
+    waiting = get_deferred_turns().has(page_id, sender_id) and turn.attempts == 0
 
-        if not message_text:
-            await _mark_log(db, log_id, processed=True)
+    # ── 6. Confirm / Edit taps on an order summary — no LLM call ─────────
+    answer = None if waiting else _quick_reply_answer(turn.payload, ctx.history)
+    if answer:
+        DETERMINISTIC_REPLIES.inc(payload=turn.payload)
+    elif not waiting:
+        # ── 6b. Greetings, thanks, "ok", emoji, stickers — no LLM call ───
+        answer = _local_answer(ctx, turn.message_text)
+    if not answer and turn.message_text == STICKER_TEXT:
+        # A sticker with no template reply is stored and left there: the LLM
+        # would read a 👍 after an order summary as YES
+        PIPELINE_MESSAGES.inc(outcome="sticker_ignored")
+        async with db_session() as db:
+            await _mark_log(db, turn.log_id, processed=True)
             await db.commit()
+        return
+    if answer:
+        clean_reply, order_details = answer
+        order_confirmed = order_details is not None
+    else:
+        order_details = None
+        # ── 6c. Generate AI reply, unless admission control defers it ─────
+        raw_reply = await _llm_reply(ctx, turn, waiting)
+        if raw_reply is None:
             return
 
-        # -- 5. Fetch conversation history -----------------------------------
-        # Pull last 30, find the most recent confirmed order in the DB, and
-        # only pass messages AFTER that point. This prevents the AI from seeing
-        # a previous confirmed order and re-triggering confirmation.
-        # Also resets on a 2+ hour gap between messages.
-        from datetime import timedelta
-        history_result = await db.execute(
-            select(Message)
-            .where(Message.user_id == user.id, Message.page_id == page_id)
-            .order_by(Message.sent_at.desc())
-            .limit(30)
-        )
-        all_msgs = list(reversed(history_result.scalars().all()))
-
-        # Find the most recent confirmed lead for this user — use its timestamp
-        # as the hard session boundary so the AI never sees pre-confirmation chat.
-        last_lead_result = await db.execute(
-            select(SalesLead)
-            .where(SalesLead.user_id == user.id, SalesLead.page_id == page_id)
-            .order_by(SalesLead.detected_at.desc())
-            .limit(1)
-        )
-        last_lead = last_lead_result.scalar_one_or_none()
-        last_confirmed_at = last_lead.detected_at if last_lead else None
-
-        session_start = 0
-        for i in range(len(all_msgs) - 1, 0, -1):
-            gap = (all_msgs[i].sent_at - all_msgs[i - 1].sent_at).total_seconds()
-            # Hard boundary: don't include messages from before the last confirmed order
-            if last_confirmed_at and all_msgs[i - 1].sent_at <= last_confirmed_at:
-                session_start = i
-                break
-            # Soft boundary: 2+ hour gap means a new session
-            if gap > 7200:
-                session_start = i
-                break
-
-        history = [
-            {
-                "role": "user" if m.from_role == "user" else "assistant",
-                "content": m.content,
-            }
-            for m in all_msgs[session_start:]
-        ]
-
-        # ── 6. Generate AI reply ───────────────────────────────────────────────
-        raw_reply = await get_ai_reply(
-            message=message_text,
-            instructions=page.ai_instructions,
-            history=history,
-        )
-
-        # ── 7. Check for order confirmation tag ───────────────────────────────
+        # ── 7. Check for order confirmation tag ───────────────────────────
         clean_reply, order_confirmed = strip_confirmation_tag(raw_reply)
 
         if not clean_reply:
             clean_reply = "Sorry, I could not generate a reply."
 
-        # ── 8. Send reply ─────────────────────────────────────────────────────
-        send_result = await send_message(
-            page.access_token, page_id, sender_id, clean_reply
+    # Order summaries go out with Confirm / Edit buttons
+    quick_replies = reply_quick_replies(clean_reply)
+
+    # ── B. Outbox: store the reply before sending it ──────────────────────
+    with stage("commit"):
+        async with db_session() as db:
+            outbox = Message(
+                page_id=page_id,
+                user_id=ctx.user_id,
+                session_id=ctx.session_id,
+                from_role="ai",
+                content=clean_reply,
+                status="queued",
+                claimed_at=datetime.now(timezone.utc),
+            )
+            db.add(outbox)
+            if order_confirmed and await _recent_lead_exists(db, ctx.user_id, page_id):
+                # Duplicate webhook fire for an order we already recorded
+                logger.warning("Duplicate order confirmation ignored", extra={"user_id": ctx.user_id})
+                order_confirmed = False
+            # A confirmed order closes the session; the next message starts fresh
+            await _touch_session(db, ctx.session_id, close=order_confirmed)
+            await db.commit()
+
+    # ── 8. Send reply (rate-limited + retried by the send queue) ──────────
+    with stage("fb_send"):
+        send_result = await get_send_queue().send(
+            ctx.access_token, page_id, sender_id, clean_reply, quick_replies
         )
-        status = "sent" if "message_id" in send_result else "failed"
+    status = "sent" if "message_id" in send_result else "failed"
+
+    # ── C. Record the result and mark the log processed ──────────────────
+    with stage("commit"):
+        async with db_session() as db:
+            await db.execute(
+                update(Message)
+                .where(Message.id == outbox.id, Message.status == "queued")
+                .values(status=status, fb_message_id=send_result.get("message_id"))
+            )
+            await _mark_log(db, turn.log_id, processed=True)
+            publish_after_commit(db, "reply", page_id, {
+                "sender_id": sender_id,
+                "reply_to": turn.fb_message_id,
+                "ai_reply": clean_reply,
+                "ai_status": status,
+            })
+            await db.commit()
+
+    # -- 11. Create lead ONLY on confirmed orders --------------------------
+    if order_confirmed:
+        _observe_order_turns(ctx, llm_called=answer is None)
+        await _create_lead(ctx, page_id, turn.message_text, turn.conversation_id, order_details)
+
+    if turn.attempts:
+        LLM_DEFER_OUTCOMES.inc(outcome="answered")
+    PIPELINE_MESSAGES.inc(outcome="replied" if status == "sent" else "send_failed")
+    logger.info(
+        "Reply %s", status,
+        extra={"sender_id": sender_id, "page_id": page_id, "sampled": True},
+    )
+
+
+async def _pipeline_failed(turn: DeferredTurn, error: Exception) -> None:
+    logger.exception("Pipeline failed", extra={"sender_id": turn.sender_id, "page_id": turn.page_id})
+    PIPELINE_MESSAGES.inc(outcome="error")
+    async with db_session() as db:
+        await _mark_log(db, turn.log_id, processed=False, error=str(error))
+        await db.commit()
+
+
+# ── Admission control / deferred turns ────────────────────────────────────────
+
+async def _llm_reply(ctx: ReplyContext, turn: DeferredTurn, waiting: bool) -> str | None:
+    """
+    The raw LLM reply for this turn, or None when the turn was deferred.
+    A deferred turn past LLM_DEFER_MAX_SECONDS is attempted regardless and,
+    if the provider still fails, answered with the apology text.
+    """
+    admission = get_admission_controller()
+    state = classify_state(ctx.history)
+    overdue = turn.attempts > 0 and get_deferred_turns().expired(turn)
+    if waiting:
+        reason = "waiting"
+    elif overdue:
+        reason = None
+    else:
+        reason = admission.shed_reason(state)
+
+    if reason is None:
+        # Under saturation, turns that complete an order get LLM slots first
+        try:
+            async with get_llm_gate().slot(state):
+                t0 = time.perf_counter()
+                with stage("llm_call"):
+                    raw_reply = await get_ai_reply(
+                        message=turn.message_text,
+                        instructions=ctx.ai_instructions,
+                        history=ctx.history,
+                        remembered=ctx.remembered_contact,
+                        products=ctx.products,
+                        page_id=turn.page_id,
+                    )
+            admission.record_success(time.perf_counter() - t0)
+            return raw_reply
+        except LLMUnavailable:
+            admission.record_failure()
+            if overdue:
+                LLM_DEFER_OUTCOMES.inc(outcome="gave_up")
+                return LLM_UNAVAILABLE_TEXT
+            reason = "provider_errors"
+
+    await _defer(ctx, turn, reason)
+    return None
+
+
+async def _defer(ctx: ReplyContext, turn: DeferredTurn, reason: str) -> None:
+    """Park the turn for a retry; the first deferral in a conversation gets the holding message."""
+    deferred = get_deferred_turns()
+    # Retries pop the turn before re-parking it, so has() alone would re-send
+    # the holding message on every backoff step
+    first_in_conversation = turn.attempts == 0 and not deferred.has(turn.page_id, turn.sender_id)
+    try:
+        replaced = deferred.park(turn)
+    except OverflowError:
+        LLM_DEFER_OUTCOMES.inc(outcome="dropped")
+        PIPELINE_MESSAGES.inc(outcome="shed_dropped")
+        logger.error("Deferred turn queue full — turn dropped", extra={"page_id": turn.page_id})
+        async with db_session() as db:
+            await _mark_log(db, turn.log_id, processed=True, error="LLM saturated, deferred queue full")
+            await db.commit()
+        return
+
+    LLM_SHED_TURNS.inc(reason=reason)
+    if turn.attempts == 1:
+        PIPELINE_MESSAGES.inc(outcome="deferred")
+    if replaced is not None:
+        # The newer turn answers for both; its history includes this message
+        LLM_DEFER_OUTCOMES.inc(outcome="superseded")
+        async with db_session() as db:
+            await _mark_log(db, replaced.log_id, processed=True)
+            await db.commit()
+
+    holding = page_templates(ctx.reply_templates).get("holding")
+    if first_in_conversation and holding:
+        # Not stored as a Message: the retried turn's prompt and state
+        # detection should see the conversation as it was
+        with stage("fb_send"):
+            await get_send_queue().send(ctx.access_token, turn.page_id, turn.sender_id, holding)
+    logger.info(
+        "Reply deferred (%s)", reason,
+        extra={"sender_id": turn.sender_id, "page_id": turn.page_id, "sampled": True},
+    )
+
+
+async def _retry_turn(turn: DeferredTurn) -> None:
+    """Reload the conversation and answer a deferred turn."""
+    try:
+        async with db_session() as db:
+            ctx = await load_reply_context(db, turn.page_id, turn.sender_id)
+            history = ctx.history if ctx else ()
+            if (
+                ctx is None or not ctx.page_active or ctx.is_blocked
+                or not history or history[-1].from_role != "user"
+            ):
+                # Page switched off, customer blocked, or already answered
+                LLM_DEFER_OUTCOMES.inc(outcome="superseded")
+                await _mark_log(db, turn.log_id, processed=True)
+                await db.commit()
+                return
+            # The stored message is this turn's; the LLM gets it separately
+            ctx = replace(ctx, history=history[:-1])
+            ctx = replace(ctx, products=await _search_catalog(db, ctx, turn.message_text))
+        await _answer(ctx, turn)
+    except Exception as e:
+        await _pipeline_failed(turn, e)
+
+
+_retry_tasks: set[asyncio.Task] = set()
+_DEFERRED_POLL_SECONDS = 1.0
 
-        # ── 9. Save outgoing message ──────────────────────────────────────────
+
+async def run_deferred_loop() -> None:
+    """Background task started from main.lifespan."""
+    deferred = get_deferred_turns()
+    while True:
+        await asyncio.sleep(_DEFERRED_POLL_SECONDS)
+        for turn in deferred.pop_due():
+            task = asyncio.create_task(_retry_turn(turn))
+            _retry_tasks.add(task)
+            task.add_done_callback(_retry_tasks.discard)
+
+
+async def _record_incoming(
+    db: AsyncSession,
+    sender_id: str,
+    page_id: str,
+    fb_message_id: str | None,
+    message_text: str | None,
+    log_id: int | None,
+) -> ReplyContext | None:
+    """
+    Transaction A. Loads the reply context in one round trip, then stores
+    the incoming message. Returns None when the pipeline stops here (the
+    early exits below commit their own bookkeeping).
+    """
+    # ── 1. Page, user, session history — one query ────────────────────────
+    with stage("context_load"):
+        ctx = await load_reply_context(db, page_id, sender_id)
+    if ctx is None or not ctx.page_active:
+        logger.info("Page not found or inactive — skipping", extra={"page_id": page_id})
+        PIPELINE_MESSAGES.inc(outcome="page_inactive")
+        await _mark_log(db, log_id, processed=True, error="Page inactive or not found")
+        await db.commit()
+        return None
+
+    # ── 2. Upsert user ────────────────────────────────────────────────────
+    now = datetime.now(timezone.utc)
+    with stage("user_upsert"):
+        if ctx.user_id is None:
+            user = User(user_id=sender_id, page_id=page_id, last_seen=now)
+            db.add(user)
+            await db.flush()
+            ctx = replace(ctx, user_id=user.id)
+        else:
+            await db.execute(update(User).where(User.id == ctx.user_id).values(last_seen=now))
+
+    # ── 3. Save incoming message into the current session ─────────────────
+    if message_text:
+        if ctx.session_id is None:
+            session = ConversationSession(
+                page_id=page_id, user_id=ctx.user_id,
+                started_at=now, last_message_at=now, message_count=1,
+            )
+            db.add(session)
+            await db.flush()
+            ctx = replace(ctx, session_id=session.id)
+        else:
+            await _touch_session(db, ctx.session_id)
         db.add(Message(
-            fb_message_id=send_result.get("message_id"),
+            fb_message_id=fb_message_id,
             page_id=page_id,
-            user_id=user.id,
-            from_role="ai",
-            content=clean_reply,
-            status=status,
+            user_id=ctx.user_id,
+            session_id=ctx.session_id,
+            from_role="user",
+            content=message_text,
+            status="received",
         ))
+        publish_after_commit(db, "message", page_id, {
+            "sender_id": sender_id,
+            "recipient_id": page_id,
+            "message_id": fb_message_id,
+            "message_text": message_text,
+            "timestamp": int(now.timestamp() * 1000),
+        })
+
+    # ── 4. Early exits ────────────────────────────────────────────────────
+    if ctx.is_blocked:
+        logger.info("User is blocked", extra={"sender_id": sender_id, "page_id": page_id})
+        PIPELINE_MESSAGES.inc(outcome="blocked")
+        await _mark_log(db, log_id, processed=True, error="User blocked")
+        await db.commit()
+        return None
 
-        # ── 10. Mark log processed ────────────────────────────────────────────
+    if ctx.temporarily_blocked:
+        PIPELINE_MESSAGES.inc(outcome="temp_blocked")
+        await _mark_log(db, log_id, processed=True, error="User temporarily blocked")
+        await db.commit()
+        return None
+
+    if not message_text:
+        PIPELINE_MESSAGES.inc(outcome="no_text")
         await _mark_log(db, log_id, processed=True)
+        await db.commit()
+        return None
 
-        # -- 11. Create lead ONLY on confirmed orders --------------------------
-        # Deduplication guard: if a confirmed lead already exists for this user
-        # in the last 60 seconds, skip creation — it's a duplicate webhook fire.
-        if order_confirmed:
-            from datetime import timedelta
-            recent_cutoff = datetime.now(timezone.utc) - timedelta(seconds=60)
-            dup_result = await db.execute(
-                select(SalesLead)
-                .where(
-                    SalesLead.user_id == user.id,
-                    SalesLead.page_id == page_id,
-                    SalesLead.detected_at >= recent_cutoff,
-                )
-                .limit(1)
+    # ── 4b. Rate limits — before the LLM call ────────────────────────────
+    limiter = get_inbound_limiter()
+    limited_by = limiter.check(page_id, sender_id)
+    if limited_by:
+        RATE_LIMITED.inc(scope=limited_by)
+        PIPELINE_MESSAGES.inc(outcome="rate_limited")
+        error = f"Rate limited ({limited_by})"
+        if limited_by == "user" and limiter.record_violation(page_id, sender_id):
+            await db.execute(
+                update(User)
+                .where(User.id == ctx.user_id)
+                .values(blocked_until=now + timedelta(seconds=settings.AUTO_BLOCK_SECONDS))
             )
-            if dup_result.scalar_one_or_none():
-                print(f"⚠️  Duplicate order confirmation ignored for user {user.id}")
-                order_confirmed = False
+            AUTO_BLOCKS.inc()
+            error = "Rate limited (user) — temporarily blocked"
+            logger.warning(
+                "User auto-blocked for %ss after repeated rate-limit violations",
+                settings.AUTO_BLOCK_SECONDS,
+                extra={"sender_id": sender_id, "page_id": page_id},
+            )
+        await _mark_log(db, log_id, processed=True, error=error)
+        await db.commit()
+        return None
+
+    # ── 5. Catalog products relevant to this turn ─────────────────────────
+    ctx = replace(ctx, products=await _search_catalog(db, ctx, message_text))
+
+    await db.commit()
+    return ctx
 
-        if order_confirmed:
-            try:
+
+async def _search_catalog(
+    db: AsyncSession, ctx: ReplyContext, message_text: str
+) -> tuple[CatalogHit, ...]:
+    # The previous customer message keeps follow-ups ("how much is it?") on topic
+    previous = next((t.content for t in reversed(ctx.history) if t.from_role == "user"), "")
+    with stage("catalog_search"):
+        products = await get_catalog_indexes().search(
+            db, ctx.page_id, f"{message_text} {previous}", settings.CATALOG_TOP_K
+        )
+    return tuple(products)
+
+
+def _observe_order_turns(ctx: ReplyContext, llm_called: bool) -> None:
+    """How long the session took to reach a confirmed order."""
+    returning = "yes" if ctx.remembered_contact else "no"
+    # Every AI turn in the session so far was one reply LLM call (templated
+    # answers excepted, which is close enough for the trend)
+    ai_turns = sum(1 for t in ctx.history if t.from_role == "ai")
+    user_turns = len(ctx.history) - ai_turns
+    ORDER_TURNS.observe(user_turns + 1, returning=returning)
+    ORDER_LLM_CALLS.observe(ai_turns + int(llm_called), returning=returning)
+
+
+def _quick_reply_answer(
+    payload: str | None,
+    history: tuple[HistoryTurn, ...],
+) -> tuple[str, dict | None] | None:
+    """
+    Templated answer for a Confirm / Edit tap: (reply, order details on
+    confirm). None when there is no payload, or when the bot's last message
+    in this session is not an order summary (a stale tap) — the LLM then
+    handles the tap's text like any other message.
+    """
+    if payload not in (ORDER_CONFIRM_PAYLOAD, ORDER_EDIT_PAYLOAD):
+        return None
+    last_ai = next((t for t in reversed(history) if t.from_role == "ai"), None)
+    summary = parse_order_summary(last_ai.content) if last_ai else None
+    if summary is None:
+        return None
+    if payload == ORDER_CONFIRM_PAYLOAD:
+        return ORDER_CONFIRMED_TEXT, summary
+    return ORDER_EDIT_TEXT, None
+
+
+def _local_answer(ctx: ReplyContext, message_text: str) -> tuple[str, None] | None:
+    """Page template reply for a trivial message, via the local intent router."""
+    if not settings.INTENT_ROUTER_ENABLED:
+        return None
+    with stage("intent_route"):
+        routed = get_intent_router().route(message_text, ctx.history, ctx.reply_templates)
+    if routed is None:
+        return None
+    INTENT_BYPASSES.inc(intent=routed.intent, source=routed.source)
+    LLM_SECONDS_SAVED.inc(PIPELINE_STAGE_SECONDS.mean(stage="llm_call"))
+    return routed.reply, None
+
+
+async def _touch_session(db: AsyncSession, session_id: int, close: bool = False) -> None:
+    """Count one more message in the session; optionally close it."""
+    now = datetime.now(timezone.utc)
+    values = {
+        "last_message_at": now,
+        "message_count": ConversationSession.message_count + 1,
+    }
+    if close:
+        values.update(order_confirmed=True, closed_at=now)
+    await db.execute(
+        update(ConversationSession).where(ConversationSession.id == session_id).values(**values)
+    )
+
+
+async def _recent_lead_exists(db: AsyncSession, user_id: int, page_id: str) -> bool:
+    """Deduplication guard: a lead for this user in the last 60 seconds."""
+    recent_cutoff = datetime.now(timezone.utc) - timedelta(seconds=60)
+    result = await db.execute(
+        select(SalesLead.id)
+        .where(
+            SalesLead.user_id == user_id,
+            SalesLead.page_id == page_id,
+            SalesLead.detected_at >= recent_cutoff,
+        )
+        .limit(1)
+    )
+    return result.first() is not None
+
+
+async def _create_lead(
+    ctx: ReplyContext,
+    page_id: str,
+    message_text: str,
+    conversation_id: str | None,
+    details: dict | None = None,
+) -> None:
+    # The session only checks out a connection at the first flush, after the
+    # FB conversation fetch and extraction LLM call inside have finished.
+    # With details from a confirmed summary, neither of those runs.
+    try:
+        with stage("lead_extraction"):
+            async with db_session() as db:
                 lead = await create_lead_from_confirmed_order(
                     db=db,
                     page_id=page_id,
-                    user_id=user.id,
-                    history=history,
+                    user_id=ctx.user_id,
+                    history=ctx.history,
                     latest_message=message_text,
-                    page_access_token=page.access_token,
+                    page_access_token=ctx.access_token,
                     conversation_id=conversation_id,
+                    details=details,
                 )
-                print(
-                    f"🛒 Order confirmed → {lead.order_ref_id} | "
-                    f"{lead.product_interest} | {lead.customer_name} | {lead.phone_number}"
-                )
-            except Exception as e:
-                # Never let lead creation break the reply pipeline
-                print(f"⚠️  Lead creation error (non-fatal): {e}")
-
-        await db.commit()
-        print(f"✅ Reply sent to {sender_id}: {clean_reply[:80]}…")
-
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        await _mark_log(db, log_id, processed=False, error=str(e))
-        await db.commit()
+                await db.commit()
+        logger.info(
+            "Order confirmed → %s | %s",
+            lead.order_ref_id, lead.product_interest,
+            extra={"page_id": page_id, "user_id": ctx.user_id},
+        )
+    except Exception:
+        # Never let lead creation break the reply pipeline
+        logger.exception("Lead creation error (non-fatal)", extra={"user_id": ctx.user_id})
 
 
 async def _mark_log(
@@ -204,4 +577,4 @@ async def _mark_log(
     log: Log | None = await db.get(Log, log_id)
     if log:
         log.is_processed = processed
-        log.error = error
\ No newline at end of file
+        log.error = error
@@ -0,0 +1,299 @@
+"""
+services/metrics.py
+
+In-process metrics with Prometheus text exposition, served at /metrics.
+
+Kept dependency-free on purpose: the app runs as a handful of workers and
+only needs counters, gauges and histograms. Each worker exposes its own
+numbers; Prometheus aggregates across scrape targets.
+
+Usage:
+    from services.metrics import stage, LLM_TOKENS
+
+    with stage("llm_call"):
+        reply = await get_ai_reply(...)
+    LLM_TOKENS.inc(120, call_site="reply", kind="prompt")
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+_REGISTRY: list["_Metric"] = []
+
+# Seconds — tuned for a pipeline where a full reply takes ~0.5–10s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _fmt_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        _REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterator[str]:
+        for key, v in self._values.items():
+            yield f"{self.name}{_fmt_labels(self.labelnames, key)} {v}"
+
+
+class Gauge(_Metric):
+    """A gauge is either set() directly or backed by a callback read at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._fn: Callable[[], float] | None = None
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._fn = fn
+
+    def _samples(self) -> Iterator[str]:
+        if self._fn is not None:
+            try:
+                yield f"{self.name} {self._fn()}"
+            except Exception:
+                pass
+            return
+        for key, v in self._values.items():
+            yield f"{self.name}{_fmt_labels(self.labelnames, key)} {v}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        # key → (per-bucket counts, sum, count)
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def mean(self, **labels) -> float:
+        entry = self._values.get(self._key(labels))
+        return entry[1] / entry[2] if entry else 0.0
+
+    def _samples(self) -> Iterator[str]:
+        for key, (counts, total, n) in self._values.items():
+            for bound, c in zip(self.buckets, counts):
+                le = _fmt_labels(self.labelnames, key, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{le} {c}"
+            le = _fmt_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {n}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {total}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, key)} {n}"
+
+
+def render() -> str:
+    """Whole registry in Prometheus text format."""
+    return "\n".join(m.render() for m in _REGISTRY) + "\n"
+
+
+# ── Metric definitions ────────────────────────────────────────────────────────
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds",
+    "Time spent in each stage of the webhook reply pipeline",
+    ("stage",),
+)
+PIPELINE_MESSAGES = Counter(
+    "pipeline_messages_total",
+    "Incoming messages by pipeline outcome",
+    ("outcome",),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status"),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens used, by call site and kind (prompt/completion/cached — "
+    "cached is the part of prompt served from the provider's prompt cache)",
+    ("call_site", "kind"),
+)
+LLM_USAGE_ROWS = Counter(
+    "llm_usage_rows_total",
+    "llm_calls accounting rows by result (written/dropped)",
+    ("result",),
+)
+LLM_PROMPT_VERSION = Gauge(
+    "llm_prompt_version",
+    "ai_service.PROMPT_VERSION of the reply prompt layout this worker sends",
+)
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_seconds",
+    "LLM call latency by call site",
+    ("call_site",),
+)
+ORDER_TURNS = Histogram(
+    "order_confirmation_turns",
+    "Customer messages in a session up to and including the order confirmation, "
+    "split by whether saved contact details were offered",
+    ("returning",),
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50),
+)
+ORDER_LLM_CALLS = Histogram(
+    "order_confirmation_llm_calls",
+    "LLM reply calls in a session up to the order confirmation",
+    ("returning",),
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30),
+)
+DETERMINISTIC_REPLIES = Counter(
+    "deterministic_replies_total",
+    "Order quick-reply / postback turns answered from a template, without an LLM call",
+    ("payload",),
+)
+INTENT_BYPASSES = Counter(
+    "intent_bypasses_total",
+    "Trivial messages answered from a page template instead of the LLM, "
+    "by intent and what matched (rule/model/sticker)",
+    ("intent", "source"),
+)
+LLM_SECONDS_SAVED = Counter(
+    "llm_seconds_saved_total",
+    "Estimated reply latency avoided by intent bypasses (mean llm_call stage time at each bypass)",
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_queue_wait_seconds",
+    "Time a reply waited for an LLM slot, by conversation state",
+    ("state",),
+)
+LLM_SHED_TURNS = Counter(
+    "llm_shed_turns_total",
+    "Reply turns deferred by admission control, by reason",
+    ("reason",),
+)
+LLM_DEFERRED_TURNS = Gauge(
+    "llm_deferred_turns",
+    "Conversations with a deferred turn waiting for a retry",
+)
+LLM_DEFER_OUTCOMES = Counter(
+    "llm_defer_outcomes_total",
+    "How deferred turns ended (answered/superseded/gave_up/dropped)",
+    ("outcome",),
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_queue_depth",
+    "Replies waiting for an LLM slot",
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ("cache", "result"),
+)
+SEND_QUEUE_DEPTH = Gauge(
+    "send_queue_depth",
+    "Outbound Messenger replies waiting in the send queue",
+)
+RATE_LIMITED = Counter(
+    "rate_limited_messages_total",
+    "Inbound messages refused an AI reply by the rate limiter",
+    ("scope",),
+)
+AUTO_BLOCKS = Counter(
+    "auto_blocks_total",
+    "Users temporarily blocked after repeated rate-limit violations",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured size of the database connection pool",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond the pool size (negative = unused pool slots)",
+)
+DB_REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of the read replica at the last check (-1 = unreachable)",
+)
+DB_READS_ROUTED = Counter(
+    "db_reads_routed_total",
+    "Read-only sessions by target (replica/primary)",
+    ("target",),
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "SQL statements executed",
+)
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total",
+    "Connections checked out of the pool",
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block of the reply pipeline into pipeline_stage_seconds."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        PIPELINE_STAGE_SECONDS.observe(time.perf_counter() - t0, stage=name)
+
+
+def record_llm_usage(call_site: str, response, seconds: float) -> None:
+    """Record latency and token usage from a Groq/OpenAI-style completion."""
+    LLM_CALL_SECONDS.observe(seconds, call_site=call_site)
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.inc(usage.prompt_tokens or 0, call_site=call_site, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens or 0, call_site=call_site, kind="completion")
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    LLM_TOKENS.inc(cached, call_site=call_site, kind="cached")
+    CACHE_REQUESTS.inc(cache="llm_prompt", result="hit" if cached else "miss")
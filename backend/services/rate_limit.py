@@ -0,0 +1,152 @@
+"""
+services/rate_limit.py
+
+Small asyncio token bucket shared by anything that needs to pace itself
+against an external limit (Graph API sends, LLM calls, …), plus the inbound
+per-user / per-page limiter that guards the webhook reply pipeline.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+from config import get_settings
+
+settings = get_settings()
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens are added per second, up to
+    `capacity`. acquire() waits until enough tokens are available;
+    try_acquire() never waits.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def refund(self, tokens: float = 1) -> None:
+        """Return tokens taken by a try_acquire() whose work did not go ahead."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + tokens)
+
+    async def acquire(self, tokens: float = 1) -> None:
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+# ── Inbound limiter ───────────────────────────────────────────────────────────
+
+class KeyedBuckets:
+    """
+    One TokenBucket per key, created on first use. Buckets that have been
+    idle long enough to refill completely carry no state, so they are
+    pruned once the map grows past `max_keys`.
+    """
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = 50_000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def try_acquire(self, key: str) -> bool:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune()
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+        return bucket.try_acquire()
+
+    def refund(self, key: str) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.refund()
+
+    def _prune(self) -> None:
+        full_after = self.capacity / self.rate
+        now = time.monotonic()
+        self._buckets = {
+            k: b for k, b in self._buckets.items() if now - b._updated < full_after
+        }
+
+
+class InboundLimiter:
+    """
+    Decides whether an incoming message may trigger an AI reply.
+
+    check() returns None when allowed, otherwise the scope that refused it
+    ("user" or "page"). The user bucket is checked first so a single noisy
+    PSID cannot drain the page budget for everyone else; when the page
+    bucket then refuses, the user's token is given back, so customers are
+    not charged for messages the page limit dropped.
+
+    Limits are per worker process, like the send queue; with N workers the
+    effective ceiling is N × the configured rate.
+    """
+
+    def __init__(self):
+        self.users = KeyedBuckets(settings.USER_RATE_PER_MINUTE / 60, settings.USER_BURST)
+        self.pages = KeyedBuckets(settings.PAGE_RATE_PER_MINUTE / 60, settings.PAGE_BURST)
+        self._violations: dict[str, deque[float]] = {}
+
+    def check(self, page_id: str, sender_id: str) -> str | None:
+        user_key = f"{page_id}:{sender_id}"
+        if not self.users.try_acquire(user_key):
+            return "user"
+        if not self.pages.try_acquire(page_id):
+            self.users.refund(user_key)
+            return "page"
+        return None
+
+    def record_violation(self, page_id: str, sender_id: str) -> bool:
+        """
+        Note a rate-limited message from this user. Returns True once the
+        user crosses AUTO_BLOCK_VIOLATIONS within AUTO_BLOCK_WINDOW_SECONDS
+        (the history is then reset so the next block needs a fresh run).
+        """
+        if settings.AUTO_BLOCK_VIOLATIONS <= 0:
+            return False
+        key = f"{page_id}:{sender_id}"
+        now = time.monotonic()
+        hits = self._violations.setdefault(key, deque())
+        hits.append(now)
+        while hits and now - hits[0] > settings.AUTO_BLOCK_WINDOW_SECONDS:
+            hits.popleft()
+        if len(hits) >= settings.AUTO_BLOCK_VIOLATIONS:
+            del self._violations[key]
+            return True
+        if len(self._violations) > self.users.max_keys:
+            window = settings.AUTO_BLOCK_WINDOW_SECONDS
+            self._violations = {
+                k: v for k, v in self._violations.items() if now - v[-1] <= window
+            }
+        return False
+
+
+_limiter: InboundLimiter | None = None
+
+
+def get_inbound_limiter() -> InboundLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = InboundLimiter()
+    return _limiter
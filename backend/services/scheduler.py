@@ -0,0 +1,120 @@
+"""
+services/scheduler.py
+
+Priority gate in front of the LLM.
+
+At most LLM_MAX_CONCURRENCY reply completions run at once. When the limit
+is saturated, waiting turns are released by conversation state instead of
+arrival order:
+
+    confirming  — the bot's last message was the order summary; the
+                  customer's reply completes (or corrects) an order
+    collecting  — the bot is asking for phone / address
+    browsing    — everything else
+
+Each state adds LLM_PRIORITY_STEP_SECONDS of virtual delay per rank to
+the turn's arrival time, and waiters are served in order of that virtual
+time. A browsing turn therefore still beats a confirming turn that
+arrived more than two steps later, so chit-chat is delayed under load
+but never starved.
+
+The gate only orders work that yields to the event loop while it holds a
+slot: a blocking call inside slot() serialises the whole worker and no
+waiter ever queues. ai_service.get_ai_reply runs the Groq client through
+asyncio.to_thread for that reason.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from config import get_settings
+from services.ai_service import parse_order_summary
+from services.history import HistoryTurn
+from services.metrics import LLM_QUEUE_WAIT_SECONDS, LLM_QUEUE_DEPTH
+
+settings = get_settings()
+
+PRIORITY = {"confirming": 0, "collecting": 1, "browsing": 2}
+
+_COLLECTING_MARKERS = ("phone", "number", "address", "deliver")
+
+
+def classify_state(history: list[HistoryTurn]) -> str:
+    """Conversation state from the bot's most recent message in the session."""
+    for turn in reversed(history):
+        if turn.from_role != "ai":
+            continue
+        if parse_order_summary(turn.content) is not None:
+            return "confirming"
+        text = turn.content.lower()
+        if any(m in text for m in _COLLECTING_MARKERS):
+            return "collecting"
+        break
+    return "browsing"
+
+
+class PriorityGate:
+    """
+    Concurrency limit whose waiters are released lowest virtual time first.
+    A released slot is handed straight to the next waiter, so a newcomer
+    cannot jump the queue between release and wake-up.
+    """
+
+    def __init__(self, limit: int, step_seconds: float):
+        self.limit = limit
+        self.step_seconds = step_seconds
+        self._active = 0
+        self._waiters: list[tuple[float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    def depth(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    @asynccontextmanager
+    async def slot(self, state: str) -> AsyncIterator[None]:
+        t0 = time.perf_counter()
+        await self._acquire(PRIORITY.get(state, PRIORITY["browsing"]))
+        LLM_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - t0, state=state)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, rank: int) -> None:
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        virtual_time = time.monotonic() + rank * self.step_seconds
+        heapq.heappush(self._waiters, (virtual_time, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancel landed
+            if fut.done() and not fut.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():          # skip waiters that were cancelled
+                fut.set_result(None)    # slot passes over; _active unchanged
+                return
+        self._active -= 1
+
+
+_gate: PriorityGate | None = None
+
+
+def get_llm_gate() -> PriorityGate:
+    global _gate
+    if _gate is None:
+        _gate = PriorityGate(settings.LLM_MAX_CONCURRENCY, settings.LLM_PRIORITY_STEP_SECONDS)
+        LLM_QUEUE_DEPTH.set_function(_gate.depth)
+    return _gate
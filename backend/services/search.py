@@ -0,0 +1,121 @@
+"""
+services/search.py
+
+Ranked full-text search over messages and sales leads.
+
+Postgres: websearch_to_tsquery against the GIN-indexed tsvector expressions
+defined in models.py, ranked with ts_rank_cd.
+SQLite:   the FTS5 mirror tables, ranked with bm25().
+
+Pagination is count-free: we fetch page_size + 1 rows to
+report has_more instead of running COUNT(*) over millions of matches.
+"""
+
+import re
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import LEAD_TSVECTOR, MESSAGE_TSVECTOR, normalize_phone
+
+# Only treat the query as a phone lookup once it has this many digits
+_MIN_PHONE_DIGITS = 4
+
+
+def _fts5_query(q: str) -> str:
+    """Turn free text into a safe FTS5 query: every word quoted, last one prefix-matched."""
+    words = re.findall(r"\w+", q)
+    if not words:
+        return '""'
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+async def search_messages(
+    db: AsyncSession,
+    q: str,
+    page_id: str | None,
+    limit: int,
+    offset: int,
+) -> list[dict]:
+    params = {"q": q, "page_id": page_id, "limit": limit, "offset": offset}
+    if db.bind.dialect.name == "sqlite":
+        params["q"] = _fts5_query(q)
+        sql = """
+            SELECT m.id, m.page_id, m.user_id, m.from_role, m.content, m.sent_at,
+                   -bm25(messages_fts) AS rank
+            FROM messages_fts
+            JOIN messages m ON m.id = messages_fts.rowid
+            WHERE messages_fts MATCH :q
+              AND (CAST(:page_id AS TEXT) IS NULL OR m.page_id = :page_id)
+            ORDER BY rank DESC, m.sent_at DESC
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        sql = f"""
+            SELECT id, page_id, user_id, from_role, content, sent_at,
+                   ts_rank_cd({MESSAGE_TSVECTOR}, query) AS rank
+            FROM messages, websearch_to_tsquery('simple', :q) AS query
+            WHERE {MESSAGE_TSVECTOR} @@ query
+              AND (CAST(:page_id AS TEXT) IS NULL OR page_id = :page_id)
+            ORDER BY rank DESC, sent_at DESC
+            LIMIT :limit OFFSET :offset
+        """
+    rows = (await db.execute(text(sql), params)).mappings().all()
+    return [dict(r) for r in rows]
+
+
+async def search_leads(
+    db: AsyncSession,
+    q: str,
+    page_id: str | None,
+    limit: int,
+    offset: int,
+) -> list[dict]:
+    digits = normalize_phone(q)
+    phone_prefix = f"{digits}%" if digits and len(digits) >= _MIN_PHONE_DIGITS else None
+    params = {
+        "q": q, "phone": phone_prefix, "page_id": page_id,
+        "limit": limit, "offset": offset,
+    }
+    columns = (
+        "l.id, l.page_id, l.user_id, l.order_ref_id, l.status, l.phone_number, "
+        "l.delivery_address, l.product_interest, l.order_notes, l.detected_at"
+    )
+
+    # Text matches and phone-prefix matches are separate index scans. A lead
+    # can hit both, so the hits are collapsed to one row per lead (best rank)
+    # before paginating. A phone hit ranks above any text hit.
+    if db.bind.dialect.name == "sqlite":
+        params["q"] = _fts5_query(q)
+        text_match = """
+            SELECT rowid AS id, -bm25(sales_leads_fts) AS rank
+            FROM sales_leads_fts
+            WHERE sales_leads_fts MATCH :q
+        """
+    else:
+        text_match = f"""
+            SELECT l.id, ts_rank_cd({LEAD_TSVECTOR}, query) AS rank
+            FROM sales_leads l, websearch_to_tsquery('simple', :q) AS query
+            WHERE {LEAD_TSVECTOR} @@ query
+        """
+    sql = f"""
+        SELECT {columns}, best.rank
+        FROM (
+            SELECT id, MAX(rank) AS rank FROM (
+                {text_match}
+                UNION ALL
+                SELECT l.id, 1000.0 AS rank
+                FROM sales_leads l
+                WHERE CAST(:phone AS TEXT) IS NOT NULL AND l.phone_normalized LIKE :phone
+            ) hits
+            GROUP BY id
+        ) best
+        JOIN sales_leads l ON l.id = best.id
+        WHERE (CAST(:page_id AS TEXT) IS NULL OR l.page_id = :page_id)
+        ORDER BY best.rank DESC, l.detected_at DESC
+        LIMIT :limit OFFSET :offset
+    """
+    rows = (await db.execute(text(sql), params)).mappings().all()
+    return [dict(r) for r in rows]
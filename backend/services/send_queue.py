@@ -0,0 +1,302 @@
+"""
+services/send_queue.py
+
+Outbound Messenger send queue.
+
+Every reply goes through here instead of hitting the Send API directly:
+  • each page gets its own queue + worker, so a burst on one shop never
+    delays another
+  • a token bucket per page keeps us under the Graph API send limits
+  • transient Graph errors (rate limits, 5xx, network) are retried with
+    exponential backoff
+  • replies that pile up for the same page go out as one Graph batch request
+
+A periodic redrive loop picks up AI Message rows stored with status="failed"
+and pushes them back through the queue until they are sent or give up. It
+also drains the pipeline's outbox: replies committed with status="queued",
+claimed by the pipeline run that wrote them, whose sender never recorded
+a result (worker restarted mid-send).
+
+Redrive claims rows before sending them (status="redriving", claimed_at),
+in a transaction of its own, so several workers never send the same reply
+and no database connection is held while Graph requests are in flight. A
+claim whose worker died is taken over once _OUTBOX_STALE_AFTER has passed.
+"""
+
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import and_, func, or_, select, update
+
+from config import get_settings
+from services.facebook import (
+    MAX_BATCH_SIZE,
+    is_transient_error,
+    send_message,
+    send_message_batch,
+)
+from services.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# A worker with nothing to do for this long exits; it is recreated on demand.
+_WORKER_IDLE_SECONDS = 60
+
+# Messenger only allows standard replies within 24h of the user's last message.
+_REDRIVE_WINDOW = timedelta(hours=24)
+
+# A "queued" outbox row or "redriving" claim older than this was abandoned
+# by its sender; comfortably above the longest in-process retry schedule.
+_OUTBOX_STALE_AFTER = timedelta(minutes=2)
+
+
+@dataclass
+class _OutboundItem:
+    page_access_token: str
+    recipient_id: str
+    text: str
+    future: asyncio.Future
+    quick_replies: list[dict] | None = None
+    attempt: int = field(default=0)
+
+
+class SendQueue:
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        batch_size: int,
+        max_retries: int,
+        retry_base: float,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.batch_size = max(1, min(batch_size, burst, MAX_BATCH_SIZE))
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self._queues: dict[str, asyncio.Queue[_OutboundItem]] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self._retries: set[asyncio.Task] = set()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    async def send(
+        self,
+        page_access_token: str,
+        page_id: str,
+        recipient_id: str,
+        text: str,
+        quick_replies: list[dict] | None = None,
+    ) -> dict:
+        """
+        Queue a message and wait for its final result. The return value has
+        the same shape as facebook.send_message(): "message_id" on success,
+        "error" once retries are exhausted or the error is permanent.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(
+            page_id, _OutboundItem(page_access_token, recipient_id, text, future, quick_replies)
+        )
+        return await future
+
+    def depth(self) -> int:
+        """Messages waiting across all pages (including pending retries)."""
+        return sum(q.qsize() for q in self._queues.values()) + len(self._retries)
+
+    async def stop(self) -> None:
+        tasks = list(self._workers.values()) + list(self._retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers.clear()
+        self._retries.clear()
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _enqueue(self, page_id: str, item: _OutboundItem) -> None:
+        if page_id not in self._queues:
+            self._queues[page_id] = asyncio.Queue()
+            self._buckets[page_id] = TokenBucket(self.rate, self.burst)
+        self._queues[page_id].put_nowait(item)
+
+        worker = self._workers.get(page_id)
+        if worker is None or worker.done():
+            self._workers[page_id] = asyncio.create_task(self._worker(page_id))
+
+    async def _worker(self, page_id: str) -> None:
+        queue = self._queues[page_id]
+        bucket = self._buckets[page_id]
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=_WORKER_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                self._workers.pop(page_id, None)
+                return
+
+            batch = [item]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            await bucket.acquire(len(batch))
+            results = await self._deliver(page_id, batch)
+            for item, result in zip(batch, results):
+                self._settle(page_id, item, result)
+
+    async def _deliver(self, page_id: str, batch: list[_OutboundItem]) -> list[dict]:
+        try:
+            if len(batch) == 1:
+                item = batch[0]
+                return [await send_message(
+                    item.page_access_token, page_id, item.recipient_id, item.text, item.quick_replies
+                )]
+            return await send_message_batch(
+                batch[-1].page_access_token,
+                page_id,
+                [(item.recipient_id, item.text, item.quick_replies) for item in batch],
+            )
+        except (httpx.HTTPError, ValueError) as e:
+            # Network failure or non-JSON response — always worth another try
+            return [{"error": {"message": str(e), "is_transient": True}}] * len(batch)
+
+    def _settle(self, page_id: str, item: _OutboundItem, result: dict) -> None:
+        if item.future.done():
+            return
+        if "message_id" not in result and is_transient_error(result) and item.attempt < self.max_retries:
+            delay = self.retry_base * (2 ** item.attempt) * (1 + random.random() / 2)
+            item.attempt += 1
+            task = asyncio.create_task(self._retry_later(page_id, item, delay))
+            self._retries.add(task)
+            task.add_done_callback(self._retries.discard)
+            return
+        item.future.set_result(result)
+
+    async def _retry_later(self, page_id: str, item: _OutboundItem, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._enqueue(page_id, item)
+
+
+_queue: SendQueue | None = None
+
+
+def get_send_queue() -> SendQueue:
+    global _queue
+    if _queue is None:
+        settings = get_settings()
+        _queue = SendQueue(
+            rate=settings.SEND_RATE_PER_SECOND,
+            burst=settings.SEND_BURST,
+            batch_size=settings.SEND_BATCH_SIZE,
+            max_retries=settings.SEND_MAX_RETRIES,
+            retry_base=settings.SEND_RETRY_BASE_SECONDS,
+        )
+    return _queue
+
+
+# ── Redrive failed replies ────────────────────────────────────────────────────
+
+async def redrive_failed_messages(limit: int = 100) -> int:
+    """
+    Re-send AI replies stored with status="failed", plus "queued" outbox
+    rows and "redriving" claims whose sender stopped short of recording a
+    result. Returns how many were delivered this pass. Messages older than
+    the 24h messaging window or past SEND_REDRIVE_MAX_ATTEMPTS are left
+    alone.
+    """
+    from database import db_session
+    from models import Message, Page, User
+    from services.ai_service import reply_quick_replies
+
+    settings = get_settings()
+    now = datetime.now(timezone.utc)
+    cutoff = now - _REDRIVE_WINDOW
+    lease_expired = now - _OUTBOX_STALE_AFTER
+
+    claimable = or_(
+        Message.status == "failed",
+        and_(
+            Message.status.in_(("queued", "redriving")),
+            # Rows written before claimed_at existed fall back to their send time
+            func.coalesce(Message.claimed_at, Message.sent_at) < lease_expired,
+        ),
+    )
+
+    # ── Claim: a short transaction, committed before anything is sent ─────
+    async with db_session() as db:
+        candidates = (await db.execute(
+            select(Message.id, Message.page_id, Message.content, User.user_id, Page.access_token)
+            .join(User, Message.user_id == User.id)
+            .join(Page, Message.page_id == Page.id)
+            .where(
+                Message.from_role == "ai",
+                claimable,
+                Message.sent_at >= cutoff,
+                Message.send_attempts < settings.SEND_REDRIVE_MAX_ATTEMPTS,
+                Page.is_active == True,
+                User.is_blocked == False,
+            )
+            .order_by(Message.sent_at)
+            .limit(limit)
+        )).all()
+        if not candidates:
+            return 0
+        # The UPDATE re-checks `claimable` under the row lock, so of several
+        # workers that picked the same row only the first takes it. Attempts
+        # are counted at claim time: a reply that keeps killing its sender
+        # still runs out.
+        claims = dict((await db.execute(
+            update(Message)
+            .where(Message.id.in_([c.id for c in candidates]), claimable)
+            .values(status="redriving", claimed_at=now, send_attempts=Message.send_attempts + 1)
+            .returning(Message.id, Message.send_attempts)
+            .execution_options(synchronize_session=False)
+        )).all())
+        await db.commit()
+
+    claimed = [c for c in candidates if c.id in claims]
+    if not claimed:
+        return 0
+
+    # ── Send: no session held while waiting on Graph ──────────────────────
+    queue = get_send_queue()
+    results = await asyncio.gather(*(
+        queue.send(c.access_token, c.page_id, c.user_id, c.content, reply_quick_replies(c.content))
+        for c in claimed
+    ))
+
+    # ── Record: second short transaction, only for claims still ours ──────
+    delivered = 0
+    async with db_session() as db:
+        for c, result in zip(claimed, results):
+            values = {"status": "failed"}
+            if "message_id" in result:
+                values = {"status": "sent", "fb_message_id": result["message_id"]}
+                delivered += 1
+            await db.execute(
+                update(Message)
+                .where(
+                    Message.id == c.id,
+                    Message.status == "redriving",
+                    Message.send_attempts == claims[c.id],
+                )
+                .values(**values)
+            )
+        await db.commit()
+
+    logger.info("Redrive: %d/%d undelivered replies sent", delivered, len(claimed))
+    return delivered
+
+
+async def run_redrive_loop() -> None:
+    """Background task started from main.lifespan."""
+    interval = get_settings().SEND_REDRIVE_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await redrive_failed_messages()
+        except Exception:
+            logger.exception("Redrive pass failed")
@@ -0,0 +1,15 @@
+"""
+Unit tests run against the SQLite profile:
+
+    cd backend && python -m pytest -q tests
+"""
+
+import os
+import sys
+import tempfile
+
+# Before any app module is imported: database.py builds its engine at import time
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/munsi-test.db"
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+import services.admission as admission
+from services.admission import AdmissionController, DeferredTurn, DeferredTurns
+from services.scheduler import PriorityGate
+
+
+def _turn(sender_id: str = "psid-1", text: str = "hello") -> DeferredTurn:
+    return DeferredTurn(sender_id, "page-1", None, text, None, None, None)
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    gate = PriorityGate(limit=1, step_seconds=1.0)
+    monkeypatch.setattr(admission, "get_llm_gate", lambda: gate)
+    return gate
+
+
+def test_queue_depth_sheds_all_but_confirming(gate, monkeypatch):
+    controller = AdmissionController(max_depth=2, max_latency=10, failure_threshold=3, cooldown_seconds=30)
+    assert controller.shed_reason("browsing") is None
+    monkeypatch.setattr(gate, "depth", lambda: 2)
+    assert controller.shed_reason("browsing") == "queue_depth"
+    assert controller.shed_reason("collecting") == "queue_depth"
+    assert controller.shed_reason("confirming") is None
+
+
+def test_latency_ewma(gate):
+    controller = AdmissionController(max_depth=10, max_latency=5, failure_threshold=3, cooldown_seconds=30)
+    controller.record_success(8)
+    assert controller.shed_reason("browsing") == "latency"
+    for _ in range(10):
+        controller.record_success(1)
+    assert controller.shed_reason("browsing") is None
+
+
+def test_circuit_opens_and_cools_down(gate):
+    controller = AdmissionController(max_depth=10, max_latency=10, failure_threshold=2, cooldown_seconds=0.05)
+    controller.record_failure()
+    assert controller.shed_reason("browsing") is None
+    controller.record_failure()
+    assert controller.shed_reason("confirming") == "provider_errors"
+    time.sleep(0.06)
+    # Cooled down: the next turn probes the provider
+    assert controller.shed_reason("confirming") is None
+    controller.record_success(1)
+    assert controller.shed_reason("browsing") is None
+    controller.record_failure()
+    assert controller.shed_reason("browsing") is None
+
+
+def test_half_open_circuit_admits_one_probe(gate):
+    controller = AdmissionController(max_depth=10, max_latency=10, failure_threshold=1, cooldown_seconds=0.05)
+    controller.record_failure()
+    time.sleep(0.06)
+    assert controller.shed_reason("browsing") is None          # the probe
+    # Everything else waits while the probe is in flight
+    assert controller.shed_reason("confirming") == "provider_errors"
+    assert controller.shed_reason("browsing") == "provider_errors"
+    controller.record_failure()
+    assert controller.shed_reason("confirming") == "provider_errors"
+    time.sleep(0.06)
+    assert controller.shed_reason("browsing") is None          # the next probe
+    controller.record_success(1)
+    assert controller.shed_reason("browsing") is None
+    assert controller.shed_reason("browsing") is None
+
+
+def test_deferred_turns_one_per_conversation():
+    deferred = DeferredTurns(retry_seconds=0, max_wait_seconds=60, max_turns=10)
+    first = _turn(text="price?")
+    assert deferred.park(first) is None
+    later = _turn(text="hello?")
+    assert deferred.park(later) is first
+    assert len(deferred) == 1
+    # The conversation keeps its original deadline
+    assert later.deferred_at == first.deferred_at
+    assert deferred.pop_due() == [later]
+    assert len(deferred) == 0
+
+
+def test_deferred_turns_backoff_and_overflow():
+    deferred = DeferredTurns(retry_seconds=1, max_wait_seconds=60, max_turns=1)
+    turn = _turn()
+    deferred.park(turn)
+    assert turn.attempts == 1
+    assert deferred.pop_due() == []          # not due for another second
+    deferred.park(turn)                      # re-parking the same turn backs off further
+    assert turn.attempts == 2
+    assert 1.5 < turn.due_at - time.monotonic() <= 2
+    with pytest.raises(OverflowError):
+        deferred.park(_turn(sender_id="psid-2"))
+
+
+def test_deferred_turn_expiry():
+    deferred = DeferredTurns(retry_seconds=1, max_wait_seconds=10, max_turns=10)
+    turn = _turn()
+    assert not deferred.expired(turn)
+    turn.deferred_at -= 11
+    assert deferred.expired(turn)
@@ -0,0 +1,49 @@
+from models import Product
+from services.catalog import BM25Index, CatalogHit, tokenize
+
+
+def _product(id: int, name: str, description: str | None = None, sku: str | None = None) -> Product:
+    return Product(id=id, page_id="page", name=name, description=description, price="Rs 900", sku=sku)
+
+
+def _index() -> BM25Index:
+    index = BM25Index()
+    index.upsert(_product(1, "Black cotton t-shirt", "Round neck, sizes S to XXL"))
+    index.upsert(_product(2, "Denim jacket", "Blue, washed denim", sku="DJ-01"))
+    index.upsert(_product(3, "White hoodie", "Fleece lined, goes well with a black cap"))
+    return index
+
+
+def test_tokenize():
+    assert tokenize("T-Shirt, XXL!") == ["t", "shirt", "xxl"]
+
+
+def test_search_ranks_name_matches_first():
+    hits = _index().search("black", k=5)
+    assert [h.name for h in hits] == ["Black cotton t-shirt", "White hoodie"]
+    assert hits[0] == CatalogHit("Black cotton t-shirt", "Rs 900", "Round neck, sizes S to XXL")
+
+
+def test_search_matches_sku_and_respects_k():
+    index = _index()
+    assert [h.name for h in index.search("dj", k=5)] == ["Denim jacket"]
+    assert len(index.search("black hoodie denim", k=2)) == 2
+    assert index.search("sandals", k=5) == []
+
+
+def test_upsert_replaces_and_remove_forgets():
+    index = _index()
+    index.upsert(_product(2, "Leather jacket", "Brown"))
+    assert len(index) == 3
+    assert index.search("denim", k=5) == []
+    assert [h.name for h in index.search("jacket", k=5)] == ["Leather jacket"]
+
+    index.remove(2)
+    index.remove(2)     # unknown ids are ignored
+    assert len(index) == 2
+    assert index.search("jacket", k=5) == []
+    assert "leather" not in index._postings
+
+
+def test_empty_index():
+    assert BM25Index().search("anything", k=5) == []
@@ -0,0 +1,62 @@
+import asyncio
+import uuid
+
+import services.admission as admission
+import services.messenger as messenger
+from database import db_session, init_db
+from models import Page
+from services.admission import AdmissionController, DeferredTurns
+from services.ai_service import LLMUnavailable
+from services.intent_router import DEFAULT_TEMPLATES
+from services.send_queue import SendQueue
+
+
+def test_deferred_loop_sends_one_holding_message(monkeypatch):
+    sent: list[str] = []
+    failures = {"left": 3}
+
+    async def fake_send(self, token, page_id, recipient_id, text, quick_replies=None):
+        sent.append(text)
+        return {"message_id": uuid.uuid4().hex}
+
+    async def fake_reply(message, **kwargs):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise LLMUnavailable("503")
+        return f"answer to {message}"
+
+    monkeypatch.setattr(SendQueue, "send", fake_send)
+    monkeypatch.setattr(messenger, "get_ai_reply", fake_reply)
+    monkeypatch.setattr(messenger, "_DEFERRED_POLL_SECONDS", 0.01)
+    # No circuit breaker: every retry reaches the (failing) provider
+    monkeypatch.setattr(admission, "_controller", AdmissionController(1000, 1000, 1000, 0))
+    deferred = DeferredTurns(retry_seconds=0.01, max_wait_seconds=60, max_turns=10)
+    monkeypatch.setattr(admission, "_deferred", deferred)
+
+    async def run() -> None:
+        await init_db()
+        page_id = f"page-{uuid.uuid4().hex[:8]}"
+        async with db_session() as db:
+            db.add(Page(id=page_id, name="Shop", access_token="token", is_active=True))
+            await db.commit()
+
+        await messenger.handle_incoming_message(
+            sender_id="psid-1", page_id=page_id, fb_message_id="mid-1",
+            message_text="do you deliver to pokhara",
+        )
+        assert len(deferred) == 1
+
+        loop = asyncio.create_task(messenger.run_deferred_loop())
+        try:
+            for _ in range(500):
+                if failures["left"] == 0 and not deferred and not messenger._retry_tasks:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            loop.cancel()
+
+    asyncio.run(run())
+
+    assert failures["left"] == 0
+    assert sent.count(DEFAULT_TEMPLATES["holding"]) == 1
+    assert sent[-1] == "answer to do you deliver to pokhara"
@@ -0,0 +1,34 @@
+import asyncio
+import json
+
+from database import db_session, init_db
+from services.events import Event, _encode, _NOTIFY_MAX_BYTES, bus, publish_after_commit
+
+
+def test_events_publish_on_commit_only():
+    async def run() -> list[Event]:
+        await init_db()
+        sub = bus.subscribe({"page-events"})
+        try:
+            async with db_session() as db:
+                publish_after_commit(db, "message", "page-events", {"n": 1})
+                await db.rollback()
+            async with db_session() as db:
+                publish_after_commit(db, "message", "page-events", {"n": 2})
+                publish_after_commit(db, "message", "other-page", {"n": 3})
+                await db.commit()
+            return [sub.queue.get_nowait() for _ in range(sub.queue.qsize())]
+        finally:
+            bus.unsubscribe(sub)
+
+    assert [e.data for e in asyncio.run(run())] == [{"n": 2}]
+
+
+def test_notify_payload_is_trimmed_to_fit():
+    evt = Event("message", "page-1", {"message_text": "ñ" * 5000, "timestamp": 1})
+    payload = _encode(evt)
+    assert len(payload.encode()) < _NOTIFY_MAX_BYTES
+    assert json.loads(payload)["data"]["timestamp"] == 1
+    assert json.loads(_encode(Event("lead", "p", {"id": 7}))) == {
+        "type": "lead", "page_id": "p", "data": {"id": 7},
+    }
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from services.ai_service import build_messages
+from services.context import session_is_open
+from services.history import SESSION_GAP_SECONDS, HistoryTurn, trim_history
+
+
+def _turns(n: int) -> list[HistoryTurn]:
+    return [HistoryTurn("user" if i % 2 == 0 else "ai", f"turn {i}", None) for i in range(n)]
+
+
+def test_trim_history_under_cap_is_untouched():
+    history = _turns(10)
+    assert trim_history(history, 10) == (history, 0)
+    assert trim_history(history, 0) == (history, 0)
+
+
+def test_trim_history_cut_moves_in_half_window_steps():
+    kept, omitted = trim_history(_turns(11), 10)
+    assert omitted == 5 and kept[0].content == "turn 5"
+    # Same cut for the next four turns, so the prompt prefix is unchanged
+    for n in range(12, 16):
+        assert trim_history(_turns(n), 10)[1] == 5
+    assert trim_history(_turns(16), 10)[1] == 10
+
+
+def test_build_messages_marks_omitted_turns(monkeypatch):
+    from config import get_settings
+    monkeypatch.setattr(get_settings(), "LLM_HISTORY_MAX_TURNS", 4)
+    messages = build_messages("hello", history=_turns(6))
+    assert messages[1] == {
+        "role": "system", "content": "[2 earlier messages in this conversation are not shown]",
+    }
+    assert [m["content"] for m in messages[2:-1]] == ["turn 2", "turn 3", "turn 4", "turn 5"]
+    assert messages[-1] == {"role": "user", "content": "hello"}
+
+
+def test_session_is_open():
+    now = datetime.now(timezone.utc)
+    recent = now - timedelta(seconds=SESSION_GAP_SECONDS - 60)
+    idle = now - timedelta(seconds=SESSION_GAP_SECONDS + 60)
+    assert session_is_open(recent, None, now)
+    assert not session_is_open(idle, None, now)
+    assert not session_is_open(recent, now, now)     # closed by a confirmed order
+    assert not session_is_open(None, None, now)
@@ -0,0 +1,91 @@
+from services.history import HistoryTurn
+from services.intent_router import (
+    DEFAULT_TEMPLATES,
+    OTHER,
+    STICKER_TEXT,
+    IntentRouter,
+    NgramModel,
+    normalize,
+    page_templates,
+    rule_intent,
+)
+
+TRIVIAL = [
+    "hi", "hello", "hey", "hello sir", "thanks", "thank you", "thanks dai",
+    "ok", "okay", "bye", "good night",
+]
+QUESTIONS = [
+    "how much is the red t-shirt", "do you deliver to pokhara", "what sizes do you have",
+    "is cash on delivery available", "can i get a discount", "show me black hoodies",
+    "when will my order arrive", "do you have this in xl", "i want 2 of these",
+    "size 42 please", "no", "not this one", "thank you for the info but the size is wrong",
+]
+
+
+def _trained_router() -> IntentRouter:
+    router = IntentRouter(min_confidence=0.98, max_words=4)
+    router.train((TRIVIAL + QUESTIONS) * 5)
+    return router
+
+
+def test_normalize():
+    assert normalize("  Hiiii!!! ") == "hii"
+    assert normalize("OK.") == "ok"
+
+
+def test_rule_intent():
+    assert rule_intent("Thank you so much!") == "thanks"
+    assert rule_intent("hii there") == "greeting"
+    assert rule_intent(STICKER_TEXT) == "ack"
+    assert rule_intent("how much is this") is None
+
+
+def test_emoji_only_ack_is_allowlisted():
+    for text in ("👍", "👍🏽", "❤️", "🙏🙏", "👌 😊"):
+        assert rule_intent(text) == "ack", text
+    for text in ("😡", "👎", "😢", "?", "👍?", "👍😡"):
+        assert rule_intent(text) is None, text
+
+
+def test_ngram_model_learns_spelling_variants():
+    samples = [(normalize(t), rule_intent(t) or OTHER) for t in (TRIVIAL + QUESTIONS) * 5]
+    model = NgramModel().fit(samples)
+    assert set(model.labels) == {"greeting", "thanks", "ack", "bye", OTHER}
+    assert model.predict("thankss dai")[0] == "thanks"
+    assert "thanks" in model.vocabulary["thanks"]
+    assert model.predict("do you deliver to dharan")[0] == OTHER
+
+
+def test_classify_rule_then_model():
+    router = _trained_router()
+    assert router.classify("hello") == ("greeting", "rule")
+    assert router.classify(STICKER_TEXT) == ("ack", "sticker")
+    assert router.classify("thankss dai") == ("thanks", "model")
+    # Longer than max_words: never trusted to the model
+    assert router.classify("thanks but do you deliver to dharan") is None
+
+
+def test_mixed_messages_are_not_trivial():
+    router = _trained_router()
+    for text in ("thanks i want 2", "thank you size 42", "no", "hi need jacket", "thanks wrong size"):
+        assert router.classify(text) is None, text
+
+
+def test_classify_question_mark_bypasses_model():
+    router = _trained_router()
+    assert router.classify("ok?") is None
+    assert router.classify("okayy?") is None
+
+
+def test_route_only_while_browsing_and_not_after_a_question():
+    router = _trained_router()
+    assert router.route("thanks", (), None).reply == DEFAULT_TEMPLATES["thanks"]
+    asked = (HistoryTurn("ai", "Shall I place the order?", None),)
+    assert router.route("ok", asked, None) is None
+
+
+def test_page_templates_override_and_disable():
+    templates = page_templates('{"ack": "", "thanks": "Dhanyabad!"}')
+    assert templates["thanks"] == "Dhanyabad!"
+    assert IntentRouter(0.9, 4).route("ok", (), '{"ack": ""}') is None
+    assert page_templates("not json") == DEFAULT_TEMPLATES
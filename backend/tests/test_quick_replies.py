@@ -0,0 +1,47 @@
+from services.ai_service import (
+    ORDER_CONFIRM_PAYLOAD,
+    ORDER_CONFIRMED_TEXT,
+    ORDER_EDIT_PAYLOAD,
+    ORDER_EDIT_TEXT,
+    ORDER_QUICK_REPLIES,
+    parse_order_summary,
+    reply_quick_replies,
+)
+from services.history import HistoryTurn
+from services.messenger import _quick_reply_answer
+
+SUMMARY = (
+    "Here's your order summary:\n📦 2 t-shirts (black, L)\n📞 9800000000\n"
+    "📍 Kathmandu, Baneshwor\n\nReply YES to confirm your order."
+)
+DETAILS = {
+    "product_interest": "2 t-shirts (black, L)",
+    "phone_number": "9800000000",
+    "delivery_address": "Kathmandu, Baneshwor",
+}
+
+
+def test_parse_order_summary():
+    assert parse_order_summary(SUMMARY) == DETAILS
+    # All three lines are required
+    assert parse_order_summary("📦 2 t-shirts\n📞 9800000000") is None
+    assert parse_order_summary("How can I help?") is None
+
+
+def test_summary_replies_carry_buttons():
+    assert reply_quick_replies(SUMMARY) == ORDER_QUICK_REPLIES
+    assert reply_quick_replies("Thanks!") is None
+
+
+def test_quick_reply_answer():
+    history = (HistoryTurn("user", "yes that's all", None), HistoryTurn("ai", SUMMARY, None))
+    assert _quick_reply_answer(ORDER_CONFIRM_PAYLOAD, history) == (ORDER_CONFIRMED_TEXT, DETAILS)
+    assert _quick_reply_answer(ORDER_EDIT_PAYLOAD, history) == (ORDER_EDIT_TEXT, None)
+    assert _quick_reply_answer(None, history) is None
+    assert _quick_reply_answer("SOMETHING_ELSE", history) is None
+
+
+def test_stale_quick_reply_goes_to_the_llm():
+    moved_on = (HistoryTurn("ai", SUMMARY, None), HistoryTurn("ai", "Anything else?", None))
+    assert _quick_reply_answer(ORDER_CONFIRM_PAYLOAD, moved_on) is None
+    assert _quick_reply_answer(ORDER_CONFIRM_PAYLOAD, ()) is None
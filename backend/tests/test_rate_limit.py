@@ -0,0 +1,40 @@
+from services.rate_limit import InboundLimiter, KeyedBuckets, TokenBucket
+
+
+def _limiter(user_burst: int, page_burst: int) -> InboundLimiter:
+    limiter = InboundLimiter()
+    # Effectively no refill during the test
+    limiter.users = KeyedBuckets(rate=1e-9, capacity=user_burst)
+    limiter.pages = KeyedBuckets(rate=1e-9, capacity=page_burst)
+    return limiter
+
+
+def test_token_bucket_refund_is_capped():
+    bucket = TokenBucket(rate=1e-9, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    bucket.refund()
+    bucket.refund()
+    bucket.refund()
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_user_limit():
+    limiter = _limiter(user_burst=2, page_burst=100)
+    assert limiter.check("page", "a") is None
+    assert limiter.check("page", "a") is None
+    assert limiter.check("page", "a") == "user"
+    assert limiter.check("page", "b") is None
+
+
+def test_page_refusal_does_not_charge_the_user():
+    limiter = _limiter(user_burst=2, page_burst=1)
+    assert limiter.check("page", "a") is None
+    for _ in range(5):
+        assert limiter.check("page", "b") == "page"
+    # Once the page has room again, b still has its whole burst
+    limiter.pages = KeyedBuckets(rate=1e-9, capacity=10)
+    assert limiter.check("page", "b") is None
+    assert limiter.check("page", "b") is None
+    assert limiter.check("page", "b") == "user"
@@ -0,0 +1,124 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select
+
+from database import db_session, init_db
+from models import Message, Page, User
+from services.ai_service import ORDER_QUICK_REPLIES
+from services.send_queue import SendQueue, redrive_failed_messages
+
+
+@pytest.fixture(autouse=True)
+def empty_outbox():
+    """Redrive scans every page, so each test starts without leftover messages."""
+    async def clear() -> None:
+        await init_db()
+        async with db_session() as db:
+            await db.execute(delete(Message))
+            await db.commit()
+
+    asyncio.run(clear())
+
+
+async def _seed(statuses: list[str], content: str = "reply {}", claimed_at=None) -> str:
+    page_id = f"page-{uuid.uuid4().hex[:8]}"
+    long_ago = datetime.now(timezone.utc) - timedelta(minutes=10)
+    async with db_session() as db:
+        db.add(Page(id=page_id, name="Shop", access_token="token", is_active=True))
+        user = User(page_id=page_id, user_id=f"psid-{page_id}")
+        db.add(user)
+        await db.flush()
+        for i, status in enumerate(statuses):
+            db.add(Message(
+                page_id=page_id, user_id=user.id, from_role="ai",
+                content=content.format(i), status=status, sent_at=long_ago,
+                claimed_at=claimed_at,
+            ))
+        await db.commit()
+    return page_id
+
+
+async def _page_messages(page_id: str) -> list[Message]:
+    async with db_session() as db:
+        return list((await db.execute(
+            select(Message).where(Message.page_id == page_id).order_by(Message.id)
+        )).scalars())
+
+
+def test_concurrent_redrive_sends_each_reply_once(monkeypatch):
+    sent: list[str] = []
+
+    async def fake_send(self, token, page_id, recipient_id, text, quick_replies=None):
+        sent.append(text)
+        await asyncio.sleep(0.01)
+        return {"message_id": uuid.uuid4().hex}
+
+    monkeypatch.setattr(SendQueue, "send", fake_send)
+
+    async def run() -> list[Message]:
+        page_id = await _seed(["failed", "failed", "queued", "sent"])
+        delivered = await asyncio.gather(*(redrive_failed_messages() for _ in range(3)))
+        assert sum(delivered) == 3
+        return await _page_messages(page_id)
+
+    messages = asyncio.run(run())
+    assert sorted(sent) == ["reply 0", "reply 1", "reply 2"]
+    assert [m.status for m in messages] == ["sent"] * 4
+    assert [m.send_attempts for m in messages] == [1, 1, 1, 0]
+
+
+def test_failed_redrive_releases_its_claim(monkeypatch):
+    async def fake_send(self, token, page_id, recipient_id, text, quick_replies=None):
+        return {"error": {"message": "blocked", "is_transient": False}}
+
+    monkeypatch.setattr(SendQueue, "send", fake_send)
+
+    async def run() -> list[Message]:
+        page_id = await _seed(["failed"])
+        assert await redrive_failed_messages() == 0
+        return await _page_messages(page_id)
+
+    [message] = asyncio.run(run())
+    assert message.status == "failed"
+    assert message.send_attempts == 1
+
+
+def test_redrive_leaves_live_pipeline_claims_alone(monkeypatch):
+    sent: list[str] = []
+
+    async def fake_send(self, token, page_id, recipient_id, text, quick_replies=None):
+        sent.append(text)
+        return {"message_id": uuid.uuid4().hex}
+
+    monkeypatch.setattr(SendQueue, "send", fake_send)
+
+    async def run() -> list[Message]:
+        # A slow pipeline run: old message, but claimed moments ago
+        page_id = await _seed(["queued"], claimed_at=datetime.now(timezone.utc))
+        assert await redrive_failed_messages() == 0
+        return await _page_messages(page_id)
+
+    [message] = asyncio.run(run())
+    assert sent == []
+    assert message.status == "queued"
+
+
+def test_redrive_keeps_order_summary_buttons(monkeypatch):
+    calls: list = []
+
+    async def fake_send(self, token, page_id, recipient_id, text, quick_replies=None):
+        calls.append(quick_replies)
+        return {"message_id": uuid.uuid4().hex}
+
+    monkeypatch.setattr(SendQueue, "send", fake_send)
+    summary = "Here's your order summary:\n📦 2 t-shirts\n📞 9800000000\n📍 Kathmandu {}"
+
+    async def run() -> None:
+        await _seed(["failed"], content=summary)
+        assert await redrive_failed_messages() == 1
+
+    asyncio.run(run())
+    assert calls == [ORDER_QUICK_REPLIES]
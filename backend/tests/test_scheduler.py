@@ -0,0 +1,58 @@
+import asyncio
+
+from services.history import HistoryTurn
+from services.scheduler import PriorityGate, classify_state
+
+SUMMARY = (
+    "Here's your order summary:\n📦 2 t-shirts\n📞 9800000000\n📍 Kathmandu\n\n"
+    "Reply YES to confirm your order, or let me know if anything needs changing."
+)
+
+
+def test_classify_state():
+    assert classify_state([]) == "browsing"
+    assert classify_state([HistoryTurn("ai", "What's your phone number?", None)]) == "collecting"
+    assert classify_state([HistoryTurn("ai", SUMMARY, None), HistoryTurn("user", "yes", None)]) == "confirming"
+
+
+def test_confirming_waiter_served_before_earlier_browsing_waiter():
+    gate = PriorityGate(limit=1, step_seconds=1.0)
+    order: list[str] = []
+
+    async def turn(state: str) -> None:
+        async with gate.slot(state):
+            order.append(state)
+            await asyncio.sleep(0)
+
+    async def run() -> None:
+        async with gate.slot("browsing"):
+            browsing = asyncio.create_task(turn("browsing"))
+            await asyncio.sleep(0)
+            confirming = asyncio.create_task(turn("confirming"))
+            await asyncio.sleep(0)
+            assert gate.depth() == 2
+        await asyncio.gather(browsing, confirming)
+
+    asyncio.run(run())
+    assert order == ["confirming", "browsing"]
+
+
+def test_browsing_waiter_is_not_starved():
+    gate = PriorityGate(limit=1, step_seconds=0.0)
+    order: list[str] = []
+
+    async def turn(state: str) -> None:
+        async with gate.slot(state):
+            order.append(state)
+
+    async def run() -> None:
+        async with gate.slot("browsing"):
+            tasks = [asyncio.create_task(turn("browsing"))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(turn("confirming")))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    # With no priority step, arrival order wins
+    assert order == ["browsing", "confirming"]
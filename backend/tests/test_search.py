@@ -0,0 +1,36 @@
+import asyncio
+import uuid
+
+from database import db_session, init_db
+from models import Page, SalesLead, User
+from services.search import search_leads
+
+
+def test_lead_matching_text_and_phone_is_returned_once():
+    async def run() -> list[dict]:
+        await init_db()
+        page_id = f"page-{uuid.uuid4().hex[:8]}"
+        async with db_session() as db:
+            db.add(Page(id=page_id, name="Shop", access_token="token", is_active=True))
+            user = User(page_id=page_id, user_id=f"psid-{page_id}")
+            db.add(user)
+            await db.flush()
+            # The first lead hits both the phone prefix and its notes text
+            db.add(SalesLead(
+                page_id=page_id, user_id=user.id, phone_number="9841234567",
+                order_notes="call 9841234567 after 5pm",
+            ))
+            db.add(SalesLead(
+                page_id=page_id, user_id=user.id, phone_number="9800000000",
+                order_notes="alt number 9841234567",
+            ))
+            await db.commit()
+        async with db_session() as db:
+            return await search_leads(db, "9841234567", page_id, limit=10, offset=0)
+
+    hits = asyncio.run(run())
+    assert len(hits) == 2
+    first, second = hits
+    assert first["phone_number"] == "9841234567"
+    assert first["rank"] == 1000.0
+    assert second["phone_number"] == "9800000000"
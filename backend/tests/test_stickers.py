@@ -0,0 +1,42 @@
+import asyncio
+import uuid
+
+import services.messenger as messenger
+from database import db_session, init_db
+from models import Page
+from services.intent_router import STICKER_TEXT
+from services.send_queue import SendQueue
+
+
+def test_sticker_without_template_reply_skips_the_llm(monkeypatch):
+    sent: list[str] = []
+    prompts: list[str] = []
+
+    async def fake_send(self, token, page_id, recipient_id, text, quick_replies=None):
+        sent.append(text)
+        return {"message_id": uuid.uuid4().hex}
+
+    async def fake_reply(message, **kwargs):
+        prompts.append(message)
+        return "Sure! Which size would you like?"
+
+    monkeypatch.setattr(SendQueue, "send", fake_send)
+    monkeypatch.setattr(messenger, "get_ai_reply", fake_reply)
+
+    async def run() -> None:
+        await init_db()
+        page_id = f"page-{uuid.uuid4().hex[:8]}"
+        async with db_session() as db:
+            db.add(Page(id=page_id, name="Shop", access_token="token", is_active=True))
+            await db.commit()
+        for i, text in enumerate(["do you have denim jackets", STICKER_TEXT]):
+            await messenger.handle_incoming_message(
+                sender_id="psid-1", page_id=page_id, fb_message_id=f"mid-{page_id}-{i}",
+                message_text=text,
+            )
+
+    asyncio.run(run())
+    # The bot's last message was a question, so the router declines the
+    # sticker; it must not become an LLM turn either
+    assert prompts == ["do you have denim jackets"]
+    assert sent == ["Sure! Which size would you like?"]
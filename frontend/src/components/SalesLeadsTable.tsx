@@ -43,6 +43,7 @@ import {
   Globe,
 } from "lucide-react";
 import { useAuth } from "@/context/AuthContext";
+import { useRefreshOnEvents } from "@/hooks/use-dashboard-events";
 
 // ── Types ─────────────────────────────────────────────────────────────────────
 
@@ -285,9 +286,15 @@ export default function SalesLeadsTable() {
     setCurrentPage(1);
   }, [selectedPage?.id, statusFilter]);
 
-  async function fetchLeads() {
+  // New orders for the selected page arrive over SSE; reload in place
+  useRefreshOnEvents(API_BASE, ["lead"], () => fetchLeads(true), {
+    pageIds: selectedPage ? [selectedPage.id] : [],
+    enabled: !!selectedPage,
+  });
+
+  async function fetchLeads(silent = false) {
     if (!selectedPage) return;
-    setLoadingLeads(true);
+    if (!silent) setLoadingLeads(true);
     try {
       const params = new URLSearchParams({
         page_id: selectedPage.id,
@@ -415,7 +422,7 @@ export default function SalesLeadsTable() {
             variant="ghost"
             size="icon"
             className="h-8 w-8"
-            onClick={fetchLeads}
+            onClick={() => fetchLeads()}
             disabled={loadingLeads || !selectedPage}
           >
             <RefreshCw
@@ -31,6 +31,7 @@ import { cn } from "@/lib/utils";
 
 import type { WebhookMessage } from "@/types/dashboard.types";
 import WebhookMessageItem from "./WebhookMessageItem";
+import { useDashboardEvents } from "@/hooks/use-dashboard-events";
 
 const API_BASE_URL = "http://localhost:8000";
 
@@ -110,6 +111,8 @@ const WebhookTab: React.FC = () => {
   const [refreshInterval, setRefreshInterval] = useState<number>(5000);
   const [lastUpdated, setLastUpdated] = useState<string>("—");
   const [apiUrl, setApiUrl] = useState<string>("");
+  const [pageFilter, setPageFilter] = useState<string>("all");
+  const [knownPages, setKnownPages] = useState<string[]>([]);
   const [initialLoading, setInitialLoading] = useState<boolean>(true);
   const [error, setError] = useState<string>("");
 
@@ -117,7 +120,8 @@ const WebhookTab: React.FC = () => {
   const fetchWebhookMessages = useCallback(
     async (isInitial = false): Promise<void> => {
       try {
-        const url = apiUrl.trim() || `${API_BASE_URL}/api/recent-messages`;
+        const query = pageFilter === "all" ? "" : `?page_id=${encodeURIComponent(pageFilter)}`;
+        const url = apiUrl.trim() || `${API_BASE_URL}/api/recent-messages${query}`;
         const res = await fetch(url);
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
         const data = await res.json();
@@ -136,7 +140,7 @@ const WebhookTab: React.FC = () => {
         if (isInitial) setInitialLoading(false);
       }
     },
-    [apiUrl],
+    [apiUrl, pageFilter],
   );
 
   // Auto-load on mount
@@ -145,11 +149,71 @@ const WebhookTab: React.FC = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
+  // Reload when the page filter changes (the stream below resubscribes itself)
   useEffect(() => {
-    if (!isAutoRefresh) return;
+    if (!initialLoading) fetchWebhookMessages(false);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [pageFilter]);
+
+  // Pages seen so far, for the filter — kept when the list is narrowed to one
+  useEffect(() => {
+    setKnownPages((prev) => {
+      const seen = new Set(prev);
+      for (const m of webhookMessages) seen.add(m.recipient_id);
+      return seen.size === prev.length ? prev : [...seen].sort();
+    });
+  }, [webhookMessages]);
+
+  const stamp = () =>
+    setLastUpdated(
+      new Date().toLocaleTimeString([], {
+        hour: "2-digit",
+        minute: "2-digit",
+        second: "2-digit",
+      }),
+    );
+
+  // Live updates: the backend pushes new messages/replies over SSE,
+  // subscribed to the selected page only.
+  const streamStatus = useDashboardEvents(
+    API_BASE_URL,
+    {
+      message: (msg) => {
+        setWebhookMessages((prev) =>
+          [{ ...msg, attachments: [], ai_reply: null, ai_status: null }, ...prev].slice(0, 100),
+        );
+        stamp();
+      },
+      reply: (reply) => {
+        setWebhookMessages((prev) =>
+          prev.map((m) =>
+            m.message_id === reply.reply_to
+              ? { ...m, ai_reply: reply.ai_reply, ai_status: reply.ai_status }
+              : m,
+          ),
+        );
+        stamp();
+      },
+      // Anything sent while disconnected was missed
+      reconnect: () => fetchWebhookMessages(false),
+    },
+    {
+      pageIds: pageFilter === "all" ? [] : [pageFilter],
+      enabled: isAutoRefresh && !apiUrl.trim(),
+    },
+  );
+
+  useEffect(() => {
+    if (streamStatus === "reconnecting") setError("Live updates disconnected — reconnecting…");
+    if (streamStatus === "open") setError("");
+  }, [streamStatus]);
+
+  // A custom API URL has no push channel, so fall back to polling it.
+  useEffect(() => {
+    if (!isAutoRefresh || !apiUrl.trim()) return;
     const id = setInterval(() => fetchWebhookMessages(false), refreshInterval);
     return () => clearInterval(id);
-  }, [isAutoRefresh, refreshInterval, fetchWebhookMessages]);
+  }, [isAutoRefresh, refreshInterval, apiUrl, fetchWebhookMessages]);
 
   const uniqueSenders = new Set(webhookMessages.map((m) => m.sender_id)).size;
   const sortedWebhook = [...webhookMessages].sort(
@@ -278,6 +342,20 @@ const WebhookTab: React.FC = () => {
                 className="h-6 hidden sm:block"
               />
 
+              <Select value={pageFilter} onValueChange={setPageFilter}>
+                <SelectTrigger className="h-8 w-40 text-xs">
+                  <SelectValue />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="all">All pages</SelectItem>
+                  {knownPages.map((id) => (
+                    <SelectItem key={id} value={id}>
+                      Page {id}
+                    </SelectItem>
+                  ))}
+                </SelectContent>
+              </Select>
+
               <Select
                 value={String(refreshInterval)}
                 onValueChange={(v) => setRefreshInterval(Number(v))}
@@ -47,12 +47,14 @@ import {
 } from "lucide-react";
 import {
   api,
+  API_BASE,
   fmt,
   timeAgo,
   type LeadRow,
   type PaginatedResponse,
   LEAD_STATUSES,
 } from "@/lib/admin_api";
+import { useRefreshOnEvents } from "@/hooks/use-dashboard-events";
 import {
   RowSkeleton,
   Pagination,
@@ -89,9 +91,12 @@ export function LeadsPage({ token, initialStatus }: Props) {
   const [saving, setSaving] = useState(false);
   const [deleteId, setDeleteId] = useState<number | null>(null);
 
-  const load = useCallback(() => {
-    setLoading(true);
-    setSelected(new Set());
+  const load = useCallback((silent = false) => {
+    // A pushed refresh keeps the table and the current selection on screen
+    if (!silent) {
+      setLoading(true);
+      setSelected(new Set());
+    }
     const params = new URLSearchParams({ page: String(page), page_size: "20" });
     if (statusFilter !== "all") params.set("status", statusFilter);
     if (search) params.set("search", search);
@@ -104,6 +109,8 @@ export function LeadsPage({ token, initialStatus }: Props) {
     load();
   }, [load]);
 
+  useRefreshOnEvents(API_BASE, ["lead"], () => load(true));
+
   function handleSearch(e: React.FormEvent) {
     e.preventDefault();
     setSearch(searchInput);
@@ -206,7 +213,7 @@ export function LeadsPage({ token, initialStatus }: Props) {
               variant="ghost"
               size="icon"
               className="h-9 w-9"
-              onClick={load}
+              onClick={() => load()}
               disabled={loading}
             >
               <RefreshCw
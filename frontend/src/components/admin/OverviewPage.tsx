@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useCallback, useEffect, useState } from "react";
 import {
   Globe,
   Users,
@@ -16,6 +16,7 @@ import {
 import { Skeleton } from "@/components/ui/skeleton";
 import {
   api,
+  API_BASE,
   type Stats,
   type PageRow,
   type PageStats,
@@ -23,6 +24,7 @@ import {
 } from "@/lib/admin_api";
 import { StatCard, SectionHeader } from "./shared";
 import { Badge } from "@/components/ui/badge";
+import { useRefreshOnEvents } from "@/hooks/use-dashboard-events";
 
 interface Props {
   token: string;
@@ -35,7 +37,7 @@ export function OverviewPage({ token, onNavigate }: Props) {
   const [pageStats, setPageStats] = useState<Record<string, PageStats>>({});
   const [loading, setLoading] = useState(true);
 
-  useEffect(() => {
+  const load = useCallback(() => {
     Promise.all([
       api<Stats>("/stats", token),
       api<PaginatedResponse<PageRow>>("/pages?page_size=10", token),
@@ -57,6 +59,14 @@ export function OverviewPage({ token, onNavigate }: Props) {
       .finally(() => setLoading(false));
   }, [token]);
 
+  useEffect(() => {
+    load();
+  }, [load]);
+
+  // Counts move with every message, reply and order: reload on push
+  // instead of polling, at most every couple of seconds
+  useRefreshOnEvents(API_BASE, ["message", "reply", "lead"], load, { delayMs: 2000 });
+
   if (loading) return <OverviewSkeleton />;
   if (!stats) return null;
 
@@ -101,6 +111,14 @@ export function OverviewPage({ token, onNavigate }: Props) {
             color="amber"
             onClick={() => onNavigate("logs")}
           />
+          <StatCard
+            label="Rate Limited"
+            value={stats.rate_limited_user + stats.rate_limited_page}
+            sub={`${stats.temp_blocked_users} temporarily blocked`}
+            icon={UserX}
+            color="rose"
+            onClick={() => onNavigate("users")}
+          />
         </div>
       </div>
 
@@ -0,0 +1,109 @@
+import * as React from "react"
+
+export type DashboardEventType = "message" | "reply" | "lead"
+
+export type DashboardEventStatus = "off" | "connecting" | "open" | "reconnecting"
+
+// Payloads are the backend's JSON as-is (see backend/routes/events.py)
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+export type DashboardEventHandler = (data: any) => void
+
+export type DashboardEventHandlers = Partial<Record<DashboardEventType, DashboardEventHandler>> & {
+  // Called when the stream comes back after a drop; events sent meanwhile
+  // are lost, so views should reload what they show
+  reconnect?: () => void
+}
+
+interface Options {
+  pageIds?: string[]     // only events for these pages; empty → every page
+  enabled?: boolean
+}
+
+const EVENT_TYPES: DashboardEventType[] = ["message", "reply", "lead"]
+
+/**
+ * Live dashboard updates over Server-Sent Events (GET /api/events).
+ *
+ * The page filter is applied server-side. Handlers are read through a
+ * ref, so new closures on every render do not reopen the connection —
+ * only a change of URL, page filter or `enabled` does.
+ */
+export function useDashboardEvents(
+  baseUrl: string,
+  handlers: DashboardEventHandlers,
+  { pageIds = [], enabled = true }: Options = {},
+): DashboardEventStatus {
+  const handlersRef = React.useRef(handlers)
+  React.useEffect(() => {
+    handlersRef.current = handlers
+  })
+
+  const [status, setStatus] = React.useState<DashboardEventStatus>("off")
+  const filter = [...new Set(pageIds.filter(Boolean))].sort().join(",")
+
+  React.useEffect(() => {
+    if (!enabled) {
+      setStatus("off")
+      return
+    }
+    const params = new URLSearchParams()
+    for (const id of filter.split(",").filter(Boolean)) params.append("page_id", id)
+    const query = params.toString()
+    const source = new EventSource(`${baseUrl}/api/events${query ? `?${query}` : ""}`)
+
+    let dropped = false
+    setStatus("connecting")
+    source.onopen = () => {
+      setStatus("open")
+      if (dropped) handlersRef.current.reconnect?.()
+      dropped = false
+    }
+    source.onerror = () => {
+      // EventSource reconnects on its own (the server sends retry: 3000)
+      dropped = true
+      setStatus("reconnecting")
+    }
+    for (const type of EVENT_TYPES) {
+      source.addEventListener(type, (e) => {
+        handlersRef.current[type]?.(JSON.parse((e as MessageEvent).data))
+      })
+    }
+
+    return () => source.close()
+  }, [baseUrl, filter, enabled])
+
+  return status
+}
+
+/**
+ * Calls `refresh` shortly after any of `types` arrives (and after a
+ * reconnect), coalescing a burst of events into one reload. For views
+ * that show counts or server-paginated rows rather than patching
+ * themselves from the event payload.
+ */
+export function useRefreshOnEvents(
+  baseUrl: string,
+  types: DashboardEventType[],
+  refresh: () => void,
+  { delayMs = 1000, ...options }: Options & { delayMs?: number } = {},
+): DashboardEventStatus {
+  const refreshRef = React.useRef(refresh)
+  React.useEffect(() => {
+    refreshRef.current = refresh
+  })
+
+  const timer = React.useRef<ReturnType<typeof setTimeout> | undefined>(undefined)
+  React.useEffect(() => () => clearTimeout(timer.current), [])
+
+  const schedule = () => {
+    if (timer.current !== undefined) return
+    timer.current = setTimeout(() => {
+      timer.current = undefined
+      refreshRef.current()
+    }, delayMs)
+  }
+
+  const handlers: DashboardEventHandlers = { reconnect: schedule }
+  for (const type of types) handlers[type] = schedule
+  return useDashboardEvents(baseUrl, handlers, options)
+}
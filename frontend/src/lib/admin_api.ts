@@ -10,6 +10,7 @@ export interface Stats {
   active_pages: number;
   total_users: number;
   blocked_users: number;
+  temp_blocked_users: number;
   active_users_24h: number;
   total_messages: number;
   messages_today: number;
@@ -20,6 +21,9 @@ export interface Stats {
   confirmed_leads: number;
   cancelled_leads: number;
   delivered_leads: number;
+  rate_limited_user: number;
+  rate_limited_page: number;
+  auto_blocks: number;
 }
 
 export interface PageStats {
@@ -52,6 +52,7 @@ import type {
   WebhookMessageItemProps,
 } from "../types/dashboard.types";
 import { useAuth } from "@/context/AuthContext";
+import { useDashboardEvents } from "@/hooks/use-dashboard-events";
 
 // ─── Constants ────────────────────────────────────────────────────────────────
 
@@ -321,7 +322,8 @@ const UnifiedDashboard: React.FC = () => {
   // ─── Webhook: fetch recent messages ───────────────────────────────────
   const fetchWebhookMessages = useCallback(async (): Promise<void> => {
     try {
-      const url = apiUrl.trim() || `${API_BASE_URL}/api/recent-messages`;
+      const query = selectedPage ? `?page_id=${encodeURIComponent(selectedPage.id)}` : "";
+      const url = apiUrl.trim() || `${API_BASE_URL}/api/recent-messages${query}`;
       const res = await fetch(url);
       if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
       const data = await res.json();
@@ -331,7 +333,7 @@ const UnifiedDashboard: React.FC = () => {
     } catch (err) {
       setError((err as Error).message || "Failed to fetch messages");
     }
-  }, [apiUrl]);
+  }, [apiUrl, selectedPage]);
 
   // ─── AI: get response ──────────────────────────────────────────────────
   const getAiRes = async (): Promise<void> => {
@@ -359,11 +361,40 @@ const UnifiedDashboard: React.FC = () => {
     if (activeTab === "webhook") fetchWebhookMessages();
   }, [activeTab, fetchWebhookMessages]);
 
+  // Live updates over SSE for the selected page; a custom API URL has no
+  // push channel, so that one is still polled
+  useDashboardEvents(
+    API_BASE_URL,
+    {
+      message: (msg) => {
+        setWebhookMessages((prev) =>
+          [{ ...msg, attachments: [], ai_reply: null, ai_status: null }, ...prev].slice(0, 100),
+        );
+        setLastUpdated(new Date().toLocaleTimeString());
+      },
+      reply: (reply) => {
+        setWebhookMessages((prev) =>
+          prev.map((m) =>
+            m.message_id === reply.reply_to
+              ? { ...m, ai_reply: reply.ai_reply, ai_status: reply.ai_status }
+              : m,
+          ),
+        );
+        setLastUpdated(new Date().toLocaleTimeString());
+      },
+      reconnect: fetchWebhookMessages,
+    },
+    {
+      pageIds: selectedPage ? [selectedPage.id] : [],
+      enabled: isAutoRefresh && activeTab === "webhook" && !apiUrl.trim(),
+    },
+  );
+
   useEffect(() => {
-    if (!isAutoRefresh || activeTab !== "webhook") return;
+    if (!isAutoRefresh || activeTab !== "webhook" || !apiUrl.trim()) return;
     const id = setInterval(fetchWebhookMessages, refreshInterval);
     return () => clearInterval(id);
-  }, [isAutoRefresh, refreshInterval, activeTab, fetchWebhookMessages]);
+  }, [isAutoRefresh, refreshInterval, activeTab, apiUrl, fetchWebhookMessages]);
 
   // ─── Derived ──────────────────────────────────────────────────────────
   const uniqueSenders = new Set(webhookMessages.map((m) => m.sender_id)).size;